@@ -1,6 +1,7 @@
 import os
+import atexit
 import logging
-from flask import Flask, jsonify
+from flask import Flask
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from dotenv import load_dotenv
@@ -24,9 +25,29 @@ from routes.register_routes import register_bp
 from routes.reports_routes import reports_bp
 from routes.patients_routes import patients_bp
 from routes.images import image_bp  # Make sure this matches your file & variable name!
+from routes.uploads_routes import uploads_bp
+from routes.health_routes import health_bp
+from routes.metrics_routes import metrics_bp
 
 # Import services
 from services.auth.auth_service import initialize_auth_system
+from services.search.patient_search_service import register_index_listeners
+from services.storage.retention_service import get_retention_manager
+from services.storage.storage_backend import get_storage
+from services.image_processing.pixel_cache import get_pixel_cache
+from services.logs.processing_log_service import get_processing_log
+from services.http.json_provider import init_json_provider
+from services.http.compression import init_compression
+from services.http.admission import init_admission
+from services.http.rate_limit import init_rate_limit
+from services.metrics.metrics_service import init_metrics, get_worker_metrics
+from services.metrics.service_metrics import init_service_metrics
+from services.metrics.request_profiler import init_profiler
+from services.precompute.precompute_service import init_precompute
+from services.concurrency.executors import get_cpu_executor
+from services.database.database_service import db_service, init_read_your_writes
+from services.health.warmup import get_warmup, WARMUP_MODES
+from models.patient_model import Patient
 
 # Setup logging
 logging.basicConfig(
@@ -35,7 +56,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def create_app(config_name='default'):
+def start_background_tasks(app):
+    """
+    Start the app's background threads.
+
+    Threads do not survive fork, so a pre-forking server calls this in each
+    worker after forking instead of letting create_app start them.
+    """
+    # Start upload retention in the background
+    if app.config['RETENTION_ENABLED']:
+        get_retention_manager(app.config).start()
+
+    # Connect, load models and fill caches without holding up liveness checks
+    get_warmup(app).start()
+
+    # Share this worker's metrics with the machine's other workers
+    if app.config['METRICS_ENABLED']:
+        get_worker_metrics(app.config).start()
+
+
+def create_app(config_name='default', start_background=True):
     app = Flask(__name__)
 
     # Load config
@@ -57,14 +97,45 @@ def create_app(config_name='default'):
     # Initialize db with app
     db.init_app(app)
 
+    # Select the storage backend for uploads and derived images
+    storage = get_storage(app.config)
+    atexit.register(storage.flush)
+
+    # Shared cache of decoded pixels (None when disabled)
+    get_pixel_cache(app.config)
+
+    # OS threads for CPU-bound work when requests run on an event loop
+    get_cpu_executor(app.config)
+
+    # Write out buffered processing log entries on shutdown
+    atexit.register(get_processing_log(app.config).flush)
+
+    # Keep the patient search index in sync with ORM writes
+    register_index_listeners(Patient)
+
     # Create model directory if needed
     model_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
     app.config['MODEL_DIR'] = model_dir
     os.makedirs(model_dir, exist_ok=True)
+    if app.config['MODEL_WARMUP'] not in WARMUP_MODES:
+        raise ValueError(f"MODEL_WARMUP must be one of {', '.join(WARMUP_MODES)}")
+
+    # Request and stage latency.  Registered before every other hook: Flask runs
+    # before_request hooks in registration order and after_request hooks in
+    # reverse, so the timer also covers CORS headers and response compression.
+    if app.config['METRICS_ENABLED']:
+        init_metrics(app)
+        init_service_metrics(app)
+        app.register_blueprint(metrics_bp)  # /metrics
 
     # Enable CORS with credentials support
     CORS(app, supports_credentials=True)
 
+    # Fast JSON encoding and compressed responses
+    init_json_provider(app)
+    if app.config['COMPRESSION_ENABLED']:
+        init_compression(app)
+
     # Setup JWT
     JWTManager(app)
 
@@ -88,12 +159,32 @@ def create_app(config_name='default'):
     app.register_blueprint(register_bp, url_prefix='/api/register')
     app.register_blueprint(reports_bp, url_prefix='/api/reports')
     app.register_blueprint(image_bp)  # No prefix, uses route as defined in blueprint
+    app.register_blueprint(uploads_bp, url_prefix='/api/uploads')
     app.register_blueprint(patients_bp)
+    app.register_blueprint(health_bp)  # /health, /health/live, /health/ready
+
+    # Pin a client's reads to the primary after it writes, across requests
+    if db_service.replicas:
+        init_read_your_writes(app)
+
+    # Profile requests on demand; before the limits so queueing shows in the profile
+    if app.config['PROFILING_ENABLED']:
+        init_profiler(app)
+
+    # Refuse over-quota users before they take an inference slot
+    if app.config['RATE_LIMIT_ENABLED']:
+        init_rate_limit(app)
+
+    # Queue or shed inference requests before they pile up in the worker
+    if app.config['ADMISSION_ENABLED']:
+        init_admission(app)
+
+    # Let speculative precompute yield to interactive requests
+    if app.config['PRECOMPUTE_ENABLED']:
+        init_precompute(app)
 
-    # Health check endpoint
-    @app.route('/health', methods=['GET'])
-    def health_check():
-        return jsonify({'status': 'healthy', 'message': 'AIDentify API is running'}), 200
+    if start_background:
+        start_background_tasks(app)
 
     return app
 
@@ -0,0 +1,267 @@
+# backend/benchmarks/fixtures.py
+"""
+Stand-ins shared by the benchmarks: synthetic X-rays, a model with the
+real models' input shapes and an SQLite database behind the
+DatabaseService interface.
+
+None of these is used by the app itself; they let the hot paths run on a
+laptop without the trained models, MySQL or patient data.
+"""
+import re
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import numpy as np
+import cv2
+
+# (width, height) of the radiographs we receive most, from the uploads seen in production
+XRAY_SIZES = {
+    'panoramic': (2880, 1504),
+    'periapical': (1024, 1360),
+    'bitewing': (1360, 1024)
+}
+
+
+def synthetic_xray(kind='panoramic', seed=0):
+    """
+    A grayscale radiograph-like image: dark background, a bright jaw arch,
+    a row of teeth with darker pulp, film grain and a vignette.  Structure
+    matters only so that JPEG sizes and OpenCV filter costs are realistic.
+    """
+    width, height = XRAY_SIZES[kind]
+    rng = np.random.default_rng(seed)
+    img = np.full((height, width), 35, dtype=np.float32)
+
+    # Jaw arch
+    centre = (width // 2, int(height * 0.15))
+    axes = (int(width * 0.42), int(height * 0.7))
+    cv2.ellipse(img, centre, axes, 0, 20, 160, 120, thickness=int(height * 0.22))
+
+    # Teeth along the arch, with a darker pulp chamber
+    teeth = 16 if kind == 'panoramic' else 4
+    for i in range(teeth):
+        angle = np.deg2rad(25 + 130 * (i + 0.5) / teeth)
+        x = int(centre[0] + axes[0] * np.cos(angle))
+        y = int(centre[1] + axes[1] * np.sin(angle) * 0.9)
+        size = (int(width / (teeth * 2.6)), int(height * 0.17))
+        cv2.ellipse(img, (x, y), size, 0, 0, 360, int(215 + rng.integers(-20, 20)), thickness=-1)
+        cv2.ellipse(img, (x, y), (size[0] // 3, size[1] // 2), 0, 0, 360, 150, thickness=-1)
+
+    img = cv2.GaussianBlur(img, (0, 0), sigmaX=width / 400)
+    img += rng.normal(0, 9, img.shape).astype(np.float32)
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    vignette = 1 - 0.35 * (((xx - width / 2) / (width / 2)) ** 2 + ((yy - height / 2) / (height / 2)) ** 2)
+    return np.clip(img * vignette, 0, 255).astype(np.uint8)
+
+
+def encode_image(img, ext='.jpg', quality=92):
+    """Encode as uploads arrive: 3-channel JPEG (most scanners save gray as RGB)."""
+    if len(img.shape) == 2:
+        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality] if ext in ('.jpg', '.jpeg') else []
+    ok, buffer = cv2.imencode(ext, img, params)
+    if not ok:
+        raise RuntimeError(f"Could not encode synthetic image as {ext}")
+    return buffer.tobytes()
+
+
+class StandInModel:
+    """
+    Deterministic stand-in for a Keras classifier: same input shape and
+    output (one softmax row per image), with a dense layer over every
+    input value so its cost grows with the input like a real model's.
+    It does not approach the real model's cost; what it measures is the
+    code around predict().
+    """
+
+    def __init__(self, input_shape, classes=4, seed=0):
+        self.input_shape = tuple(input_shape)
+        rng = np.random.default_rng(seed)
+        self.weights = rng.normal(0, 1e-3, (int(np.prod(input_shape)), classes)).astype(np.float32)
+        self.calls = 0
+
+    def predict(self, batch, verbose=0):
+        batch = np.asarray(batch, dtype=np.float32)
+        if batch.shape[1:] != self.input_shape:
+            raise ValueError(f"Expected input of shape (None, {self.input_shape}), got {batch.shape}")
+        self.calls += 1
+        logits = batch.reshape(len(batch), -1) @ self.weights
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+
+
+class FixedLatencyModel(StandInModel):
+    """StandInModel that takes `latency` seconds per predict() call, like a real model on our machines."""
+
+    def __init__(self, input_shape, latency, classes=4, seed=0):
+        super().__init__(input_shape, classes, seed)
+        self.latency = latency
+
+    def predict(self, batch, verbose=0):
+        started = time.perf_counter()
+        result = super().predict(batch, verbose)
+        remaining = self.latency - (time.perf_counter() - started)
+        if remaining > 0:
+            time.sleep(remaining)
+        return result
+
+
+def install_models(make_model):
+    """
+    Replace the X-ray model and the dental classifier's model with
+    make_model(input_shape), so neither TensorFlow nor the model files
+    are needed.  Run with MODEL_WARMUP=lazy so warm-up does not load the
+    real ones first.
+    """
+    from services.model_inference import xray_service
+    from services.detection.dental_classification_service import get_dental_classifier
+
+    xray_service._model = make_model((256, 256, 3))
+    classifier = get_dental_classifier()
+    classifier.model = make_model(classifier.img_size + (3,))
+
+
+_SCHEMA = [
+    """
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        email TEXT NOT NULL,
+        password TEXT NOT NULL,
+        role TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'inProcess',
+        phoneNumber TEXT NULL,
+        Country TEXT NULL,
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE activity_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NULL,
+        action TEXT NULL,
+        description TEXT NULL,
+        timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # Same indexes as the MySQL migrations
+    "CREATE UNIQUE INDEX ux_users_email ON users (email)",
+    "CREATE INDEX ix_users_status_created ON users (status, created_at)",
+    "CREATE INDEX ix_users_created ON users (created_at)",
+    "CREATE INDEX ix_activity_logs_user_time ON activity_logs (user_id, timestamp)",
+    "CREATE INDEX ix_activity_logs_time ON activity_logs (timestamp)",
+]
+
+_MYSQL_ONLY = re.compile(r'\s+FOR UPDATE\b', re.IGNORECASE)
+
+
+def _to_sqlite(query):
+    return _MYSQL_ONLY.sub('', query).replace('%s', '?')
+
+
+class _DictCursor:
+    """The slice of mysql-connector's dictionary cursor the models use."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, params=()):
+        self._cursor.execute(_to_sqlite(query), params)
+
+    def executemany(self, query, rows):
+        self._cursor.executemany(_to_sqlite(query), rows)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return dict(row) if row is not None else None
+
+    def fetchall(self):
+        return [dict(row) for row in self._cursor.fetchall()]
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteDatabase:
+    """
+    In-memory SQLite behind DatabaseService's query methods, for
+    benchmarking model query paths without MySQL.  Translates %s
+    placeholders and drops FOR UPDATE; query plans differ from InnoDB's,
+    so compare results against the stand-in's own baseline only.
+    """
+
+    def __init__(self):
+        self._conn = sqlite3.connect(':memory:', check_same_thread=False,
+                                     detect_types=sqlite3.PARSE_DECLTYPES)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        self.stats = {'primary_reads': 0, 'replica_reads': 0, 'replica_failovers': 0, 'writes': 0}
+        self.replicas = []
+        with self._lock:
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+
+    def execute_query(self, query, params=None, fetch=False):
+        with self._lock:
+            cursor = _DictCursor(self._conn.cursor())
+            cursor.execute(query, params or ())
+            if fetch:
+                self.stats['primary_reads'] += 1
+                return cursor.fetchall()
+            self._conn.commit()
+            self.stats['writes'] += 1
+            return True
+
+    def execute_single_query(self, query, params=None):
+        with self._lock:
+            cursor = _DictCursor(self._conn.cursor())
+            cursor.execute(query, params or ())
+            self.stats['primary_reads'] += 1
+            return cursor.fetchone()
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            cursor = _DictCursor(self._conn.cursor())
+            try:
+                yield cursor
+                self._conn.commit()
+                self.stats['writes'] += 1
+            except Exception:
+                self._conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    @contextmanager
+    def use_primary(self):
+        yield
+
+    def seed_users(self, users=5000, logs_per_user=4, seed=0):
+        """Users with a realistic role/status mix and an activity history; returns the emails."""
+        rng = np.random.default_rng(seed)
+        roles = rng.choice(['doctor', 'employee', 'admin'], size=users, p=[0.6, 0.35, 0.05])
+        statuses = rng.choice(['approved', 'inProcess', 'rejected'], size=users, p=[0.8, 0.15, 0.05])
+        now = datetime(2025, 6, 1, 12, 0, 0)
+        rows = [(f"User {i}", f"user{i}@example.com", '$2b$12$' + 'x' * 53, str(roles[i]), str(statuses[i]),
+                 f"+96170{i:06d}", 'Lebanon', now - timedelta(minutes=i)) for i in range(users)]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO users (name, email, password, role, status, phoneNumber, Country, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.executemany(
+                "INSERT INTO activity_logs (user_id, action, description, timestamp) VALUES (?, ?, ?, ?)",
+                [(user_id, 'Login', 'Logged in', now - timedelta(minutes=user_id * logs_per_user + n))
+                 for user_id in range(1, users + 1) for n in range(logs_per_user)])
+            self._conn.commit()
+        return [row[1] for row in rows]
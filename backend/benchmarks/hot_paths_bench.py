@@ -0,0 +1,254 @@
+# backend/benchmarks/hot_paths_bench.py
+"""
+Microbenchmarks of the image, inference and user-query hot paths, with
+regression checks against a stored baseline.
+
+Images are synthetic radiographs at the sizes we receive (see
+fixtures.XRAY_SIZES), the models are stand-ins with the real input shapes
+and User queries run against an in-memory SQLite copy of the schema, so
+the suite runs anywhere without TensorFlow, MySQL or patient data.
+
+    cd backend && python -m benchmarks.hot_paths_bench [--repeat N] [--only enhance,user.]
+    cd backend && python -m benchmarks.hot_paths_bench --save-baseline
+
+Every run is written to benchmarks/results/<timestamp>.json.  When
+benchmarks/results/baseline.json exists (or --baseline PATH), medians are
+compared against it and the run exits with status 1 if any benchmark is
+slower than its threshold allows.  Baselines are only meaningful on the
+machine that recorded them.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import subprocess
+import statistics
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import synthetic_xray, encode_image, StandInModel, SQLiteDatabase
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+BASELINE_PATH = os.path.join(RESULTS_DIR, 'baseline.json')
+
+# Allowed slowdown of the median before a benchmark counts as regressed
+DEFAULT_THRESHOLD = 0.15
+
+# Noisier benchmarks (prefix match)
+THRESHOLDS = {
+    'user.': 0.25,
+}
+
+# Differences below this many seconds are noise whatever the ratio
+MIN_DELTA_SECONDS = 0.0005
+
+
+def setup_images(root, kinds):
+    """Write one synthetic upload per kind into local storage; returns {kind: (key, bytes)}."""
+    from services.storage.storage_backend import get_storage
+
+    storage = get_storage({'STORAGE_BACKEND': 'local', 'UPLOAD_FOLDER': root})
+    images = {}
+    for kind in kinds:
+        data = encode_image(synthetic_xray(kind))
+        key = f"bench_{kind}.jpg"
+        storage.write_bytes(key, data)
+        images[kind] = (key, data)
+    return images
+
+
+def image_benchmarks(images):
+    from services.detection.dental_classification_service import DentalClassifier
+    from services.model_inference import xray_service
+    from services.image_processing.enhance_service import enhance_image
+    from services.image_processing.colorize_service import colorize_image
+    from services.detection.cavity_detection import detect_cavities
+    from services.utils import image_to_base64
+
+    classifier = DentalClassifier()
+    classifier.model = StandInModel(classifier.img_size + (3,))
+    xray_service._model = StandInModel((256, 256, 3))
+
+    def checked(fn, *args):
+        # A hot path that fails fast would look like a speed-up
+        def run():
+            result = fn(*args)
+            if result is None or (isinstance(result, tuple) and result[0] is None):
+                raise RuntimeError(f"{fn.__name__}{args} failed")
+            return result
+        return run
+
+    benchmarks = {}
+    for kind, (key, data) in images.items():
+        benchmarks.update({
+            f"dental.preprocess_image[{kind}]": checked(classifier.preprocess_image, key),
+            f"dental.predict[{kind}]": checked(classifier.predict, key),
+            f"xray.predict_xray[{kind}]": checked(xray_service.predict_xray, data),
+            f"process.enhance_image[{kind}]": checked(enhance_image, key),
+            f"process.colorize_image[{kind}]": checked(colorize_image, key),
+            f"detect.detect_cavities[{kind}]": checked(detect_cavities, key),
+            f"utils.image_to_base64[{kind}]": checked(image_to_base64, key),
+        })
+    return benchmarks
+
+
+def user_benchmarks(users=5000):
+    import models.user_model as user_model
+    from models.user_model import User
+
+    database = SQLiteDatabase()
+    emails = database.seed_users(users)
+    # The models import db_service by name, so swap it there
+    user_model.db_service = database
+
+    counter = iter(range(10 ** 9))
+
+    def bulk_update():
+        n = next(counter)
+        status = 'approved' if n % 2 else 'inProcess'
+        User.bulk_update_status([(user_id, status) for user_id in range(1, 51)], 'bench@example.com')
+
+    return {
+        'user.get_by_email': lambda: User.get_by_email(emails[next(counter) % len(emails)]),
+        'user.get_by_id': lambda: User.get_by_id(next(counter) % users + 1),
+        'user.get_all_users': User.get_all_users,
+        'user.get_users_by_status': lambda: User.get_users_by_status('inProcess'),
+        'user.get_activity_logs': lambda: User.get_activity_logs(100),
+        'user.bulk_update_status[50]': bulk_update,
+    }
+
+
+def measure(fn, repeat, warmup=2):
+    for _ in range(warmup):
+        fn()
+    gc.collect()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    times.sort()
+    return {
+        'median': statistics.median(times),
+        'p95': times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))],
+        'min': times[0],
+        'mean': statistics.fmean(times),
+        'runs': repeat
+    }
+
+
+def threshold_for(name, default):
+    for prefix, threshold in THRESHOLDS.items():
+        if name.startswith(prefix):
+            return max(threshold, default)
+    return default
+
+
+def compare(results, baseline, default_threshold=DEFAULT_THRESHOLD):
+    """
+    Returns:
+        List of (name, baseline median, current median, ratio, status) with
+        status 'ok', 'regressed', 'improved' or 'new'
+    """
+    rows = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            rows.append((name, None, current['median'], None, 'new'))
+            continue
+        ratio = current['median'] / base['median'] if base['median'] else float('inf')
+        delta = current['median'] - base['median']
+        threshold = threshold_for(name, default_threshold)
+        if ratio > 1 + threshold and delta > MIN_DELTA_SECONDS:
+            status = 'regressed'
+        elif ratio < 1 - threshold and -delta > MIN_DELTA_SECONDS:
+            status = 'improved'
+        else:
+            status = 'ok'
+        rows.append((name, base['median'], current['median'], ratio, status))
+    return rows
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=15)
+    parser.add_argument('--kinds', default='panoramic,periapical', help='Comma-separated keys of fixtures.XRAY_SIZES')
+    parser.add_argument('--only', help='Comma-separated name prefixes to run')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Allowed median slowdown (0.15 = 15%%)')
+    parser.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline')
+    args = parser.parse_args(argv)
+
+    # The services log every call; keep the output to results
+    logging.basicConfig(level=logging.ERROR)
+
+    with tempfile.TemporaryDirectory(prefix='hot-paths-bench-') as root:
+        images = setup_images(root, args.kinds.split(','))
+        benchmarks = {**image_benchmarks(images), **user_benchmarks()}
+        if args.only:
+            prefixes = tuple(args.only.split(','))
+            benchmarks = {name: fn for name, fn in benchmarks.items() if name.startswith(prefixes)}
+
+        results = {}
+        for name, fn in benchmarks.items():
+            results[name] = measure(fn, args.repeat)
+            print(f"{name:40} {results[name]['median'] * 1000:10.2f} ms  (p95 {results[name]['p95'] * 1000:.2f})")
+
+    run = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'machine': f"{platform.system()} {platform.machine()}",
+        'cpu_count': os.cpu_count(),
+        'repeat': args.repeat,
+        'benchmarks': results
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, time.strftime('%Y%m%dT%H%M%S') + '.json')
+    with open(path, 'w') as f:
+        json.dump(run, f, indent=2)
+    print(f"\nResults written to {path}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against (run with --save-baseline)")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline['benchmarks'], args.threshold)
+    print(f"\nAgainst baseline {baseline.get('git_revision')} ({baseline.get('created_at')}):")
+    print(f"{'benchmark':40} {'baseline ms':>12} {'now ms':>10} {'ratio':>7}  status")
+    for name, base, current, ratio, status in rows:
+        base_ms = f"{base * 1000:.2f}" if base is not None else '-'
+        ratio_text = f"{ratio:.2f}" if ratio is not None else '-'
+        print(f"{name:40} {base_ms:>12} {current * 1000:10.2f} {ratio_text:>7}  {status}")
+    regressed = [row[0] for row in rows if row[4] == 'regressed']
+    if regressed:
+        print(f"\n{len(regressed)} regression(s): {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
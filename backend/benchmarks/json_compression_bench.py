@@ -0,0 +1,111 @@
+# backend/benchmarks/json_compression_bench.py
+"""
+Serialization time and bytes on the wire for our largest JSON responses.
+
+Compares Flask's stock provider, the stdlib fallback and orjson, then the
+size and cost of gzip/brotli on each encoded body.  Payloads mirror the
+real endpoints: a processing route returning a base64 X-ray, the admin
+user list and a page of processing logs.
+
+    cd backend && python -m benchmarks.json_compression_bench [--image PATH] [--repeat N]
+"""
+import os
+import sys
+import glob
+import time
+import base64
+import random
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from services.http.json_provider import FastJSONProvider, StdlibJSONProvider, orjson
+from services.http.compression import compress, brotli
+
+
+def find_sample_image():
+    uploads = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'uploads')
+    images = sorted(glob.glob(os.path.join(uploads, '*.jpg')) + glob.glob(os.path.join(uploads, '*.png')))
+    return max(images, key=os.path.getsize) if images else None
+
+
+def build_payloads(image_path, users=5000, logs=200):
+    """Representative response bodies, keyed by endpoint."""
+    if image_path:
+        with open(image_path, 'rb') as f:
+            image = base64.b64encode(f.read()).decode('utf-8')
+    else:
+        image = base64.b64encode(os.urandom(400 * 1024)).decode('utf-8')
+
+    rng = random.Random(42)
+    now = datetime(2025, 6, 1, 12, 0, 0)
+    user_rows = [{
+        'id': i,
+        'name': f"User {i}",
+        'email': f"user{i}@example.com",
+        'role': rng.choice(['doctor', 'employee', 'admin']),
+        'status': rng.choice(['approved', 'inProcess', 'rejected']),
+        'phoneNumber': f"+96170{i:06d}",
+        'Country': 'Lebanon',
+        'created_at': now - timedelta(minutes=i)
+    } for i in range(users)]
+    log_rows = [{
+        'id': i,
+        'user_id': f"user{i % 50}@example.com",
+        'action': rng.choice(['enhance', 'colorize', 'detect_cavities', 'dental_analysis']),
+        'timestamp': (now - timedelta(seconds=i)).timestamp(),
+        'image_path': f"blobs/ab/cd/{i:064x}.jpg",
+        'result_path': f"enhanced_{i:064x}.jpg"
+    } for i in range(logs)]
+
+    # Stock Flask cannot encode numpy, so the xray body is benchmarked pre-converted there
+    return {
+        'POST /api/process/enhance': {'message': 'Image enhanced successfully', 'image': image},
+        'GET /api/admin/users': user_rows,
+        'GET /api/admin/logs': log_rows,
+    }
+
+
+def time_call(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--image', help='Image to embed as base64 (default: largest file in uploads/)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    app = Flask(__name__)
+    providers = {'flask': DefaultJSONProvider(app), 'json': StdlibJSONProvider(app)}
+    if orjson is not None:
+        providers['orjson'] = FastJSONProvider(app)
+
+    payloads = build_payloads(args.image or find_sample_image())
+    encodings = ['gzip'] + (['br'] if brotli else [])
+
+    print(f"{'endpoint':28} {'provider':8} {'encode ms':>10} {'bytes':>11}")
+    for endpoint, payload in payloads.items():
+        body = None
+        for name, provider in providers.items():
+            seconds, encoded = time_call(lambda: provider.dumps(payload).encode('utf-8')
+                                         if name == 'flask' else provider.dumps_bytes(payload), args.repeat)
+            body = encoded
+            print(f"{endpoint:28} {name:8} {seconds * 1000:10.2f} {len(encoded):11,}")
+        for encoding in encodings:
+            seconds, compressed = time_call(lambda: compress(body, encoding), args.repeat)
+            ratio = len(compressed) / len(body)
+            print(f"{endpoint:28} {encoding:8} {seconds * 1000:10.2f} {len(compressed):11,}  ({ratio:.0%} of body)")
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,368 @@
+# backend/benchmarks/load_harness.py
+"""
+End-to-end load test with a clinic's traffic mix, for sizing machines and
+catching capacity regressions.
+
+Starts gunicorn with the real app (benchmarks/load_harness_app.py: the
+production config and a local MySQL database, models replaced by
+fixed-latency stand-ins), then replays each scenario: virtual users log
+in, then loop over weighted actions (logins, patient lookups, dental
+analyses, enhancements, admin listings) with exponential think times.
+Uploads are synthetic radiographs at real sizes, each made unique so
+nothing is served from dedupe or precompute caches.
+
+    cd backend && python -m benchmarks.load_harness [--scenario clinic_day,imaging_burst]
+        [--workers 2 --worker-class gthread --threads 8] [--model-latency-ms 250]
+        [--duration 60] [--users 20] [--mix mix.json] [--url http://host:port]
+
+The database is the one DB_HOST/DB_NAME point at (create it as for
+development; the app migrates and seeds it on start, and the harness adds
+synthetic patients).  Use the seeded admin/doctor accounts or pass your own.
+
+Per scenario and action it reports throughput, p50/p95/p99 latency and
+error rate, plus the server's peak RSS (master and workers, from /proc;
+not available with --url).  Results go to benchmarks/results/load-*.json;
+with --baseline, throughput drops and p95 increases beyond --threshold
+fail the run.  Rate limiting is disabled in the server unless
+--keep-rate-limits, since every virtual user would otherwise be throttled.
+"""
+import os
+import sys
+import json
+import time
+import random
+import signal
+import argparse
+import contextlib
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.rps_bench import login, multipart, send, percentile
+from benchmarks.fixtures import synthetic_xray, encode_image
+from benchmarks.hot_paths_bench import RESULTS_DIR, git_revision
+
+# Share of each action and user behaviour per scenario
+SCENARIOS = {
+    # A normal day: mostly lookups, an analysis every few minutes per doctor
+    'clinic_day': {
+        'users': 20,
+        'think_time': 5.0,
+        'mix': {'login': 0.05, 'patient_lookup': 0.45, 'analyze': 0.2, 'enhance': 0.15, 'admin_listing': 0.15}
+    },
+    # Clinics opening: everyone logs in and pulls up the day's patients
+    'morning_rush': {
+        'users': 40,
+        'think_time': 2.0,
+        'mix': {'login': 0.3, 'patient_lookup': 0.5, 'analyze': 0.1, 'enhance': 0.05, 'admin_listing': 0.05}
+    },
+    # A batch of radiographs after a screening session
+    'imaging_burst': {
+        'users': 10,
+        'think_time': 1.0,
+        'mix': {'patient_lookup': 0.2, 'analyze': 0.5, 'enhance': 0.3}
+    }
+}
+
+# Radiograph sizes in the uploads we receive
+IMAGE_MIX = {'periapical': 0.7, 'panoramic': 0.3}
+
+SEARCH_PREFIXES = ['ma', 'kar', 'lin', 'om', 'nou', 'sa', 'had', 'ya', 'zi', 'jo', 'el', 'ri', 'ta', 'hi', 'fa', 'da']
+
+ADMIN_LISTINGS = ['/api/admin/users', '/api/admin/logs?per_page=50']
+
+
+class VirtualUser:
+    def __init__(self, url, accounts, images, seed):
+        self.url = url
+        self.accounts = accounts
+        self.images = images
+        self.rng = random.Random(seed)
+        self.doctor_token = login(url, *accounts['doctor'])
+        self.admin_token = None
+
+    def _upload(self):
+        kind = self.rng.choices(list(IMAGE_MIX), weights=list(IMAGE_MIX.values()))[0]
+        # Bytes after the JPEG end marker are ignored by decoders but change the digest
+        data = self.images[kind] + self.rng.randbytes(16)
+        return multipart('image', f"{kind}.jpg", data)
+
+    def login(self):
+        self.doctor_token = login(self.url, *self.accounts['doctor'])
+        return 200
+
+    def patient_lookup(self):
+        query = self.rng.choice(SEARCH_PREFIXES)
+        return send(self.url, self.doctor_token, 'GET', f"/api/patients/search?q={query}")
+
+    def analyze(self):
+        body, content_type = self._upload()
+        return send(self.url, self.doctor_token, 'POST', '/api/dental/analyze', body, content_type)
+
+    def enhance(self):
+        body, content_type = self._upload()
+        return send(self.url, self.doctor_token, 'POST', '/api/process/enhance', body, content_type)
+
+    def admin_listing(self):
+        if self.admin_token is None:
+            self.admin_token = login(self.url, *self.accounts['admin'])
+        return send(self.url, self.admin_token, 'GET', self.rng.choice(ADMIN_LISTINGS))
+
+
+def process_tree_rss(pid):
+    """Resident memory in bytes of pid and its children (Linux /proc)."""
+    total = 0
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids += [int(child) for child in f.read().split()]
+    except OSError:
+        pass
+    for member in pids:
+        try:
+            with open(f"/proc/{member}/status") as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+        except OSError:
+            pass
+    return total
+
+
+class RSSSampler:
+    """Peak RSS of the server's process tree, sampled every `interval` seconds."""
+
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, process_tree_rss(self.pid))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def start_server(args):
+    env = dict(os.environ)
+    env.update({
+        'PORT': str(args.port),
+        'WEB_CONCURRENCY': str(args.workers),
+        'GUNICORN_WORKER_CLASS': args.worker_class,
+        'GUNICORN_THREADS': str(args.threads),
+        'GUNICORN_LOG_LEVEL': 'warning',
+        'LOAD_TEST_MODEL_LATENCY_MS': str(args.model_latency_ms),
+        'LOAD_TEST_PATIENTS': str(args.patients),
+    })
+    if not args.keep_rate_limits:
+        env['RATE_LIMIT_ENABLED'] = 'false'
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'benchmarks.load_harness_app:app'],
+        cwd=BACKEND_DIR, env=env
+    )
+    url = f"http://127.0.0.1:{args.port}"
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"Server exited during startup with status {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"{url}/health/ready", timeout=2) as resp:
+                if resp.status == 200:
+                    return process, url
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    sys.exit(f"Server not ready after {args.startup_timeout}s")
+
+
+def run_scenario(scenario, url, accounts, images, duration, server_pid):
+    actions = list(scenario['mix'])
+    weights = [scenario['mix'][action] for action in actions]
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+
+    users = [VirtualUser(url, accounts, images, seed=i) for i in range(scenario['users'])]
+    started = time.monotonic()
+    deadline = started + duration
+
+    def loop(user):
+        # Stagger starts over one think time so users do not move in lockstep
+        time.sleep(user.rng.uniform(0, scenario['think_time']))
+        while time.monotonic() < deadline:
+            action = user.rng.choices(actions, weights=weights)[0]
+            began = time.monotonic()
+            try:
+                status = getattr(user, action)()
+            except Exception:
+                status = None
+            elapsed = time.monotonic() - began
+            with lock:
+                latencies[action].append(elapsed)
+                if status is None or status >= 400:
+                    errors[action] += 1
+            time.sleep(min(user.rng.expovariate(1 / scenario['think_time']), max(0.0, deadline - time.monotonic())))
+
+    sampler = RSSSampler(server_pid) if server_pid else None
+    threads = [threading.Thread(target=loop, args=(user,), daemon=True) for user in users]
+    with sampler or contextlib.nullcontext():
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.monotonic() - started
+
+    def summarize(values, failed):
+        return {
+            'requests': len(values),
+            'throughput': round(len(values) / elapsed, 3),
+            'error_rate': round(failed / len(values), 4) if values else None,
+            'p50_ms': round(percentile(values, 50) * 1000, 1) if values else None,
+            'p95_ms': round(percentile(values, 95) * 1000, 1) if values else None,
+            'p99_ms': round(percentile(values, 99) * 1000, 1) if values else None
+        }
+
+    all_values = [value for values in latencies.values() for value in values]
+    return {
+        'users': scenario['users'],
+        'think_time': scenario['think_time'],
+        'duration': round(elapsed, 1),
+        'total': summarize(all_values, sum(errors.values())),
+        'actions': {action: summarize(latencies[action], errors[action]) for action in actions},
+        'peak_rss_mb': round(sampler.peak / 1024 ** 2, 1) if sampler else None
+    }
+
+
+def print_report(name, report):
+    rss = f", peak RSS {report['peak_rss_mb']} MB" if report['peak_rss_mb'] is not None else ''
+    print(f"\n{name}: {report['users']} users, think {report['think_time']}s, {report['duration']}s{rss}")
+    print(f"{'action':16}{'requests':>9}{'req/s':>8}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for action, stats in list(report['actions'].items()) + [('total', report['total'])]:
+        if not stats['requests']:
+            print(f"{action:16}{0:>9}")
+            continue
+        print(f"{action:16}{stats['requests']:>9}{stats['throughput']:>8.2f}{stats['error_rate']:>8.1%}"
+              f"{stats['p50_ms']:>9.0f}{stats['p95_ms']:>9.0f}{stats['p99_ms']:>9.0f}")
+
+
+def compare(results, baseline, threshold):
+    """Capacity regressions: (scenario, metric, baseline, now) where throughput fell or p95 rose past threshold."""
+    regressions = []
+    for name, report in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        now_total, base_total = report['total'], base['total']
+        if base_total['throughput'] and now_total['throughput'] < base_total['throughput'] * (1 - threshold):
+            regressions.append((name, 'throughput', base_total['throughput'], now_total['throughput']))
+        for action, stats in report['actions'].items():
+            base_stats = base['actions'].get(action)
+            if base_stats and base_stats['p95_ms'] and stats['p95_ms'] \
+                    and stats['p95_ms'] > base_stats['p95_ms'] * (1 + threshold):
+                regressions.append((name, f"{action} p95_ms", base_stats['p95_ms'], stats['p95_ms']))
+        if base_total['error_rate'] is not None and now_total['error_rate'] is not None \
+                and now_total['error_rate'] > base_total['error_rate'] + 0.01:
+            regressions.append((name, 'error_rate', base_total['error_rate'], now_total['error_rate']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', help='Comma-separated scenario names (default: all)')
+    parser.add_argument('--mix', help='JSON file of {name: {users, think_time, mix}} scenarios to add or override')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds per scenario')
+    parser.add_argument('--users', type=int, help='Override every scenario\'s virtual users')
+    parser.add_argument('--url', help='Test a running server instead of starting one (no RSS)')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--worker-class', default='gthread', choices=['gthread', 'gevent'])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--model-latency-ms', type=float, default=250)
+    parser.add_argument('--patients', type=int, default=2000, help='Patients to make sure exist')
+    parser.add_argument('--keep-rate-limits', action='store_true')
+    parser.add_argument('--startup-timeout', type=float, default=120)
+    parser.add_argument('--doctor', default='doctor@aidentify.com:doctor123', help='email:password')
+    parser.add_argument('--admin', default='admin@aidentify.com:admin123', help='email:password')
+    parser.add_argument('--baseline', help='Earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.15, help='Allowed throughput drop / p95 rise')
+    args = parser.parse_args(argv)
+
+    scenarios = dict(SCENARIOS)
+    if args.mix:
+        with open(args.mix) as f:
+            scenarios.update(json.load(f))
+    names = args.scenario.split(',') if args.scenario else list(scenarios)
+    unknown = [name for name in names if name not in scenarios]
+    if unknown:
+        sys.exit(f"Unknown scenario(s): {', '.join(unknown)}")
+
+    accounts = {role: tuple(value.split(':', 1)) for role, value in (('doctor', args.doctor), ('admin', args.admin))}
+    images = {kind: encode_image(synthetic_xray(kind)) for kind in IMAGE_MIX}
+
+    process = None
+    if args.url:
+        url = args.url.rstrip('/')
+    else:
+        process, url = start_server(args)
+    try:
+        results = {}
+        for name in names:
+            scenario = dict(scenarios[name])
+            if args.users:
+                scenario['users'] = args.users
+            results[name] = run_scenario(scenario, url, accounts, images, args.duration,
+                                         process.pid if process else None)
+            print_report(name, results[name])
+    finally:
+        if process:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=120)
+
+    run = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_revision': git_revision(),
+        'server': None if args.url else {
+            'workers': args.workers,
+            'worker_class': args.worker_class,
+            'threads': args.threads,
+            'model_latency_ms': args.model_latency_ms,
+            'rate_limits': args.keep_rate_limits
+        },
+        'scenarios': results
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"load-{time.strftime('%Y%m%dT%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump(run, f, indent=2)
+    print(f"\nResults written to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline['scenarios'], args.threshold)
+        for name, metric, before, now in regressions:
+            print(f"REGRESSION {name} {metric}: {before} -> {now}")
+        if regressions:
+            return 1
+        print(f"No capacity regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
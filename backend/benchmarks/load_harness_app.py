@@ -0,0 +1,61 @@
+# backend/benchmarks/load_harness_app.py
+"""
+WSGI entry point for load tests: the real app (same config, hooks and
+database) with the models replaced by fixed-latency stand-ins.
+
+    cd backend && gunicorn -c gunicorn.conf.py benchmarks.load_harness_app:app
+
+LOAD_TEST_MODEL_LATENCY_MS sets the time per prediction (default 250, our
+measured CPU inference time); LOAD_TEST_PATIENTS makes sure the patients
+table has at least that many rows for lookups.  benchmarks/load_harness.py
+starts this itself.
+"""
+import os
+import sys
+import random
+import logging
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The stand-ins replace the models, so warm-up must not load the real ones
+os.environ['MODEL_WARMUP'] = 'lazy'
+
+from app import create_app
+from database import db
+from models.patient_model import Patient
+from benchmarks.fixtures import FixedLatencyModel, install_models
+
+logger = logging.getLogger(__name__)
+
+FIRST_NAMES = ['Maya', 'Karim', 'Lina', 'Omar', 'Nour', 'Rami', 'Sara', 'Hadi', 'Yara', 'Ziad',
+               'Maria', 'Marc', 'Joelle', 'Elie', 'Rita', 'Tarek', 'Hiba', 'Fadi', 'Dana', 'Sami']
+LAST_NAMES = ['Haddad', 'Khoury', 'Nassar', 'Saade', 'Aoun', 'Chahine', 'Fares', 'Harb', 'Karam', 'Mansour']
+
+
+def seed_patients(app, count, seed=0):
+    """Add synthetic patients until the table holds `count` rows."""
+    with app.app_context():
+        existing = Patient.query.count()
+        if existing >= count:
+            return 0
+        rng = random.Random(seed)
+        for i in range(existing, count):
+            db.session.add(Patient(
+                name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                birthdate=date(1950, 1, 1) + timedelta(days=rng.randrange(365 * 70)),
+                gender=rng.choice(['male', 'female']),
+                phone=f"+9617{rng.randrange(10 ** 7):07d}",
+                email=f"patient{i}@example.com"
+            ))
+        db.session.commit()
+        return count - existing
+
+
+app = create_app(os.getenv('FLASK_CONFIG', 'production'), start_background=False)
+
+latency = float(os.getenv('LOAD_TEST_MODEL_LATENCY_MS', 250)) / 1000.0
+install_models(lambda input_shape: FixedLatencyModel(input_shape, latency))
+
+added = seed_patients(app, int(os.getenv('LOAD_TEST_PATIENTS', 2000)))
+logger.info(f"Load test app: model latency {latency * 1000:.0f} ms, {added} patients added")
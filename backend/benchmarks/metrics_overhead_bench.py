@@ -0,0 +1,159 @@
+# backend/benchmarks/metrics_overhead_bench.py
+"""
+Cost of the request and stage metrics relative to the work they measure.
+
+Instrumentation has to stay under 1% of request time.  This measures
+
+- the cost of one stage_timer observation (the nested case, which also
+  charges its parent),
+- the cost per request of init_metrics' before/after hooks, as the
+  difference between the same trivial Flask app with and without them,
+
+then runs the work of each processing endpoint (its hot paths from
+hot_paths_bench, in the order the route calls them), counting the stages
+it records, and reports
+
+    overhead = (hook cost + stages * stage cost) / median request time
+
+for every endpoint.  Exits with status 1 if any is at or over the budget:
+
+    cd backend && python -m benchmarks.metrics_overhead_bench [--budget 0.01] [--only /api/process/,/api/detect/]
+
+Request time leaves out parsing the upload and the database writes, so
+the figure is an upper bound.
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import statistics
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.hot_paths_bench import setup_images, image_benchmarks, measure
+
+DEFAULT_BUDGET = 0.01
+
+# Hot paths each endpoint runs per request
+ENDPOINTS = {
+    '/api/process/enhance': ('process.enhance_image', 'utils.image_to_base64'),
+    '/api/process/colorize': ('process.colorize_image', 'utils.image_to_base64'),
+    '/api/detect/cavities': ('detect.detect_cavities', 'utils.image_to_base64'),
+    '/api/detect/xray': ('xray.predict_xray',),
+    '/api/dental/analyze': ('dental.predict', 'utils.image_to_base64'),
+}
+
+
+def per_call(fn, calls, rounds=7):
+    """Median over `rounds` of the mean time of fn() over `calls` calls."""
+    fn()
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        samples.append((time.perf_counter() - started) / calls)
+    return statistics.median(samples)
+
+
+def stage_cost(calls=20000):
+    """Seconds per stage_timer observation, nested inside another stage."""
+    from services.metrics.metrics_service import stage_timer, route_context
+
+    def timed():
+        with stage_timer('decode'):
+            pass
+
+    with route_context('/bench'), stage_timer('processing'):
+        return per_call(timed, calls)
+
+
+def request_hook_cost(calls=2000):
+    """Seconds per request added by init_metrics' hooks."""
+    from flask import Flask
+    from services.metrics.metrics_service import init_metrics
+
+    def client(instrumented):
+        app = Flask(__name__)
+        app.add_url_rule('/bench/<int:n>', 'bench', lambda n: 'ok')
+        if instrumented:
+            init_metrics(app)
+        return app.test_client()
+
+    plain, instrumented = client(False), client(True)
+    costs = []
+    # Interleave the two so drift in machine speed affects both alike
+    for _ in range(5):
+        base = per_call(lambda: plain.get('/bench/1'), calls, rounds=1)
+        timed = per_call(lambda: instrumented.get('/bench/1'), calls, rounds=1)
+        costs.append(timed - base)
+    return max(statistics.median(costs), 0.0)
+
+
+def endpoint_requests(hot_paths, kinds):
+    """{'<endpoint>[<kind>]': fn running that endpoint's hot paths} for each kind."""
+    def sequence(fns):
+        def run():
+            for fn in fns:
+                fn()
+        return run
+
+    return {f"{endpoint}[{kind}]": sequence([hot_paths[f"{name}[{kind}]"] for name in names])
+            for kind in kinds for endpoint, names in ENDPOINTS.items()}
+
+
+def stages_per_call(fn):
+    """Number of stages fn() records."""
+    from services.metrics.metrics_service import stage_sink
+
+    stages = []
+    with stage_sink(lambda stage, seconds: stages.append(stage)):
+        fn()
+    return len(stages)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--kinds', default='panoramic,periapical', help='Comma-separated keys of fixtures.XRAY_SIZES')
+    parser.add_argument('--only', help='Comma-separated endpoint prefixes to run')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET,
+                        help='Allowed instrumentation cost as a fraction of request time (0.01 = 1%%)')
+    args = parser.parse_args(argv)
+
+    # The services log every call; keep the output to results
+    logging.basicConfig(level=logging.ERROR)
+
+    per_stage = stage_cost()
+    per_request = request_hook_cost()
+    print(f"stage_timer observation {per_stage * 1e6:8.2f} us")
+    print(f"request hooks           {per_request * 1e6:8.2f} us\n")
+
+    over = []
+    with tempfile.TemporaryDirectory(prefix='metrics-overhead-bench-') as root:
+        kinds = args.kinds.split(',')
+        requests = endpoint_requests(image_benchmarks(setup_images(root, kinds)), kinds)
+        if args.only:
+            prefixes = tuple(args.only.split(','))
+            requests = {name: fn for name, fn in requests.items() if name.startswith(prefixes)}
+
+        print(f"{'endpoint':40} {'median ms':>10} {'stages':>7} {'overhead':>9}")
+        for name, fn in requests.items():
+            stages = stages_per_call(fn)
+            median = measure(fn, args.repeat)['median']
+            overhead = (per_request + stages * per_stage) / median
+            status = '' if overhead < args.budget else '  OVER BUDGET'
+            print(f"{name:40} {median * 1000:10.2f} {stages:7d} {overhead:9.4%}{status}")
+            if status:
+                over.append(name)
+
+    if over:
+        print(f"\nInstrumentation costs {args.budget:.0%} or more of: {', '.join(over)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+# backend/benchmarks/rps_bench.py
+"""
+Requests per second per worker under mixed traffic, against a running server.
+
+Run the same mix against the threaded and the gevent worker to compare:
+
+    GUNICORN_WORKER_CLASS=gthread gunicorn -c gunicorn.conf.py wsgi:app
+    GUNICORN_WORKER_CLASS=gevent  gunicorn -c gunicorn.conf.py wsgi:app
+
+    cd backend && python -m benchmarks.rps_bench --url http://localhost:8080 \\
+        --email admin@example.com --password ... --workers 2 [--image PATH]
+
+The mix is mostly I/O-bound reads (patients, reports, admin, image list)
+with a share of X-ray analyses; --analysis-share changes the proportion.
+Clients are closed-loop: each sends its next request as soon as the
+previous one returns.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.json_compression_bench import find_sample_image
+
+# (name, method, path) of the I/O-bound part of the mix, picked uniformly
+IO_REQUESTS = [
+    ('patients_search', 'GET', '/api/patients/search?q=mar'),
+    ('reports', 'GET', '/api/reports/'),
+    ('admin_logs', 'GET', '/api/admin/logs?per_page=50'),
+    ('admin_users', 'GET', '/api/admin/users'),
+    ('images', 'GET', '/api/images?per_page=50'),
+]
+
+
+def login(url, email, password):
+    body = json.dumps({'email': email, 'password': password}).encode('utf-8')
+    req = urllib.request.Request(f"{url}/api/auth/login", data=body,
+                                 headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return json.loads(resp.read())['token']
+
+
+def multipart(field, filename, content):
+    boundary = uuid.uuid4().hex
+    body = (f"--{boundary}\r\n"
+            f"Content-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: application/octet-stream\r\n\r\n").encode('utf-8')
+    body += content + f"\r\n--{boundary}--\r\n".encode('utf-8')
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def send(url, token, method, path, body=None, content_type=None, timeout=120):
+    headers = {'Authorization': f"Bearer {token}", 'Accept-Encoding': 'gzip'}
+    if content_type:
+        headers['Content-Type'] = content_type
+    req = urllib.request.Request(f"{url}{path}", data=body, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(args):
+    token = login(args.url, args.email, args.password)
+    image_path = args.image or find_sample_image()
+    if args.analysis_share and not image_path:
+        sys.exit("No sample image found; pass --image or --analysis-share 0")
+    image = open(image_path, 'rb').read() if image_path else None
+
+    latencies = defaultdict(list)
+    statuses = Counter()
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.warmup + args.duration
+    measure_from = time.monotonic() + args.warmup
+
+    def client(seed):
+        rng = random.Random(seed)
+        while time.monotonic() < deadline:
+            if image is not None and rng.random() < args.analysis_share:
+                name = 'dental_analyze'
+                body, content_type = multipart('image', os.path.basename(image_path), image)
+                started = time.monotonic()
+                status = send(args.url, token, 'POST', '/api/dental/analyze', body, content_type)
+            else:
+                name, method, path = rng.choice(IO_REQUESTS)
+                started = time.monotonic()
+                status = send(args.url, token, method, path)
+            finished = time.monotonic()
+            if started >= measure_from:
+                with lock:
+                    latencies[name].append(finished - started)
+                    statuses[status] += 1
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(args.clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    total = sum(len(v) for v in latencies.values())
+    rps = total / args.duration
+    print(f"{args.clients} clients, {args.duration}s measured, analysis share {args.analysis_share:.0%}")
+    print(f"{'request':<18}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}")
+    for name in sorted(latencies):
+        values = latencies[name]
+        print(f"{name:<18}{len(values):>8}{percentile(values, 50) * 1000:>10.1f}{percentile(values, 95) * 1000:>10.1f}")
+    print(f"statuses: {dict(sorted(statuses.items()))}")
+    print(f"throughput: {rps:.1f} req/s total, {rps / args.workers:.1f} req/s per worker")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--url', default='http://localhost:8080')
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--workers', type=int, default=1, help='Server worker processes, to report per-worker rate')
+    parser.add_argument('--clients', type=int, default=32, help='Concurrent closed-loop clients')
+    parser.add_argument('--duration', type=int, default=30, help='Measured seconds')
+    parser.add_argument('--warmup', type=int, default=5, help='Unmeasured seconds before measuring')
+    parser.add_argument('--analysis-share', type=float, default=0.1, help='Fraction of requests that are analyses')
+    parser.add_argument('--image', help='X-ray to upload (default: largest image in uploads/)')
+    run(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+# backend/benchmarks/startup_profile.py
+"""
+Cold-start cost of importing the app: time and memory per import.
+
+Each measurement runs in a fresh interpreter, like a machine that fly.io
+has just started.  Time per top-level package comes from
+``python -X importtime``; memory is the resident-set growth while the
+app's direct imports are replayed one at a time in the order the app
+imports them.
+
+Exits with status 1 when the cold start is over budget, or when a module
+that should load lazily (TensorFlow, OpenCV) is imported with the app, so
+it can gate a deploy:
+
+    cd backend && python -m benchmarks.startup_profile [--budget-seconds 2] [--budget-mb 200] [--create-app]
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported (only bound lazily) by importing the app
+DEFAULT_FORBIDDEN = ('tensorflow', 'keras', 'cv2')
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+# Runs in the child: replay the given imports, recording RSS after each
+MEMORY_PROBE = """
+import sys, json, time, importlib
+
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * {page_size} / (1024 * 1024)
+
+steps = []
+baseline = rss_mb()
+for name in json.loads(sys.argv[1]):
+    before = rss_mb()
+    try:
+        importlib.import_module(name)
+    except Exception as e:
+        steps.append([name, None, str(e)])
+        continue
+    steps.append([name, rss_mb() - before, None])
+
+import app
+create_seconds = None
+if {create_app}:
+    started = time.perf_counter()
+    app.create_app('production', start_background=False)
+    create_seconds = time.perf_counter() - started
+
+loaded = [name for name in {forbidden} if name in sys.modules
+          and type(sys.modules[name]).__name__ != '_LazyModule']
+print(json.dumps({{
+    'baseline_mb': baseline, 'total_mb': rss_mb(), 'steps': steps,
+    'loaded_forbidden': loaded, 'create_app_seconds': create_seconds
+}}))
+"""
+
+
+def run_python(args, env=None):
+    return subprocess.run([sys.executable, *args], cwd=BACKEND_DIR, capture_output=True, text=True,
+                          env={**os.environ, **(env or {})})
+
+
+def import_times():
+    """Self time per top-level package and the app's direct imports, from -X importtime."""
+    proc = run_python(['-X', 'importtime', '-c', 'import app'])
+    if proc.returncode != 0:
+        sys.exit(f"Importing the app failed:\n{proc.stderr[-2000:]}")
+
+    # -X importtime lists children before their parent, so the lines of the
+    # `import app` subtree are those just before the `app` line
+    per_package = defaultdict(int)
+    direct = []
+    total_us = None
+    block = []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, depth, name = int(match[1]), int(match[2]), len(match[3]) // 2, match[4]
+        block.append((self_us, depth, name))
+        if depth > 0:
+            continue
+        if name == 'app':
+            total_us = cumulative_us
+            for block_self_us, block_depth, block_name in block:
+                per_package[block_name.split('.')[0]] += block_self_us
+                if block_depth == 1:
+                    direct.append(block_name)
+        block = []
+    return total_us / 1e6, per_package, direct
+
+
+def import_memory(direct, forbidden, create_app):
+    probe = MEMORY_PROBE.format(page_size=os.sysconf('SC_PAGE_SIZE'), create_app=create_app,
+                                forbidden=tuple(forbidden))
+    proc = run_python(['-c', probe, json.dumps(direct)])
+    if proc.returncode != 0:
+        sys.exit(f"Memory probe failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--budget-seconds', type=float, default=2.0, help='Max time to import the app')
+    parser.add_argument('--budget-mb', type=float, default=200.0, help='Max resident memory after importing the app')
+    parser.add_argument('--forbid', default=','.join(DEFAULT_FORBIDDEN),
+                        help='Comma-separated modules that must stay unloaded')
+    parser.add_argument('--create-app', action='store_true',
+                        help='Also time create_app (needs the database)')
+    parser.add_argument('--top', type=int, default=15, help='Packages to list')
+    args = parser.parse_args()
+    forbidden = [name for name in args.forbid.split(',') if name]
+
+    seconds, per_package, direct = import_times()
+    memory = import_memory(direct, forbidden, args.create_app)
+
+    print(f"{'package':<28}{'self ms':>10}")
+    for name, us in sorted(per_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<28}{us / 1000:>10.1f}")
+
+    print(f"\n{'app import':<40}{'+RSS MB':>10}")
+    for name, delta_mb, error in memory['steps']:
+        print(f"{name:<40}{'error: ' + error if error else f'{delta_mb:>10.1f}'}")
+
+    print(f"\nimport app: {seconds:.2f}s, RSS {memory['total_mb']:.0f} MB "
+          f"(interpreter {memory['baseline_mb']:.0f} MB)")
+    if memory['create_app_seconds'] is not None:
+        print(f"create_app: {memory['create_app_seconds']:.2f}s")
+
+    failures = []
+    startup_seconds = seconds + (memory['create_app_seconds'] or 0)
+    if startup_seconds > args.budget_seconds:
+        failures.append(f"startup took {startup_seconds:.2f}s (budget {args.budget_seconds}s)")
+    if memory['total_mb'] > args.budget_mb:
+        failures.append(f"RSS is {memory['total_mb']:.0f} MB (budget {args.budget_mb:.0f} MB)")
+    for name in memory['loaded_forbidden']:
+        failures.append(f"{name} is imported eagerly; import it lazily")
+    for failure in failures:
+        print(f"OVER BUDGET: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
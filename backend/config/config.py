@@ -14,6 +14,110 @@ class Config:
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max upload
     
+    # Chunked, resumable uploads (each chunk must stay under MAX_CONTENT_LENGTH)
+    CHUNKED_UPLOAD_CHUNK_SIZE = int(os.environ.get('CHUNKED_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))
+    CHUNKED_UPLOAD_MAX_BYTES = int(os.environ.get('CHUNKED_UPLOAD_MAX_BYTES', 2 * 1024 ** 3))  # 2GB
+    UPLOAD_USER_QUOTA_BYTES = int(os.environ.get('UPLOAD_USER_QUOTA_BYTES', 20 * 1024 ** 3))  # 0 disables
+    UPLOAD_MAX_IMAGE_DIMENSION = int(os.environ.get('UPLOAD_MAX_IMAGE_DIMENSION', 30000))
+    
+    # Storage backend for uploads and derived images: 'local' (UPLOAD_FOLDER) or 's3'
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local').lower()
+    S3_BUCKET = os.environ.get('S3_BUCKET')
+    S3_PREFIX = os.environ.get('S3_PREFIX', '')
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')  # e.g. http://localhost:9000 for MinIO
+    S3_REGION = os.environ.get('S3_REGION')
+    S3_ACCESS_KEY_ID = os.environ.get('S3_ACCESS_KEY_ID')
+    S3_SECRET_ACCESS_KEY = os.environ.get('S3_SECRET_ACCESS_KEY')
+    # Local read cache in front of remote storage
+    STORAGE_CACHE_DIR = os.environ.get('STORAGE_CACHE_DIR', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'storage_cache'))
+    STORAGE_CACHE_MAX_BYTES = int(os.environ.get('STORAGE_CACHE_MAX_BYTES', 2 * 1024 ** 3))  # 2GB
+    
+    # Memory-mapped cache of decoded grayscale images, shared by all workers
+    PIXEL_CACHE_ENABLED = os.environ.get('PIXEL_CACHE_ENABLED', 'true').lower() == 'true'
+    PIXEL_CACHE_DIR = os.environ.get('PIXEL_CACHE_DIR', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'pixel_cache'))
+    PIXEL_CACHE_MAX_BYTES = int(os.environ.get('PIXEL_CACHE_MAX_BYTES', 1024 ** 3))  # 1GB
+    
+    # Upload retention (runs on a background thread)
+    RETENTION_ENABLED = os.environ.get('RETENTION_ENABLED', 'true').lower() == 'true'
+    RETENTION_MAX_TOTAL_BYTES = int(os.environ.get('RETENTION_MAX_TOTAL_BYTES', 5 * 1024 ** 3))  # 5GB
+    # Original radiographs are patient records: kept forever unless an age is set
+    RETENTION_ORIGINAL_MAX_AGE_DAYS = int(os.environ.get('RETENTION_ORIGINAL_MAX_AGE_DAYS', 0))
+    # Whether originals may be evicted when derivatives alone cannot meet the size budget
+    RETENTION_EVICT_ORIGINALS = os.environ.get('RETENTION_EVICT_ORIGINALS', 'false').lower() == 'true'
+    RETENTION_DERIVATIVE_MAX_AGE_DAYS = int(os.environ.get('RETENTION_DERIVATIVE_MAX_AGE_DAYS', 7))
+    RETENTION_INTERVAL_SECONDS = int(os.environ.get('RETENTION_INTERVAL_SECONDS', 3600))
+    
+    # Speculative precompute of thumbnail, classification and enhancement on upload
+    PRECOMPUTE_ENABLED = os.environ.get('PRECOMPUTE_ENABLED', 'false').lower() == 'true'
+    PRECOMPUTE_QUEUE_SIZE = int(os.environ.get('PRECOMPUTE_QUEUE_SIZE', 100))
+    PRECOMPUTE_BUSY_REQUESTS = int(os.environ.get('PRECOMPUTE_BUSY_REQUESTS', 1))  # pause at this many in-flight requests
+    PRECOMPUTE_WASTE_AFTER_SECONDS = int(os.environ.get('PRECOMPUTE_WASTE_AFTER_SECONDS', 3600))
+    
+    # Stored responses for Idempotency-Key retries
+    IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', 24 * 3600))
+    
+    # Image processing log (batched background writes to processing_logs)
+    PROCESSING_LOG_BUFFER_SIZE = int(os.environ.get('PROCESSING_LOG_BUFFER_SIZE', 1000))
+    PROCESSING_LOG_FLUSH_INTERVAL = float(os.environ.get('PROCESSING_LOG_FLUSH_INTERVAL', 2.0))
+    
+    # Patient search index (rebuilt in the background to pick up writes from other workers)
+    PATIENT_INDEX_MAX_AGE_SECONDS = int(os.environ.get('PATIENT_INDEX_MAX_AGE_SECONDS', 300))
+    
+    # JSON serialization: 'orjson' (falls back to json when not installed) or 'json'
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'orjson')
+    
+    # Response compression (brotli when installed, else gzip)
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
+    
+    # Per-user token buckets on heavy routes: 'memory' (per worker process) or
+    # 'redis' (shared).  RATE_LIMITS is JSON merged over the defaults in
+    # services/http/rate_limit.py, e.g.
+    # {"inference": {"doctor": {"per_minute": 30, "burst": 15}},
+    #  "users": {"lab@example.com": {"inference": {"per_minute": 120, "burst": 40}}}}
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+    RATE_LIMIT_REDIS_URL = os.environ.get('RATE_LIMIT_REDIS_URL', 'redis://localhost:6379/0')
+    RATE_LIMITS = os.environ.get('RATE_LIMITS', '')
+    
+    # Admission control for inference routes (per worker): requests running at
+    # once, requests waiting for a slot and seconds a request may wait.  Running
+    # plus waiting must stay below the worker's threads so other routes get one.
+    ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', 'true').lower() == 'true'
+    ADMISSION_INFERENCE_CONCURRENCY = int(os.environ.get('ADMISSION_INFERENCE_CONCURRENCY', 2))
+    ADMISSION_INFERENCE_QUEUE_SIZE = int(os.environ.get('ADMISSION_INFERENCE_QUEUE_SIZE', 4))
+    ADMISSION_INFERENCE_MAX_WAIT_SECONDS = float(os.environ.get('ADMISSION_INFERENCE_MAX_WAIT_SECONDS', 30))
+    
+    # OS threads for inference/OpenCV under the gevent worker (default: CPU count)
+    CPU_EXECUTOR_THREADS = int(os.environ.get('CPU_EXECUTOR_THREADS', 0))
+    
+    # When to load OpenCV, TensorFlow and the models: 'background' (after each
+    # worker starts) or 'lazy' (on first use).  Never in the gunicorn master:
+    # TensorFlow does not survive fork
+    MODEL_WARMUP = os.environ.get('MODEL_WARMUP', 'background')
+    
+    # Prometheus metrics at /metrics, covering every worker on the machine
+    # (workers share snapshots through METRICS_DIR).  Requests to
+    # METRICS_PORT, a second port gunicorn binds that must not be exposed
+    # publicly, need no token; on other ports scrapers must send
+    # METRICS_TOKEN as a bearer token, and without one /metrics is 404 there.
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+    METRICS_PORT = int(os.environ.get('METRICS_PORT', 9091))  # 0: token only
+    METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'metrics'))
+    METRICS_SNAPSHOT_SECONDS = float(os.environ.get('METRICS_SNAPSHOT_SECONDS', 10))
+    
+    # Per-request profiling: admins send X-Profile: 1, and this fraction of
+    # inference requests is profiled at random.  Profiles (folded stacks and a
+    # stage summary) are kept in PROFILE_DIR, newest PROFILE_MAX_FILES.
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'true').lower() == 'true'
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0.0))
+    PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 5))
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'profiles'))
+    PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', 100))
+    
     # Ensure upload directory exists
     @staticmethod
     def init_app(app):
@@ -0,0 +1,167 @@
+# backend/gunicorn.conf.py
+"""
+Gunicorn settings for production serving.
+
+Workers are pre-forked from a master that has already imported the app
+(see wsgi.py); each worker loads its own models after forking.
+The worker count follows the CPUs and memory available to the container;
+each worker serves requests on a small thread pool, since most of a
+request's time outside inference is spent on I/O.  Every setting can be
+overridden from the environment.
+
+GUNICORN_WORKER_CLASS=gevent serves each worker's requests as greenlets on
+an event loop instead: waits on MySQL, storage and sockets yield to other
+requests, and inference/OpenCV runs on the CPU executor's OS threads (see
+services/concurrency/executors.py).  Greenlets share the worker's MySQL
+connection pool, and worker_connections is capped relative to its size.
+"""
+import os
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+
+if worker_class == 'gevent':
+    # Patch before the preloaded app imports anything, so every lock, socket
+    # and thread the app creates is cooperative
+    from gevent import monkey
+    monkey.patch_all()
+
+import logging
+import multiprocessing
+
+logger = logging.getLogger('gunicorn.error')
+
+# Resident memory of one worker once models are loaded (its own copy of the
+# weights, TF runtime and per-request buffers)
+WORKER_MEMORY_MB = int(os.environ.get('GUNICORN_WORKER_MEMORY_MB', 300))
+
+# Memory kept free for the master process and the page cache
+RESERVED_MEMORY_MB = int(os.environ.get('GUNICORN_RESERVED_MEMORY_MB', 256))
+
+
+def _available_cpus():
+    """CPUs this process may run on, honouring a cgroup v2 CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = multiprocessing.cpu_count()
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def _available_memory_mb():
+    """Memory limit of the container (cgroup v2) or machine, in MB, or None."""
+    try:
+        with open('/sys/fs/cgroup/memory.max') as f:
+            limit = f.read().strip()
+        if limit != 'max':
+            return int(limit) // (1024 * 1024)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemTotal:'):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _default_workers():
+    # Inference is CPU-bound: more workers than CPUs only adds contention
+    workers = _available_cpus()
+    memory_mb = _available_memory_mb()
+    if memory_mb is not None:
+        workers = min(workers, (memory_mb - RESERVED_MEMORY_MB) // WORKER_MEMORY_MB)
+    return max(1, workers)
+
+
+bind = [f"0.0.0.0:{os.environ.get('PORT', '8080')}"]
+# Private port answering /metrics without a token (see METRICS_PORT in config.py);
+# never route public traffic to it
+METRICS_PORT = int(os.environ.get('METRICS_PORT', 9091))
+if METRICS_PORT:
+    # [::] also accepts IPv4; Fly's private network is IPv6
+    bind.append(f"[::]:{METRICS_PORT}")
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 0)) or _default_workers()
+# Enough for the inference admission limit and queue with threads to spare
+# for logins and page loads (see ADMISSION_INFERENCE_* in config.py)
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+# MySQL connections per worker (DatabaseService's pool, see DB_POOL_SIZE);
+# workers x this must stay well under MySQL's max_connections (151 by default)
+db_pool_size = int(os.environ.get('DB_POOL_SIZE', 10))
+# Requests a gevent worker serves per pooled connection: a request spends
+# most of its time outside MySQL, and the rest wait for a free connection
+REQUESTS_PER_DB_CONNECTION = int(os.environ.get('GUNICORN_REQUESTS_PER_DB_CONNECTION', 5))
+# Concurrent requests per gevent worker, capped so they do not just queue on the pool
+worker_connections = min(int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100)),
+                         db_pool_size * REQUESTS_PER_DB_CONNECTION)
+
+# Import the app once, before forking (models load in each worker afterwards)
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Recycle workers to bound memory growth; jitter keeps them from restarting together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# An analysis can take a while on a shared CPU; a worker silent for longer is stuck
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+# On SIGTERM (deploys, recycling) in-flight requests get this long to finish
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 90))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    per_worker = f"{worker_connections} connections" if worker_class == 'gevent' else f"{threads} threads"
+    server.log.info(f"Serving with {workers} {worker_class} workers x {per_worker} "
+                    f"(cpus={_available_cpus()}, memory_mb={_available_memory_mb()}, preload={preload_app}, "
+                    f"mysql_connections<={workers * db_pool_size})")
+
+
+def post_fork(server, worker):
+    """Give each worker its own connections, random state and background threads."""
+    import numpy as np
+    from app import start_background_tasks
+    from database import db
+    from services.database.database_service import db_service
+
+    # The loaded app (wsgi:app, or another entry point such as the load test's)
+    app = worker.app.wsgi()
+
+    # Sockets opened by the master must not be shared between processes
+    db_service.reset_after_fork()
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+    # Otherwise every worker would draw the same random sequence
+    np.random.seed()
+
+    start_background_tasks(app)
+
+
+def worker_exit(server, worker):
+    """Write out buffered state before a worker exits (recycling or shutdown)."""
+    from services.logs.processing_log_service import get_processing_log
+    from services.storage.storage_backend import get_storage
+    from services.metrics.metrics_service import get_worker_metrics
+
+    app = worker.app.wsgi()
+
+    try:
+        if app.config['METRICS_ENABLED']:
+            get_worker_metrics(app.config).remove()
+        get_processing_log(app.config).flush()
+        get_storage(app.config).flush(timeout=graceful_timeout)
+    except Exception as e:
+        logger.error(f"Error flushing worker {worker.pid} state on exit: {str(e)}")
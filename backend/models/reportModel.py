@@ -1,13 +1,110 @@
-from services.database.database_service import db_service # Import SQLAlchemy instance
+from services.database.database_service import db_service
+import threading
+import time
+import logging
 
-class Report(db_service.Model):
-    __tablename__ = 'reports'  # Your actual db_service table name
+logger = logging.getLogger(__name__)
 
-    id = db_service.Column(db_service.Integer, primary_key=True)
-    patient_name = db_service.Column(db_service.String(100), nullable=False)
-    date = db_service.Column(db_service.Date, nullable=False)
-    report_type = db_service.Column(db_service.String(50), nullable=False)
-    details = db_service.Column(db_service.Text, nullable=True)
+# Columns a listing may be sorted by, mapped to their SQL expression.  Each
+# must be served by an index for every filter combination (see the
+# Report.list_reports entries of QUERY_PLAN_CHECKS), so sorting by patient
+# or doctor, which would filesort, is not offered.
+SORTABLE_COLUMNS = {
+    'created_at': 'created_at'
+}
+
+# Cached COUNT(*) results, keyed by filter tuple.  This app only reads
+# reports, so the TTL bounds how stale a count can be after a write.
+COUNT_CACHE_TTL_SECONDS = 60
+_count_cache = {}
+_count_cache_lock = threading.Lock()
+
+
+class Report:
+    COLUMNS = "id, patient_id, doctor_id, report_file_path, created_at"
+
+    def __init__(self, **kwargs):
+        self.id = kwargs.get('id')
+        self.patient_id = kwargs.get('patient_id')
+        self.doctor_id = kwargs.get('doctor_id')
+        self.report_file_path = kwargs.get('report_file_path')
+        self.created_at = kwargs.get('created_at')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'patient_id': self.patient_id,
+            'doctor_id': self.doctor_id,
+            'report_file_path': self.report_file_path,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    @staticmethod
+    def _where(patient_id=None, doctor_id=None, date_from=None, date_to=None):
+        clauses, params = [], []
+        if patient_id is not None:
+            clauses.append("patient_id = %s")
+            params.append(patient_id)
+        if doctor_id is not None:
+            clauses.append("doctor_id = %s")
+            params.append(doctor_id)
+        if date_from is not None:
+            clauses.append("created_at >= %s")
+            params.append(date_from)
+        if date_to is not None:
+            clauses.append("created_at < %s")
+            params.append(date_to)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    @classmethod
+    def list_reports(cls, patient_id=None, doctor_id=None, date_from=None, date_to=None,
+                     sort='created_at', order='desc', page=1, per_page=50):
+        """Return one page of reports matching the filters."""
+        try:
+            where, params = cls._where(patient_id, doctor_id, date_from, date_to)
+            column = SORTABLE_COLUMNS.get(sort, 'created_at')
+            direction = 'ASC' if str(order).lower() == 'asc' else 'DESC'
+            # id breaks ties so pages are stable when created_at repeats
+            query = f"""
+                SELECT {cls.COLUMNS} FROM reports
+                {where}
+                ORDER BY {column} {direction}, id {direction}
+                LIMIT %s OFFSET %s
+            """
+            params += [per_page, (page - 1) * per_page]
+            results = db_service.execute_query(query, tuple(params), fetch=True)
+            if results is None:
+                return None
+            return [cls(**row) for row in results]
+        except Exception as e:
+            logger.error(f"Error listing reports: {e}")
+            return None
+
+    @classmethod
+    def count_reports(cls, patient_id=None, doctor_id=None, date_from=None, date_to=None):
+        """Return the number of matching reports, served from cache when fresh."""
+        key = (patient_id, doctor_id, str(date_from), str(date_to))
+        now = time.monotonic()
+        with _count_cache_lock:
+            cached = _count_cache.get(key)
+            if cached and now - cached[1] < COUNT_CACHE_TTL_SECONDS:
+                return cached[0]
+
+        try:
+            where, params = cls._where(patient_id, doctor_id, date_from, date_to)
+            result = db_service.execute_single_query(
+                f"SELECT COUNT(*) AS total FROM reports {where}", tuple(params)
+            )
+            if result is None:
+                return None
+            total = result['total']
+            with _count_cache_lock:
+                _count_cache[key] = (total, now)
+            return total
+        except Exception as e:
+            logger.error(f"Error counting reports: {e}")
+            return None
 
     def __repr__(self):
-        return f"<Report {self.id} - {self.patient_name}>"
+        return f"<Report {self.id} - patient {self.patient_id}>"
@@ -1,4 +1,5 @@
 import bcrypt
+from collections import defaultdict
 from datetime import datetime
 from services.database.database_service import db_service
 import logging
@@ -140,6 +141,66 @@ class User:
             logger.error(f"Error getting users by status: {e}")
             return []
 
+    @classmethod
+    def bulk_update_status(cls, changes, changed_by):
+        """
+        Apply many status changes in one transaction.
+
+        Args:
+            changes: List of (user_id, new_status) tuples
+            changed_by: Identity of the admin making the change
+
+        Returns:
+            Dict of user_id -> 'updated' | 'unchanged' | 'not_found'
+        """
+        results = {}
+        user_ids = list(dict.fromkeys(user_id for user_id, _ in changes))
+        if not user_ids:
+            return results
+
+        placeholders = ', '.join(['%s'] * len(user_ids))
+        with db_service.transaction() as cursor:
+            cursor.execute(
+                f"SELECT id, email, status FROM users WHERE id IN ({placeholders}) FOR UPDATE",
+                tuple(user_ids)
+            )
+            existing = {row['id']: row for row in cursor.fetchall()}
+
+            # Last change wins when a user appears twice in the batch
+            targets = dict(changes)
+            ids_by_status = defaultdict(list)
+            for user_id in user_ids:
+                row = existing.get(user_id)
+                if row is None:
+                    results[user_id] = 'not_found'
+                elif row['status'] == targets[user_id]:
+                    results[user_id] = 'unchanged'
+                else:
+                    ids_by_status[targets[user_id]].append(user_id)
+                    results[user_id] = 'updated'
+
+            now = datetime.now()
+            log_rows = []
+            for status, ids in ids_by_status.items():
+                id_placeholders = ', '.join(['%s'] * len(ids))
+                cursor.execute(
+                    f"UPDATE users SET status = %s WHERE id IN ({id_placeholders})",
+                    (status, *ids)
+                )
+                description = f"Status changed to {status} by admin {changed_by}"
+                log_rows.extend((user_id, 'Status', description, now) for user_id in ids)
+
+            if log_rows:
+                # executemany turns this into a single multi-row INSERT
+                cursor.executemany("""
+                    INSERT INTO activity_logs (user_id, action, description, timestamp)
+                    VALUES (%s, %s, %s, %s)
+                """, log_rows)
+
+        updated = sum(1 for result in results.values() if result == 'updated')
+        logger.info(f"Bulk status change by {changed_by}: {updated} of {len(user_ids)} users updated")
+        return results
+
     @classmethod
     def seed_initial_users(cls):
         initial_users = [
@@ -205,7 +266,7 @@ class User:
         try:
             query = """
                 SELECT al.*, u.name, u.email 
-                FROM activity_log al 
+                FROM activity_logs al 
                 JOIN users u ON al.user_id = u.id 
                 ORDER BY al.timestamp DESC 
                 LIMIT %s
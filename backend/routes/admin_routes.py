@@ -1,16 +1,24 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from services.auth.auth_service import check_permission
-from services.utils import get_image_logs
+from services.logs.processing_log_service import get_processing_log
+from services.storage.retention_service import get_retention_manager
+from services.precompute.precompute_service import get_precompute_manager
+from services.metrics.request_profiler import get_profile_store
 from models.user_model import User
 import logging
 import pprint
+import threading
+from services.utils import parse_date
 from services.database.database_service import db_service
 
 logger = logging.getLogger(__name__)
 
 admin_bp = Blueprint('admin', __name__)
 
+MAX_BULK_STATUS_CHANGES = 1000
+MAX_LOGS_PER_PAGE = 200
+
 # ✅ Get logs
 @admin_bp.route('/logs', methods=['GET'])
 @jwt_required()
@@ -22,8 +30,28 @@ def get_logs():
         return jsonify({'message': 'Permission denied: admin role required'}), 403
 
     try:
-        logs = get_image_logs()
-        return jsonify(logs), 200
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', 50)), 1), MAX_LOGS_PER_PAGE)
+        date_from = parse_date(request.args.get('date_from'))
+        date_to = parse_date(request.args.get('date_to'), end_of_day=True)
+    except ValueError as e:
+        return jsonify({'message': f'Invalid query parameter: {e}'}), 400
+
+    try:
+        logs, total = get_processing_log().query(
+            user_id=request.args.get('user_id') or None,
+            action=request.args.get('action') or None,
+            date_from=date_from,
+            date_to=date_to,
+            page=page,
+            per_page=per_page
+        )
+        # The body stays a plain list; pagination details travel in headers
+        response = jsonify(logs)
+        response.headers['X-Total-Count'] = str(total)
+        response.headers['X-Page'] = str(page)
+        response.headers['X-Per-Page'] = str(per_page)
+        return response, 200
     except Exception as e:
         logger.error(f"Error fetching logs for user {current_user}: {e}", exc_info=True)
         return jsonify({'message': 'Internal server error'}), 500
@@ -85,6 +113,52 @@ def update_user_status(user_id):
         logger.error(f"Error updating user status: {e}", exc_info=True)
         return jsonify({'message': 'Internal server error'}), 500
 
+# ✅ Update many users' status in one request
+@admin_bp.route('/users/status', methods=['PUT'])
+@jwt_required()
+def bulk_update_user_status():
+    current_user = get_jwt_identity()
+
+    if not check_permission(current_user, ['admin']):
+        logger.warning(f"Permission denied for user: {current_user}")
+        return jsonify({'message': 'Permission denied: admin role required'}), 403
+
+    # Accepts {"user_ids": [...], "status": "approved"} or
+    # {"updates": [{"id": 1, "status": "approved"}, ...]}
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'message': 'Request body must be a JSON object'}), 400
+    if 'updates' in data:
+        updates = data['updates'] or []
+        if not isinstance(updates, list) or any(not isinstance(item, dict) for item in updates):
+            return jsonify({'message': 'updates must be a list of {"id", "status"} objects'}), 400
+        changes = [(item.get('id'), item.get('status')) for item in updates]
+    else:
+        user_ids = data.get('user_ids') or []
+        if not isinstance(user_ids, list):
+            return jsonify({'message': 'user_ids must be a list'}), 400
+        changes = [(user_id, data.get('status')) for user_id in user_ids]
+
+    if not changes:
+        return jsonify({'message': 'No users to update'}), 400
+    if len(changes) > MAX_BULK_STATUS_CHANGES:
+        return jsonify({'message': f'At most {MAX_BULK_STATUS_CHANGES} users per request'}), 400
+    # bool is a subclass of int, but true/false are not user ids
+    if any(not isinstance(user_id, int) or isinstance(user_id, bool) for user_id, _ in changes):
+        return jsonify({'message': 'User ids must be integers'}), 400
+    if any(status not in ['approved', 'declined'] for _, status in changes):
+        return jsonify({'message': 'Invalid status value'}), 400
+
+    try:
+        results = User.bulk_update_status(changes, current_user)
+        return jsonify({
+            'message': f"{sum(1 for r in results.values() if r == 'updated')} user(s) updated",
+            'results': [{'id': user_id, 'result': result} for user_id, result in results.items()]
+        }), 200
+    except Exception as e:
+        logger.error(f"Error bulk updating user status: {e}", exc_info=True)
+        return jsonify({'message': 'Internal server error'}), 500
+
 @admin_bp.route('/admin-data', methods=['GET'])
 @jwt_required()
 def get_admin_data():
@@ -103,7 +177,7 @@ def get_admin_data():
         users = db_service.execute_query(query_users, fetch=True)
 
         query_logs = """
-            SELECT id, user_id, action_description AS action, action_time AS timestamp
+            SELECT id, user_id, description AS action, timestamp
             FROM activity_logs
         """
         logs = db_service.execute_query(query_logs, fetch=True)
@@ -115,3 +189,101 @@ def get_admin_data():
     except Exception as e:
         logger.error(f"Error fetching admin data for user {current_user}: {e}", exc_info=True)
         return jsonify({'message': 'Internal server error'}), 500
+
+
+# ✅ Upload retention: metrics, dry-run report and manual run
+@admin_bp.route('/storage/retention', methods=['GET'])
+@jwt_required()
+def get_retention_report():
+    current_user = get_jwt_identity()
+
+    if not check_permission(current_user, ['admin']):
+        logger.warning(f"Permission denied for user: {current_user}")
+        return jsonify({'message': 'Permission denied: admin role required'}), 403
+
+    try:
+        manager = get_retention_manager(current_app.config)
+        response = {'metrics': manager.metrics}
+        if request.args.get('dry_run', '').lower() in ('1', 'true'):
+            response['dry_run'] = manager.run_once(dry_run=True)
+        return jsonify(response), 200
+    except Exception as e:
+        logger.error(f"Error building retention report: {e}", exc_info=True)
+        return jsonify({'message': 'Internal server error'}), 500
+
+@admin_bp.route('/storage/retention/run', methods=['POST'])
+@jwt_required()
+def run_retention():
+    current_user = get_jwt_identity()
+
+    if not check_permission(current_user, ['admin']):
+        logger.warning(f"Permission denied for user: {current_user}")
+        return jsonify({'message': 'Permission denied: admin role required'}), 403
+
+    # Run on a background thread so the request returns immediately
+    manager = get_retention_manager(current_app.config)
+    threading.Thread(target=manager.run_once, name='upload-retention-manual', daemon=True).start()
+    logger.info(f"Manual retention run started by admin {current_user}")
+    return jsonify({'message': 'Retention run started'}), 202
+
+# ✅ Speculative precompute: how often precomputed results were used or wasted
+@admin_bp.route('/precompute', methods=['GET'])
+@jwt_required()
+def get_precompute_stats():
+    current_user = get_jwt_identity()
+
+    if not check_permission(current_user, ['admin']):
+        logger.warning(f"Permission denied for user: {current_user}")
+        return jsonify({'message': 'Permission denied: admin role required'}), 403
+
+    precompute = get_precompute_manager()
+    if not precompute:
+        return jsonify({'enabled': False}), 200
+    return jsonify({'enabled': True, **precompute.report()}), 200
+
+# ✅ Request profiles (X-Profile: 1 or sampled): summaries and flamegraph input
+@admin_bp.route('/profiles', methods=['GET'])
+@jwt_required()
+def list_profiles():
+    current_user = get_jwt_identity()
+
+    if not check_permission(current_user, ['admin']):
+        logger.warning(f"Permission denied for user: {current_user}")
+        return jsonify({'message': 'Permission denied: admin role required'}), 403
+
+    if not current_app.config['PROFILING_ENABLED']:
+        return jsonify({'enabled': False, 'profiles': []}), 200
+    store = get_profile_store(current_app.config)
+    limit = min(request.args.get('limit', 20, type=int), store.max_profiles)
+    summaries = [store.summary(profile_id) for profile_id in store.list_ids()[:limit]]
+    return jsonify({'enabled': True, 'profiles': [summary for summary in summaries if summary]}), 200
+
+@admin_bp.route('/profiles/<profile_id>', methods=['GET'])
+@jwt_required()
+def get_profile(profile_id):
+    current_user = get_jwt_identity()
+
+    if not check_permission(current_user, ['admin']):
+        logger.warning(f"Permission denied for user: {current_user}")
+        return jsonify({'message': 'Permission denied: admin role required'}), 403
+
+    summary = get_profile_store(current_app.config).summary(profile_id)
+    if summary is None:
+        return jsonify({'message': 'Profile not found'}), 404
+    return jsonify(summary), 200
+
+@admin_bp.route('/profiles/<profile_id>/folded', methods=['GET'])
+@jwt_required()
+def get_profile_stacks(profile_id):
+    current_user = get_jwt_identity()
+
+    if not check_permission(current_user, ['admin']):
+        logger.warning(f"Permission denied for user: {current_user}")
+        return jsonify({'message': 'Permission denied: admin role required'}), 403
+
+    folded = get_profile_store(current_app.config).folded(profile_id)
+    if folded is None:
+        return jsonify({'message': 'Profile not found'}), 404
+    response = Response(folded, mimetype='text/plain')
+    response.headers['Content-Disposition'] = f'attachment; filename="{profile_id}.folded"'
+    return response
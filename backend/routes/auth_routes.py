@@ -4,6 +4,8 @@ import mysql.connector
 import bcrypt
 from flask_jwt_extended import create_access_token
 from services.logger_service import log_activity  # Ensure this is correctly implemented
+from services.concurrency.executors import run_cpu_bound
+from services.database.database_service import mysql_connect_options
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -29,7 +31,8 @@ def login():
             user=os.getenv('DB_USER', 'root'),
             password=os.getenv('DB_PASSWORD', ''),
             database=os.getenv('DB_NAME', 'dental_diagnostic_system'),
-            port=int(os.getenv('DB_PORT', 3306))
+            port=int(os.getenv('DB_PORT', 3306)),
+            **mysql_connect_options()
         )
         cursor = connection.cursor(dictionary=True)
 
@@ -41,8 +44,8 @@ def login():
             log_activity(None, "login_failed", f"Failed login attempt for unknown user {email}")
             return jsonify({'message': 'Invalid email or password'}), 401
 
-        # Check password
-        if not bcrypt.checkpw(password.encode('utf-8'), user['password'].encode('utf-8')):
+        # Check password (bcrypt is deliberately slow, so keep it off the event loop)
+        if not run_cpu_bound(bcrypt.checkpw, password.encode('utf-8'), user['password'].encode('utf-8')):
             log_activity(user['id'], "login_failed", "Invalid password attempt")
             return jsonify({'message': 'Invalid email or password'}), 401
 
@@ -90,7 +93,8 @@ def test_database():
             user=os.getenv('DB_USER', 'root'),
             password=os.getenv('DB_PASSWORD', ''),
             database=os.getenv('DB_NAME', 'dental_diagnostic_system'),
-            port=int(os.getenv('DB_PORT', 3306))
+            port=int(os.getenv('DB_PORT', 3306)),
+            **mysql_connect_options()
         )
         cursor = connection.cursor(dictionary=True)
         cursor.execute("SELECT id, name, email, role FROM users")
@@ -4,6 +4,10 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from services.auth.auth_service import check_permission
 from services.detection.dental_classification_service import get_dental_classifier
 from services.utils import save_uploaded_file, image_to_base64, log_processing
+from services.concurrency.single_flight import single_flight
+from services.concurrency.executors import run_cpu_bound
+from services.http.idempotency import idempotent
+from services.precompute.precompute_service import get_precompute_manager
 import os
 import logging
 
@@ -12,6 +16,7 @@ dental_bp = Blueprint('dental', __name__)
 
 @dental_bp.route('/analyze', methods=['POST'])
 @jwt_required()
+@idempotent
 def analyze_dental_xray():
     """Analyze dental X-ray for multiple conditions."""
     current_user = get_jwt_identity()
@@ -25,9 +30,9 @@ def analyze_dental_xray():
         return jsonify({'message': 'No image provided'}), 400
     
     file = request.files['image']
-    filepath = save_uploaded_file(file, current_app.config['UPLOAD_FOLDER'])
+    image_key = save_uploaded_file(file, current_app.config['UPLOAD_FOLDER'], current_user)
     
-    if not filepath:
+    if not image_key:
         return jsonify({'message': 'Invalid file'}), 400
     
     # Initialize model path
@@ -36,14 +41,21 @@ def analyze_dental_xray():
     # Get classifier
     classifier = get_dental_classifier(model_path)
     
-    # Analyze the image
-    results, error = classifier.predict(filepath)
+    # Analyze the image, unless it was already classified in the background
+    results, error = None, None
+    precompute = get_precompute_manager()
+    if precompute:
+        results = precompute.lookup('classification', image_key)
+    if results is None:
+        # Identical images submitted concurrently (double clicks, retries) share one run
+        results, error = single_flight.do(('dental_analysis', image_key, classifier.threshold),
+                                          run_cpu_bound, classifier.predict, image_key)
     
     if error:
         return jsonify({'message': f'Error analyzing image: {error}'}), 500
     
     # Log the processing
-    log_processing(current_user, 'dental_analysis', filepath, results.get('visualization'))
+    log_processing(current_user, 'dental_analysis', image_key, results.get('visualization'))
     
     # Return the result
     return jsonify({
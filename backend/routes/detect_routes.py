@@ -5,7 +5,11 @@ from services.auth.auth_service import check_permission
 from services.detection.cavity_detection import detect_cavities
 from services.detection.missing_teeth_detection import detect_missing_teeth
 from services.utils import save_uploaded_file, image_to_base64, log_processing
+from services.concurrency.single_flight import single_flight
+from services.concurrency.executors import run_cpu_bound
+from services.http.idempotency import idempotent
 from services.model_inference.xray_service import predict_xray
+import hashlib
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,6 +17,7 @@ detect_bp = Blueprint('detect', __name__)
 
 @detect_bp.route('/cavities', methods=['POST'])
 @jwt_required()
+@idempotent
 def detect_cavities_route():
     """Detect cavities in dental image route."""
     current_user = get_jwt_identity()
@@ -26,22 +31,23 @@ def detect_cavities_route():
         return jsonify({'message': 'No image provided'}), 400
     
     file = request.files['image']
-    filepath = save_uploaded_file(file, current_app.config['UPLOAD_FOLDER'])
+    image_key = save_uploaded_file(file, current_app.config['UPLOAD_FOLDER'], current_user)
     
-    if not filepath:
+    if not image_key:
         return jsonify({'message': 'Invalid file'}), 400
     
     # Detect cavities in the image
-    result_path, results = detect_cavities(filepath, current_app.config['UPLOAD_FOLDER'])
+    # Identical images submitted concurrently (double clicks, retries) share one run
+    result_key, results = single_flight.do(('detect_cavities', image_key), run_cpu_bound, detect_cavities, image_key)
     
-    if not result_path or not results:
+    if not result_key or not results:
         return jsonify({'message': 'Error detecting cavities'}), 500
     
     # Log the processing
-    log_processing(current_user, 'detect_cavities', filepath, result_path)
+    log_processing(current_user, 'detect_cavities', image_key, result_key)
     
     # Return the result image as base64 and detection results
-    base64_image = image_to_base64(result_path)
+    base64_image = image_to_base64(result_key)
     if not base64_image:
         return jsonify({'message': 'Error encoding image'}), 500
         
@@ -53,6 +59,7 @@ def detect_cavities_route():
 
 @detect_bp.route('/missing-teeth', methods=['POST'])
 @jwt_required()
+@idempotent
 def detect_missing_teeth_route():
     """Detect missing teeth in dental image route."""
     current_user = get_jwt_identity()
@@ -66,22 +73,23 @@ def detect_missing_teeth_route():
         return jsonify({'message': 'No image provided'}), 400
     
     file = request.files['image']
-    filepath = save_uploaded_file(file, current_app.config['UPLOAD_FOLDER'])
+    image_key = save_uploaded_file(file, current_app.config['UPLOAD_FOLDER'], current_user)
     
-    if not filepath:
+    if not image_key:
         return jsonify({'message': 'Invalid file'}), 400
     
     # Detect missing teeth in the image
-    result_path, results = detect_missing_teeth(filepath, current_app.config['UPLOAD_FOLDER'])
+    result_key, results = single_flight.do(('detect_missing_teeth', image_key), run_cpu_bound,
+                                           detect_missing_teeth, image_key)
     
-    if not result_path or not results:
+    if not result_key or not results:
         return jsonify({'message': 'Error detecting missing teeth'}), 500
     
     # Log the processing
-    log_processing(current_user, 'detect_missing_teeth', filepath, result_path)
+    log_processing(current_user, 'detect_missing_teeth', image_key, result_key)
     
     # Return the result image as base64 and detection results
-    base64_image = image_to_base64(result_path)
+    base64_image = image_to_base64(result_key)
     if not base64_image:
         return jsonify({'message': 'Error encoding image'}), 500
         
@@ -93,6 +101,7 @@ def detect_missing_teeth_route():
 
 @detect_bp.route('/xray', methods=['POST'])
 @jwt_required()
+@idempotent
 def detect_xray_route():
     """Detect features in X-ray image using DL model."""
     current_user = get_jwt_identity()
@@ -108,7 +117,8 @@ def detect_xray_route():
     file = request.files['image']
     image_bytes = file.read()
     try:
-        prediction = predict_xray(image_bytes)
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        prediction = single_flight.do(('predict_xray', digest), run_cpu_bound, predict_xray, image_bytes)
         return jsonify({'result': prediction})
     except Exception as e:
         logger.error(f"X-ray detection error: {e}")
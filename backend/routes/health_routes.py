@@ -0,0 +1,34 @@
+# backend/routes/health_routes.py
+from flask import Blueprint, jsonify, current_app
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from services.auth.auth_service import check_permission
+from services.health.readiness import check_readiness
+import logging
+
+logger = logging.getLogger(__name__)
+health_bp = Blueprint('health', __name__)
+
+@health_bp.route('/health', methods=['GET'])
+@health_bp.route('/health/live', methods=['GET'])
+def liveness():
+    """The process is up and serving requests (it may still be warming up)."""
+    return jsonify({'status': 'healthy', 'message': 'AIDentify API is running'}), 200
+
+@health_bp.route('/health/ready', methods=['GET'])
+def readiness():
+    """
+    200 once this worker can serve requests at normal latency, 503 before.
+
+    Load balancers get the status and warm-up stages; admins (with a
+    token) also get database, queue and cache details.
+    """
+    ready, report = check_readiness(current_app._get_current_object())
+
+    verify_jwt_in_request(optional=True)
+    current_user = get_jwt_identity()
+    if not (current_user and check_permission(current_user, ['admin'])):
+        report = {
+            'status': report['status'],
+            'warmup': {name: stage['state'] for name, stage in report['warmup']['stages'].items()}
+        }
+    return jsonify(report), 200 if ready else 503
@@ -1,15 +1,57 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
-import os
+from flask import Blueprint, Response, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
+from services.auth.auth_service import check_permission
+from services.storage.blob_store import get_blob_store
+from services.image_processing.image_metadata_service import list_images
+from services.image_processing.thumbnail_service import create_thumbnail
+from services.precompute.precompute_service import get_precompute_manager
+from services.concurrency.executors import run_cpu_bound
+from services.storage.storage_backend import get_storage
+from services.storage.chunked_upload_service import validate_image_header, UploadError, HEADER_PROBE_BYTES
+import logging
 
+logger = logging.getLogger(__name__)
 image_bp = Blueprint('image', __name__)
 
-UPLOAD_FOLDER = 'uploads'
+MAX_PER_PAGE = 200
+
+@image_bp.route('/api/images', methods=['GET'])
+@jwt_required()
+def list_images_route():
+    """List uploaded images with their recorded metadata (no image files are read)."""
+    current_user = get_jwt_identity()
+
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', 50)), 1), MAX_PER_PAGE)
+    except ValueError as e:
+        return jsonify({'error': 'Invalid query parameter', 'message': str(e)}), 400
+
+    # Admins may list everyone's uploads; everybody else sees their own
+    uploaded_by = current_user
+    if request.args.get('all') == '1' and check_permission(current_user, ['admin']):
+        uploaded_by = None
+
+    images, total = list_images(uploaded_by, page, per_page)
+    if images is None:
+        return jsonify({'message': 'Failed to fetch images'}), 500
+
+    for image in images:
+        image['created_at'] = image['created_at'].isoformat() if image['created_at'] else None
+
+    # The body stays a plain list; pagination details travel in headers
+    response = jsonify(images)
+    response.headers['X-Total-Count'] = str(total)
+    response.headers['X-Page'] = str(page)
+    response.headers['X-Per-Page'] = str(per_page)
+    return response, 200
 
 @image_bp.route('/api/images/upload', methods=['POST'])
 @jwt_required()
 def upload_image():
+    current_user = get_jwt_identity()
+
     if 'image' not in request.files:
         return jsonify({'message': 'No image part'}), 400
 
@@ -18,10 +60,55 @@ def upload_image():
     if file.filename == '':
         return jsonify({'message': 'No selected file'}), 400
 
+    # Same checks as the first chunk of a resumable upload
+    header = file.stream.read(HEADER_PROBE_BYTES)
+    file.stream.seek(0)
+    try:
+        validate_image_header(header, current_app.config['UPLOAD_MAX_IMAGE_DIMENSION'])
+    except UploadError as e:
+        return jsonify({'message': e.message}), e.status_code
+
     filename = secure_filename(file.filename)
-    # Ensure upload directory exists
-    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-    filepath = os.path.join(UPLOAD_FOLDER, filename)
-    file.save(filepath)
+    try:
+        # Identical files share one blob; each upload still gets its own record
+        stored = get_blob_store(current_app.config['UPLOAD_FOLDER']).put_stream(
+            file.stream, filename, current_user
+        )
+    except Exception as e:
+        logger.error(f"Error storing upload {filename}: {e}", exc_info=True)
+        return jsonify({'message': 'Failed to store image'}), 500
+
+    # Have thumbnail, classification and enhancement ready before they are asked for
+    precompute = get_precompute_manager()
+    if precompute:
+        precompute.schedule(stored['key'])
+
+    return jsonify({
+        'message': 'Image uploaded successfully',
+        'filename': filename,
+        'upload_id': stored['upload_id'],
+        'content_hash': stored['digest']
+    }), 200
+
+
+@image_bp.route('/api/images/<int:upload_id>/thumbnail', methods=['GET'])
+@jwt_required()
+def get_thumbnail(upload_id):
+    """JPEG thumbnail of an upload, created on first request unless precomputed."""
+    current_user = get_jwt_identity()
+
+    upload = get_blob_store(current_app.config['UPLOAD_FOLDER']).get_upload(upload_id)
+    if not upload or (upload['uploaded_by'] != current_user and not check_permission(current_user, ['admin'])):
+        return jsonify({'message': 'Image not found'}), 404
+
+    precompute = get_precompute_manager()
+    thumbnail = precompute.lookup('thumbnail', upload['key']) if precompute else None
+    if not thumbnail:
+        thumbnail = run_cpu_bound(create_thumbnail, upload['key'])
+    if not thumbnail:
+        return jsonify({'message': 'Error creating thumbnail'}), 500
 
-    return jsonify({'message': 'Image uploaded successfully', 'filename': filename}), 200
+    response = Response(get_storage().read_bytes(thumbnail), mimetype='image/jpeg')
+    # Thumbnails are derived from immutable content
+    response.headers['Cache-Control'] = 'private, max-age=86400'
+    return response
@@ -0,0 +1,23 @@
+# backend/routes/metrics_routes.py
+import hmac
+from flask import Blueprint, Response, request, jsonify, current_app
+from services.metrics.metrics_service import get_worker_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+def _on_metrics_port():
+    # SERVER_PORT is the port of the socket the request came in on, not the Host header
+    port = current_app.config['METRICS_PORT']
+    return bool(port) and request.environ.get('SERVER_PORT') == str(port)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text exposition of the metrics of every worker on this machine."""
+    if not _on_metrics_port():
+        token = current_app.config['METRICS_TOKEN']
+        if not token:
+            return jsonify({'message': 'Not found'}), 404
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+            return jsonify({'message': 'Unauthorized'}), 401
+    return Response(get_worker_metrics().render(), mimetype='text/plain; version=0.0.4')
@@ -1,6 +1,10 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required
 from models.patient_model import Patient  # keep this at top-level
+from services.search.patient_search_service import (
+    loaded_patient_index, refresh_patient_index_async, INDEX_LOADING_RETRY_SECONDS
+)
+import time
 
 patients_bp = Blueprint('patients', __name__)
 
@@ -30,3 +34,40 @@ def find_patient_by_name_and_birthdate():
             return jsonify({'message': 'Patient not found'}), 404
     except Exception as e:
         return jsonify({'message': f'Error: {str(e)}'}), 500
+
+@patients_bp.route('/api/patients/search', methods=['GET'])
+@jwt_required()
+def search_patients():
+    """Typo-tolerant typeahead search over patient names."""
+    query = request.args.get('q', '').strip()
+    birthdate = request.args.get('birthdate')  # optional, "YYYY-MM-DD"
+    phone = request.args.get('phone')          # optional, matches trailing digits
+
+    if not query and not birthdate and not phone:
+        return jsonify({'message': 'Provide q, birthdate or phone'}), 400
+
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+    except ValueError:
+        return jsonify({'message': 'limit must be an integer'}), 400
+
+    try:
+        started = time.perf_counter()
+        index = loaded_patient_index(current_app._get_current_object())
+        if index is None:
+            response = jsonify({'message': 'Patient search is loading, please retry later',
+                                'retry_after': INDEX_LOADING_RETRY_SECONDS})
+            response.status_code = 503
+            response.headers['Retry-After'] = str(INDEX_LOADING_RETRY_SECONDS)
+            return response
+        results = index.search(query, birthdate=birthdate, phone=phone, limit=limit)
+        took_ms = round((time.perf_counter() - started) * 1000, 2)
+
+        refresh_patient_index_async(
+            current_app._get_current_object(),
+            current_app.config['PATIENT_INDEX_MAX_AGE_SECONDS']
+        )
+
+        return jsonify({'results': results, 'count': len(results), 'took_ms': took_ms}), 200
+    except Exception as e:
+        return jsonify({'message': f'Error: {str(e)}'}), 500
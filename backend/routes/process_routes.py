@@ -4,6 +4,10 @@ from services.auth.auth_service import check_permission
 from services.image_processing.enhance_service import enhance_image
 from services.image_processing.colorize_service import colorize_image
 from services.utils import save_uploaded_file, image_to_base64, log_processing
+from services.concurrency.single_flight import single_flight
+from services.concurrency.executors import run_cpu_bound
+from services.http.idempotency import idempotent
+from services.precompute.precompute_service import get_precompute_manager
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,6 +15,7 @@ process_bp = Blueprint('process', __name__)
 
 @process_bp.route('/enhance', methods=['POST'])
 @jwt_required()
+@idempotent
 def enhance_image_route():
     """Enhance dental image route."""
     current_user = get_jwt_identity()
@@ -24,22 +29,26 @@ def enhance_image_route():
         return jsonify({'message': 'No image provided'}), 400
     
     file = request.files['image']
-    filepath = save_uploaded_file(file, current_app.config['UPLOAD_FOLDER'])
+    image_key = save_uploaded_file(file, current_app.config['UPLOAD_FOLDER'], current_user)
     
-    if not filepath:
+    if not image_key:
         return jsonify({'message': 'Invalid file'}), 400
     
-    # Enhance the image
-    result_path = enhance_image(filepath, current_app.config['UPLOAD_FOLDER'])
+    # Enhance the image, unless it was already enhanced in the background
+    precompute = get_precompute_manager()
+    result_key = precompute.lookup('enhanced', image_key) if precompute else None
+    if not result_key:
+        # Identical images being enhanced concurrently share one run
+        result_key = single_flight.do(('enhance', image_key), run_cpu_bound, enhance_image, image_key)
     
-    if not result_path:
+    if not result_key:
         return jsonify({'message': 'Error enhancing image'}), 500
     
     # Log the processing
-    log_processing(current_user, 'enhance', filepath, result_path)
+    log_processing(current_user, 'enhance', image_key, result_key)
     
     # Return the enhanced image as base64
-    base64_image = image_to_base64(result_path)
+    base64_image = image_to_base64(result_key)
     if not base64_image:
         return jsonify({'message': 'Error encoding image'}), 500
         
@@ -50,6 +59,7 @@ def enhance_image_route():
 
 @process_bp.route('/colorize', methods=['POST'])
 @jwt_required()
+@idempotent
 def colorize_image_route():
     """Colorize dental image route."""
     current_user = get_jwt_identity()
@@ -63,22 +73,22 @@ def colorize_image_route():
         return jsonify({'message': 'No image provided'}), 400
     
     file = request.files['image']
-    filepath = save_uploaded_file(file, current_app.config['UPLOAD_FOLDER'])
+    image_key = save_uploaded_file(file, current_app.config['UPLOAD_FOLDER'], current_user)
     
-    if not filepath:
+    if not image_key:
         return jsonify({'message': 'Invalid file'}), 400
     
     # Colorize the image
-    result_path = colorize_image(filepath, current_app.config['UPLOAD_FOLDER'])
+    result_key = single_flight.do(('colorize', image_key), run_cpu_bound, colorize_image, image_key)
     
-    if not result_path:
+    if not result_key:
         return jsonify({'message': 'Error colorizing image'}), 500
     
     # Log the processing
-    log_processing(current_user, 'colorize', filepath, result_path)
+    log_processing(current_user, 'colorize', image_key, result_key)
     
     # Return the colorized image as base64
-    base64_image = image_to_base64(result_path)
+    base64_image = image_to_base64(result_key)
     if not base64_image:
         return jsonify({'message': 'Error encoding image'}), 500
         
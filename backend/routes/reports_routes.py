@@ -1,27 +1,48 @@
-from flask import Blueprint, jsonify
-from services.database.database_service import db_service
+from flask import Blueprint, jsonify, request
+from models.reportModel import Report, SORTABLE_COLUMNS
+from services.utils import parse_date
 import logging
 
 reports_bp = Blueprint('reports', __name__, url_prefix='/api/reports')
 
+MAX_PER_PAGE = 200
+
 @reports_bp.route('/', methods=['GET'])
 def get_reports():
     try:
-        query = """
-            SELECT id, patient_id, doctor_id, report_file_path, created_at FROM reports
+        try:
+            page = max(int(request.args.get('page', 1)), 1)
+            per_page = min(max(int(request.args.get('per_page', 50)), 1), MAX_PER_PAGE)
+            filters = {
+                'patient_id': request.args.get('patient_id', type=int),
+                'doctor_id': request.args.get('doctor_id', type=int),
+                'date_from': parse_date(request.args.get('date_from')),
+                'date_to': parse_date(request.args.get('date_to'), end_of_day=True)
+            }
+            sort = request.args.get('sort', 'created_at')
+            if sort not in SORTABLE_COLUMNS:
+                raise ValueError(f"sort must be one of: {', '.join(SORTABLE_COLUMNS)}")
+        except ValueError as e:
+            return jsonify({'error': 'Invalid query parameter', 'message': str(e)}), 400
+
+        reports = Report.list_reports(
+            sort=sort,
+            order=request.args.get('order', 'desc'),
+            page=page,
+            per_page=per_page,
+            **filters
+        )
+        total = Report.count_reports(**filters)
 
-        """
-        reports = db_service.execute_query(query, fetch=True)
-        
-        if reports is None:
+        if reports is None or total is None:
             return jsonify({'error': 'Failed to fetch reports from database'}), 500
-        
-        # Convert date objects to ISO format strings
-        for report in reports:
-            if report.get('date') and hasattr(report['date'], 'isoformat'):
-                report['date'] = report['date'].isoformat()
-        
-        return jsonify(reports), 200
+
+        # The body stays a plain list; pagination details travel in headers
+        response = jsonify([report.to_dict() for report in reports])
+        response.headers['X-Total-Count'] = str(total)
+        response.headers['X-Page'] = str(page)
+        response.headers['X-Per-Page'] = str(per_page)
+        return response, 200
 
     except Exception as e:
         logging.exception("Error fetching reports")
@@ -0,0 +1,90 @@
+# backend/routes/uploads_routes.py
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from werkzeug.utils import secure_filename
+from services.storage.chunked_upload_service import get_chunked_upload_manager, UploadError
+from services.precompute.precompute_service import get_precompute_manager
+import logging
+
+logger = logging.getLogger(__name__)
+uploads_bp = Blueprint('uploads', __name__)
+
+def _error_response(e):
+    return jsonify({'message': e.message, **e.details}), e.status_code
+
+@uploads_bp.route('/init', methods=['POST'])
+@jwt_required()
+def init_upload():
+    """Start a resumable upload: {"filename", "size", "sha256" (optional)}."""
+    current_user = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+
+    filename = secure_filename(data.get('filename') or '')
+    if not filename:
+        return jsonify({'message': 'filename is required'}), 400
+
+    try:
+        manager = get_chunked_upload_manager(current_app.config)
+        session = manager.init_upload(current_user, filename, data.get('size'), data.get('sha256'))
+        return jsonify(session), 201
+    except UploadError as e:
+        return _error_response(e)
+
+@uploads_bp.route('/<upload_id>', methods=['GET'])
+@jwt_required()
+def upload_status(upload_id):
+    """Current offset of an upload, used to resume after a broken connection."""
+    try:
+        manager = get_chunked_upload_manager(current_app.config)
+        return jsonify(manager.get_status(upload_id, get_jwt_identity())), 200
+    except UploadError as e:
+        return _error_response(e)
+
+@uploads_bp.route('/<upload_id>', methods=['PATCH', 'PUT'])
+@jwt_required()
+def append_chunk(upload_id):
+    """Append the raw request body at the offset given in the Upload-Offset header."""
+    try:
+        offset = int(request.headers.get('Upload-Offset', request.args.get('offset', '')))
+    except ValueError:
+        return jsonify({'message': 'Upload-Offset header is required'}), 400
+
+    try:
+        manager = get_chunked_upload_manager(current_app.config)
+        # request.stream reads the body as it arrives instead of buffering it
+        session = manager.append_chunk(upload_id, get_jwt_identity(), offset, request.stream)
+        return jsonify(session), 200
+    except UploadError as e:
+        return _error_response(e)
+
+@uploads_bp.route('/<upload_id>/finalize', methods=['POST'])
+@jwt_required()
+def finalize_upload(upload_id):
+    """Verify the checksum and move the completed file into storage."""
+    current_user = get_jwt_identity()
+    try:
+        manager = get_chunked_upload_manager(current_app.config)
+        stored = manager.finalize(upload_id, current_user)
+        logger.info(f"Chunked upload {upload_id} finalized by {current_user}")
+        precompute = get_precompute_manager()
+        if precompute:
+            precompute.schedule(stored['key'])
+        return jsonify({
+            'message': 'Image uploaded successfully',
+            'upload_id': stored['upload_id'],
+            'content_hash': stored['digest'],
+            'size': stored['size'],
+            'image': stored['image']
+        }), 200
+    except UploadError as e:
+        return _error_response(e)
+
+@uploads_bp.route('/<upload_id>', methods=['DELETE'])
+@jwt_required()
+def abort_upload(upload_id):
+    try:
+        manager = get_chunked_upload_manager(current_app.config)
+        manager.abort(upload_id, get_jwt_identity())
+        return jsonify({'message': 'Upload cancelled'}), 200
+    except UploadError as e:
+        return _error_response(e)
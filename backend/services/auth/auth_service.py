@@ -140,9 +140,9 @@ def log_user_activity(email, action_description):
 
 def initialize_auth_system():
     """Initialize the authentication system with database setup."""
+    from services.database.database_service import db_service
+
     try:
-        from services.database.database_service import db_service
-        
         # Connect to database
         if not db_service.connect():
             logger.error("Failed to connect to database")
@@ -156,6 +156,18 @@ def initialize_auth_system():
             logger.error(f"Database tables not found or accessible: {e}")
             return False
         
+        # Warn when the schema is behind (migrations are run by setup_database_xampp.py)
+        try:
+            from services.database.schema import MIGRATIONS, get_schema_version
+            current_version = get_schema_version(db_service)
+            if current_version < MIGRATIONS[-1][0]:
+                logger.warning(
+                    f"Database schema is at version {current_version}, latest is {MIGRATIONS[-1][0]}. "
+                    "Run: python -m services.database.schema migrate"
+                )
+        except Exception as e:
+            logger.warning(f"Could not read schema version: {e}")
+        
         # Seed initial users if none exist
         existing_users = User.get_all_users()
         if not existing_users:
@@ -170,4 +182,7 @@ def initialize_auth_system():
         
     except Exception as e:
         logger.error(f"Error initializing auth system: {e}")
-        return False
\ No newline at end of file
+        return False
+    finally:
+        # Hand the connection held since connect() back to the pool
+        db_service.release()
\ No newline at end of file
@@ -0,0 +1,101 @@
+# backend/services/concurrency/executors.py
+"""
+Run CPU-bound work (model inference, OpenCV) off the request's event loop.
+
+Under the gevent worker every request is a greenlet on one OS thread: I/O
+(MySQL, storage, sockets) yields to other requests, but a second of
+inference would stall all of them.  run_cpu_bound hands such work to a
+pool of real OS threads, where TensorFlow and OpenCV release the GIL, and
+parks only the calling greenlet until it finishes.  Under the threaded
+worker each request already has its own OS thread, so the work runs inline.
+"""
+import os
+import logging
+import threading
+from services.metrics.metrics_service import current_route, route_context
+from services.metrics.request_profiler import current_profile, profiling
+
+logger = logging.getLogger(__name__)
+
+
+def cooperative():
+    """True when gevent has patched the standard library in this process."""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('socket')
+
+
+class CPUExecutor:
+    def __init__(self, max_workers):
+        """
+        Args:
+            max_workers: OS threads running CPU-bound work at once; extra
+                calls queue until one is free
+        """
+        self.max_workers = max_workers
+        self._pool = None
+        self._lock = threading.Lock()
+        self.stats = {'submitted': 0, 'inline': 0}
+        # run() is called from many OS threads under the threaded worker
+        self._stats_lock = threading.Lock()
+
+    def _count(self, stat):
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    from gevent.threadpool import ThreadPool
+                    self._pool = ThreadPool(self.max_workers)
+        return self._pool
+
+    def run(self, fn, *args, **kwargs):
+        """Call fn(*args, **kwargs) without blocking other greenlets and return its result."""
+        if not cooperative():
+            self._count('inline')
+            return fn(*args, **kwargs)
+        self._count('submitted')
+        route = current_route()
+        profile = current_profile()
+
+        def call():
+            # Stages timed (and stacks sampled) on the pool thread belong to the calling request
+            with route_context(route), profiling(profile):
+                return fn(*args, **kwargs)
+
+        # get() re-raises the function's exception in the calling greenlet
+        return self._get_pool().spawn(call).get()
+
+    def report(self):
+        pool = self._pool
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {
+            **stats,
+            'max_workers': self.max_workers,
+            'cooperative': cooperative(),
+            'busy': len(pool) if pool is not None else 0
+        }
+
+
+# Initialize singleton for global use
+cpu_executor = None
+
+def get_cpu_executor(config=None):
+    """Get or initialize the CPU executor singleton."""
+    global cpu_executor
+    if cpu_executor is None:
+        if config is None:
+            from flask import current_app
+            config = current_app.config
+        cpu_executor = CPUExecutor(config.get('CPU_EXECUTOR_THREADS') or os.cpu_count() or 1)
+    return cpu_executor
+
+
+def run_cpu_bound(fn, *args, **kwargs):
+    """Run CPU-bound fn on the shared CPU executor (inline outside gevent)."""
+    return get_cpu_executor().run(fn, *args, **kwargs)
@@ -0,0 +1,72 @@
+# backend/services/concurrency/single_flight.py
+"""
+Coalesce identical concurrent calls into one execution.
+
+The first caller for a key runs the function; callers arriving with the
+same key while it runs wait for it and receive the same result (or the
+same exception).  Nothing is cached once the call finishes.  Coalescing
+is per process, which covers the threads of one worker.
+"""
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {'executed': 0, 'coalesced': 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) once for all concurrent callers with this key.
+
+        Args:
+            key: Hashable identity of the work, e.g. (operation, content hash, params)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            self.stats['coalesced'] += 1
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        self.stats['executed'] += 1
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+            if call.waiters:
+                logger.info(f"Coalesced {call.waiters} duplicate requests for {key[0] if isinstance(key, tuple) else key}")
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+# Shared instance for request handlers
+single_flight = SingleFlight()
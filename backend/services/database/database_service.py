@@ -1,16 +1,161 @@
 # backend/services/database/database_service.py
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.errors import PoolError
 import os
+import math
+import time
+import threading
+import itertools
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
 import logging
 from dotenv import load_dotenv
+from flask import request
+from services.concurrency.executors import cooperative
+from services.metrics.metrics_service import stage_timer, timed_stage
 
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Statements that are safe to send to a read replica
+READ_PREFIXES = ('SELECT', 'SHOW', 'EXPLAIN', 'DESCRIBE', 'WITH')
+
+# Carries read-your-writes pinning to the client's next requests, which may
+# land on another thread, worker or machine: epoch seconds until which its
+# reads go to the primary
+PRIMARY_PIN_COOKIE = 'db_primary_until'
+
+
+def mysql_connect_options():
+    """Extra mysql.connector.connect() arguments for the current serving mode."""
+    # The C extension blocks the gevent loop; the pure driver uses patched sockets.
+    # use_pure=False would fail where the C extension is not installed, so it is left unset.
+    return {'use_pure': True} if cooperative() else {}
+
+
+def _is_read_query(query):
+    """Return True if the statement only reads data."""
+    stripped = query.lstrip().lstrip('(').upper()
+    return stripped.startswith(READ_PREFIXES) and 'FOR UPDATE' not in stripped
+
+
+def _parse_replica_hosts(value, default_port):
+    """Parse DB_REPLICA_HOSTS, e.g. 'replica1:3306,replica2'."""
+    replicas = []
+    for item in (value or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.partition(':')
+        replicas.append((host, int(port) if port else default_port))
+    return replicas
+
+
+class ConnectionPool:
+    """
+    At most `size` MySQL connections, each used by one thread (or greenlet)
+    at a time.
+
+    mysql-connector's own pool fails at once when every connection is taken;
+    this one makes the caller wait up to `timeout` seconds, which is what a
+    burst of requests on a gevent worker needs.  Idle connections are reused
+    newest first, so the rest can time out on the server when load drops.
+    Only connections idle for more than `validate_after` seconds are pinged
+    before reuse; a busy pool hands out connections without a round trip.
+    """
+
+    def __init__(self, open_connection, size, timeout, validate_after=30.0):
+        self._open = open_connection
+        self.size = size
+        self.timeout = timeout
+        self.validate_after = validate_after
+        self._idle = deque()  # (connection, monotonic time it was returned)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self.in_use = 0
+
+    def acquire(self):
+        """Check out a live connection, opening one if none is idle."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolError(f"No MySQL connection free after {self.timeout}s (pool size {self.size})")
+        try:
+            while True:
+                with self._lock:
+                    connection, idle_since = self._idle.pop() if self._idle else (None, None)
+                if connection is None:
+                    connection = self._open()
+                    break
+                # is_connected() is a round trip to the server
+                if time.monotonic() - idle_since < self.validate_after or connection.is_connected():
+                    break
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.in_use += 1
+        return connection
+
+    def release(self, connection, broken=False):
+        """Return a checked-out connection; broken ones are closed instead of reused."""
+        if not broken:
+            try:
+                if connection.in_transaction:
+                    connection.rollback()
+            except Error:
+                broken = True
+        with self._lock:
+            self.in_use -= 1
+            if not broken:
+                self._idle.append((connection, time.monotonic()))
+        if broken:
+            try:
+                connection.close()
+            except Error:
+                pass
+        self._slots.release()
+
+    def close_idle(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection, _ in idle:
+            try:
+                connection.close()
+            except Error:
+                pass
+
+    def status(self):
+        with self._lock:
+            return {'size': self.size, 'in_use': self.in_use, 'idle': len(self._idle)}
+
+
+class ReplicaEndpoint:
+    def __init__(self, host, port):
+        """A read replica and its last known health."""
+        self.host = host
+        self.port = port
+        self.pool = None
+        # Out of rotation until the first health check has seen it
+        self.healthy = False
+        self.lag = None
+        self.checked_at = 0.0
+        self.last_error = 'not checked yet'
+        self.check_lock = threading.Lock()
+
+    def to_dict(self):
+        return {
+            'host': self.host,
+            'port': self.port,
+            'healthy': self.healthy,
+            'lag_seconds': self.lag,
+            'last_error': self.last_error
+        }
+
+
 class DatabaseService:
     def __init__(self):
         """Initialize database connection."""
@@ -19,74 +164,370 @@ class DatabaseService:
         self.password = os.getenv('DB_PASSWORD')
         self.database = os.getenv('DB_NAME', 'dental_diagnostic_system')  # Updated to match your DB name
         self.port = int(os.getenv('DB_PORT', 3306))
-        self.connection = None
-    
+        # Seconds to wait for a new connection, so health checks fail fast when MySQL is down
+        self.connect_timeout = int(os.getenv('DB_CONNECT_TIMEOUT', 5))
+        # Open connections per process, shared by its threads (or greenlets)
+        self.pool_size = int(os.getenv('DB_POOL_SIZE', 10))
+        # Seconds a query waits for a free connection before it fails
+        self.pool_timeout = float(os.getenv('DB_POOL_TIMEOUT', 10))
+        # Seconds a pooled connection may sit idle before it is pinged on checkout
+        self.pool_validate_after = float(os.getenv('DB_POOL_VALIDATE_AFTER', 30))
+        # Per-thread state: explicitly held connection, read-your-writes tracking
+        self._local = threading.local()
+
+        # Read replicas; reads fall back to the primary when none are healthy
+        self.replicas = [
+            ReplicaEndpoint(host, port)
+            for host, port in _parse_replica_hosts(os.getenv('DB_REPLICA_HOSTS'), self.port)
+        ]
+        self.replica_max_lag = float(os.getenv('DB_REPLICA_MAX_LAG', 5))
+        self.replica_check_interval = float(os.getenv('DB_REPLICA_CHECK_INTERVAL', 10))
+        # Treat a server that reports no replication status as caught up.
+        # Only for a second standalone instance standing in for a replica in
+        # tests: on a real replica it means replication was stopped and reset.
+        self.replica_allow_standalone = os.getenv('DB_REPLICA_ALLOW_STANDALONE', 'false').lower() == 'true'
+        # After a write, reads from the same thread - and, through
+        # PRIMARY_PIN_COOKIE, the same client - go to the primary for this long
+        self.read_your_writes_window = float(os.getenv('DB_READ_YOUR_WRITES_WINDOW', 5))
+        self._round_robin = itertools.count()
+        self.stats = {'primary_reads': 0, 'replica_reads': 0, 'replica_failovers': 0, 'writes': 0}
+        self._stats_lock = threading.Lock()
+        self._create_pools()
+
+    def _create_pools(self):
+        self.pool = ConnectionPool(lambda: self._open(self.host, self.port),
+                                   self.pool_size, self.pool_timeout, self.pool_validate_after)
+        for replica in self.replicas:
+            replica.pool = ConnectionPool(
+                lambda replica=replica: self._open(replica.host, replica.port),
+                self.pool_size, self.pool_timeout, self.pool_validate_after
+            )
+
+    @property
+    def connection(self):
+        """The primary connection this thread holds through connect(), if any."""
+        return getattr(self._local, 'connection', None)
+
+    @connection.setter
+    def connection(self, value):
+        self._local.connection = value
+
+    def reset_after_fork(self):
+        """
+        Forget connections inherited from a parent process.
+
+        The parent's sockets are dropped without closing them, since closing
+        would end the session the parent (or a sibling) still uses.
+        """
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._create_pools()
+        for replica in self.replicas:
+            replica.check_lock = threading.Lock()
+            replica.checked_at = 0.0
+
+    def _open(self, host, port):
+        return mysql.connector.connect(
+            host=host,
+            user=self.user,
+            password=self.password,
+            database=self.database,
+            port=port,
+            autocommit=True,
+            connection_timeout=self.connect_timeout,
+            **mysql_connect_options()
+        )
+
     def connect(self):
-        """Create database connection."""
+        """
+        Check out a primary connection and hold it on this thread until
+        release(), for callers that use self.connection directly (schema
+        migrations, startup checks).  Queries check one out per statement.
+        """
         try:
-            self.connection = mysql.connector.connect(
-                host=self.host,
-                user=self.user,
-                password=self.password,
-                database=self.database,
-                port=self.port,
-                autocommit=True
-            )
-            
-            if self.connection.is_connected():
-                logger.info("Successfully connected to MySQL database")
-                return True
-                
+            if self.connection is not None:
+                if self.connection.is_connected():
+                    return True
+                self.release(broken=True)
+            self.connection = self.pool.acquire()
+            logger.info("Successfully connected to MySQL database")
+            return True
+
         except Error as e:
             logger.error(f"Error connecting to MySQL: {e}")
             return False
-    
+
+    def release(self, broken=False):
+        """Return the connection held by connect() to the pool."""
+        connection = self.connection
+        if connection is not None:
+            self.connection = None
+            self.pool.release(connection, broken=broken)
+
     def disconnect(self):
-        """Close database connection."""
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
-            logger.info("MySQL connection closed")
-    
+        """Close database connections."""
+        self.release()
+        self.pool.close_idle()
+        for replica in self.replicas:
+            replica.pool.close_idle()
+        logger.info("MySQL connections closed")
+
+    @contextmanager
+    def _primary(self):
+        """The held connection, or one checked out from the pool for the block."""
+        if self.connection is not None:
+            if not self.connect():
+                raise Error("Database connection unavailable")
+            yield self.connection
+            return
+        connection = self.pool.acquire()
+        broken = False
+        try:
+            yield connection
+        except Error:
+            broken = not connection.is_connected()
+            raise
+        finally:
+            self.pool.release(connection, broken=broken)
+
+    def pool_status(self):
+        """Connections open and in use on the primary."""
+        return self.pool.status()
+
+    @contextmanager
+    def use_primary(self):
+        """Send every read issued inside the block to the primary."""
+        depth = getattr(self._local, 'force_primary', 0)
+        self._local.force_primary = depth + 1
+        try:
+            yield self
+        finally:
+            self._local.force_primary = depth
+
+    def _count(self, stat):
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def _mark_write(self):
+        # Wall-clock time, so the pin can be compared in other processes
+        self._local.primary_until = time.time() + self.read_your_writes_window
+        self._local.wrote = True
+        self._count('writes')
+
+    def _reads_pinned_to_primary(self):
+        if getattr(self._local, 'force_primary', 0):
+            return True
+        return time.time() < getattr(self._local, 'primary_until', 0.0)
+
+    def begin_request(self, primary_until=None):
+        """
+        Reset this thread's read-your-writes state for a new request.
+
+        Args:
+            primary_until: Pin carried over from the client's earlier
+                requests (epoch seconds), or None
+        """
+        self._local.primary_until = primary_until or 0.0
+        self._local.wrote = False
+
+    def request_pin(self):
+        """Epoch seconds until which the client should stay on the primary, if this request wrote."""
+        if getattr(self._local, 'wrote', False):
+            return self._local.primary_until
+        return None
+
+    def _check_replica(self, replica):
+        """
+        Return a replica's last known health, starting a background refresh
+        if the last check is stale.  Requests never wait for the check.
+        """
+        if time.monotonic() - replica.checked_at >= self.replica_check_interval:
+            if replica.check_lock.acquire(blocking=False):  # else another check is running
+                threading.Thread(target=self._refresh_replica, args=(replica,),
+                                 name='replica-check', daemon=True).start()
+        return replica.healthy
+
+    def _refresh_replica(self, replica):
+        """Query a replica's replication status and update its health and lag."""
+        connection = None
+        broken = False
+        try:
+            connection = replica.pool.acquire()
+            cursor = connection.cursor(dictionary=True)
+            try:
+                try:
+                    cursor.execute("SHOW REPLICA STATUS")
+                except Error:
+                    cursor.execute("SHOW SLAVE STATUS")  # MySQL < 8.0.22, MariaDB
+                status = cursor.fetchone()
+            finally:
+                cursor.close()
+
+            if status is None:
+                # Replication is not configured (or was reset), so the data
+                # may be arbitrarily old
+                replica.lag = 0 if self.replica_allow_standalone else None
+                reason = 'no replication status'
+            else:
+                lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+                replica.lag = None if lag is None else float(lag)
+                reason = 'replication stopped' if replica.lag is None else f"replication lag {replica.lag}"
+
+            replica.healthy = replica.lag is not None and replica.lag <= self.replica_max_lag
+            replica.last_error = None if replica.healthy else reason
+        except Exception as e:
+            broken = True
+            replica.healthy = False
+            replica.last_error = str(e)
+            logger.warning(f"Replica {replica.host}:{replica.port} health check failed: {e}")
+        finally:
+            if connection is not None:
+                replica.pool.release(connection, broken=broken)
+            replica.checked_at = time.monotonic()
+            replica.check_lock.release()
+
+    def _pick_replica(self):
+        """Return a healthy replica, rotating between them, or None."""
+        if not self.replicas:
+            return None
+        start = next(self._round_robin)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if self._check_replica(replica):
+                return replica
+        return None
+
+    @timed_stage('db')
+    def _run_read(self, query, params, single):
+        """Run a read on a replica when allowed, failing over to the primary."""
+        if not self._reads_pinned_to_primary() and _is_read_query(query):
+            replica = self._pick_replica()
+            if replica is not None:
+                connection = None
+                broken = True
+                try:
+                    connection = replica.pool.acquire()
+                    cursor = connection.cursor(dictionary=True)
+                    try:
+                        cursor.execute(query, params or ())
+                        result = cursor.fetchone() if single else cursor.fetchall()
+                    finally:
+                        cursor.close()
+                    broken = False
+                    self._count('replica_reads')
+                    return result
+                except Error as e:
+                    logger.warning(f"Replica {replica.host}:{replica.port} failed, using primary: {e}")
+                    # A full pool is not a replica failure
+                    if not isinstance(e, PoolError):
+                        replica.healthy = False
+                        replica.last_error = str(e)
+                        replica.checked_at = time.monotonic()
+                    self._count('replica_failovers')
+                finally:
+                    if connection is not None:
+                        replica.pool.release(connection, broken=broken)
+
+        with self._primary() as connection:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(query, params or ())
+            result = cursor.fetchone() if single else cursor.fetchall()
+            cursor.close()
+        self._count('primary_reads')
+        return result
+
     def execute_query(self, query, params=None, fetch=False):
         """Execute a query and return results if fetch=True."""
         try:
-            if not self.connection or not self.connection.is_connected():
-                self.connect()
-            
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute(query, params or ())
-            
             if fetch:
-                result = cursor.fetchall()
-                cursor.close()
-                return result
-            else:
-                self.connection.commit()
-                cursor.close()
-                return True
-                
+                return self._run_read(query, params, single=False)
+
+            with stage_timer('db'), self._primary() as connection:
+                cursor = connection.cursor(dictionary=True)
+                try:
+                    cursor.execute(query, params or ())
+                    connection.commit()
+                except Error:
+                    if connection.is_connected():
+                        connection.rollback()
+                    raise
+                finally:
+                    cursor.close()
+            self._mark_write()
+            return True
+
         except Error as e:
             logger.error(f"Error executing query: {e}")
-            if self.connection:
-                self.connection.rollback()
             return None if fetch else False
-    
+
     def execute_single_query(self, query, params=None):
         """Execute a query and return single result."""
         try:
-            if not self.connection or not self.connection.is_connected():
-                self.connect()
-            
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute(query, params or ())
-            
-            result = cursor.fetchone()
-            cursor.close()
-            return result
-                
+            return self._run_read(query, params, single=True)
+
         except Error as e:
             logger.error(f"Error executing single query: {e}")
             return None
 
+    @contextmanager
+    def transaction(self):
+        """
+        Run several statements on the primary as one transaction.
+
+        Yields a dictionary cursor; commits when the block exits cleanly
+        and rolls back if it raises.
+        """
+        with stage_timer('db'), self._primary() as connection:
+            connection.start_transaction()
+            cursor = connection.cursor(dictionary=True)
+            try:
+                yield cursor
+                connection.commit()
+                self._mark_write()
+            except Exception:
+                if connection.is_connected():
+                    connection.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def replica_status(self):
+        """Health and lag of every configured replica."""
+        return [replica.to_dict() for replica in self.replicas]
+
+
+def init_read_your_writes(app):
+    """
+    Keep a client's reads on the primary for a while after it writes, across
+    requests.  Without it the pin only lasts for the rest of the request (and
+    whatever else the thread serves next), so a client that writes and then
+    reloads could read a replica that has not caught up yet.
+    """
+    @app.before_request
+    def load_primary_pin():
+        # The cookie is client-controlled: a pin can never reach further
+        # ahead than one write's window (and inf or nan is ignored)
+        try:
+            primary_until = float(request.cookies.get(PRIMARY_PIN_COOKIE, 0))
+        except ValueError:
+            primary_until = 0.0
+        if not math.isfinite(primary_until):
+            primary_until = 0.0
+        db_service.begin_request(min(primary_until, time.time() + db_service.read_your_writes_window))
+
+    @app.after_request
+    def save_primary_pin(response):
+        primary_until = db_service.request_pin()
+        if primary_until is not None:
+            response.set_cookie(
+                PRIMARY_PIN_COOKIE,
+                f"{primary_until:.3f}",
+                max_age=int(db_service.read_your_writes_window) + 1,
+                httponly=True,
+                secure=request.is_secure,
+                samesite='Lax'
+            )
+        return response
+
 # Global database instance
-db_service = DatabaseService()
\ No newline at end of file
+db_service = DatabaseService()
@@ -0,0 +1,518 @@
+# backend/services/database/schema.py
+"""
+Versioned schema management for AIDentify.
+
+Migrations are applied in order and recorded in the ``schema_migrations``
+table, so running them again is a no-op.  ``check_query_plans`` runs
+``EXPLAIN`` on every query the services issue and reports the ones that
+fall back to a full table or index scan or sort their rows in a filesort.
+
+Usage (from the backend directory):
+    python -m services.database.schema migrate
+    python -m services.database.schema check
+    python -m services.database.schema status
+"""
+import sys
+import logging
+from datetime import datetime
+from mysql.connector import Error
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Each migration is (version, description, statements).  Never edit a
+# migration that has shipped; append a new one instead.
+MIGRATIONS = [
+    (1, "Core tables", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            email VARCHAR(150) NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            role VARCHAR(30) NOT NULL,
+            status VARCHAR(30) NOT NULL DEFAULT 'inProcess',
+            phoneNumber VARCHAR(30) NULL,
+            Country VARCHAR(60) NULL,
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS activity_logs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NULL,
+            action VARCHAR(50) NULL,
+            description TEXT NULL,
+            timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS patients (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            birthdate DATE NOT NULL,
+            gender VARCHAR(10) NULL,
+            phone VARCHAR(20) NULL,
+            email VARCHAR(100) NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS reports (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            patient_id INT NOT NULL,
+            doctor_id INT NULL,
+            report_file_path VARCHAR(255) NULL,
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """,
+    ]),
+    (2, "Indexes for hot lookups", [
+        "CREATE UNIQUE INDEX ux_users_email ON users (email)",
+        "CREATE INDEX ix_users_status_created ON users (status, created_at)",
+        "CREATE INDEX ix_users_created ON users (created_at)",
+        "CREATE INDEX ix_activity_logs_user_time ON activity_logs (user_id, timestamp)",
+        "CREATE INDEX ix_activity_logs_time ON activity_logs (timestamp)",
+        "CREATE INDEX ix_patients_name_birthdate ON patients (name, birthdate)",
+        "CREATE INDEX ix_reports_patient_created ON reports (patient_id, created_at)",
+    ]),
+    (3, "Report listing indexes that match ORDER BY created_at, id", [
+        # InnoDB appends the primary key to every secondary index, so
+        # (created_at) is really (created_at, id) and serves the listings'
+        # ORDER BY created_at, id without a filesort; (patient_id, created_at)
+        # from migration 2 does the same for one patient's reports.
+        "CREATE INDEX ix_reports_created ON reports (created_at)",
+        "CREATE INDEX ix_reports_doctor_created ON reports (doctor_id, created_at)",
+    ]),
+    (4, "Content-addressed upload storage", [
+        """
+        CREATE TABLE IF NOT EXISTS blobs (
+            digest CHAR(64) PRIMARY KEY,
+            ext VARCHAR(8) NOT NULL DEFAULT '',
+            size BIGINT NOT NULL,
+            ref_count INT NOT NULL DEFAULT 0,
+            created_at DATETIME NOT NULL,
+            last_referenced_at DATETIME NOT NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS uploads (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            blob_digest CHAR(64) NOT NULL,
+            original_filename VARCHAR(255) NULL,
+            uploaded_by VARCHAR(150) NULL,
+            created_at DATETIME NOT NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """,
+        "CREATE INDEX ix_blobs_ref_count ON blobs (ref_count)",
+        "CREATE INDEX ix_uploads_blob ON uploads (blob_digest)",
+        "CREATE INDEX ix_uploads_user_created ON uploads (uploaded_by, created_at)",
+    ]),
+    (5, "Image metadata recorded at upload", [
+        """
+        CREATE TABLE IF NOT EXISTS image_metadata (
+            digest CHAR(64) PRIMARY KEY,
+            format VARCHAR(10) NOT NULL,
+            width INT NULL,
+            height INT NULL,
+            bit_depth SMALLINT NULL,
+            channels SMALLINT NULL,
+            is_grayscale TINYINT(1) NOT NULL DEFAULT 0,
+            modality VARCHAR(20) NOT NULL DEFAULT 'unknown',
+            created_at DATETIME NOT NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """,
+        "CREATE INDEX ix_uploads_created ON uploads (created_at)",
+    ]),
+    (6, "Persistent image processing log", [
+        """
+        CREATE TABLE IF NOT EXISTS processing_logs (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            user_id VARCHAR(150) NULL,
+            action VARCHAR(50) NOT NULL,
+            image_path VARCHAR(255) NULL,
+            result_path VARCHAR(255) NULL,
+            created_at DATETIME(3) NOT NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """,
+        "CREATE INDEX ix_processing_logs_created ON processing_logs (created_at)",
+        "CREATE INDEX ix_processing_logs_user_created ON processing_logs (user_id, created_at)",
+        "CREATE INDEX ix_processing_logs_action_created ON processing_logs (action, created_at)",
+    ]),
+]
+
+# Every query the services issue, with representative parameters.  Add new
+# queries here when you add them to a service so the plan check covers them.
+# Queries that must read the whole table by design set allow_full_scan,
+# listings that walk an index in ORDER BY order and stop at LIMIT set
+# allow_index_scan, and queries that may sort their result set allow_filesort.
+QUERY_PLAN_CHECKS = [
+    {
+        'name': 'User.get_by_email',
+        'query': "SELECT * FROM users WHERE email = %s",
+        'params': ('admin@aidentify.com',),
+    },
+    {
+        'name': 'User.get_by_id',
+        'query': "SELECT * FROM users WHERE id = %s",
+        'params': (1,),
+    },
+    {
+        'name': 'User.get_users_by_status',
+        'query': "SELECT * FROM users WHERE status = %s ORDER BY created_at DESC",
+        'params': ('inProcess',),
+    },
+    {
+        'name': 'User.get_all_users',
+        'query': "SELECT * FROM users ORDER BY created_at DESC",
+        'params': (),
+        'allow_full_scan': True,
+        'allow_filesort': True,
+    },
+    {
+        'name': 'User.get_activity_logs',
+        'query': """
+            SELECT al.*, u.name, u.email
+            FROM activity_logs al
+            JOIN users u ON al.user_id = u.id
+            ORDER BY al.timestamp DESC
+            LIMIT %s
+        """,
+        'params': (100,),
+        'allow_index_scan': True,
+    },
+    {
+        'name': 'admin.get_admin_data (users)',
+        'query': """
+            SELECT id, name, role, created_at AS lastLogin
+            FROM users
+            WHERE status = 'approved'
+        """,
+        'params': (),
+    },
+    {
+        'name': 'admin.get_admin_data (logs)',
+        'query': """
+            SELECT id, user_id, description AS action, timestamp
+            FROM activity_logs
+        """,
+        'params': (),
+        'allow_full_scan': True,
+    },
+    {
+        'name': 'auth.login',
+        'query': "SELECT * FROM users WHERE email = %s",
+        'params': ('admin@aidentify.com',),
+    },
+    {
+        'name': 'patients.find',
+        'query': "SELECT * FROM patients WHERE name = %s AND birthdate = %s LIMIT 1",
+        'params': ('John Doe', '1990-01-01'),
+    },
+    {
+        'name': 'Report.list_reports',
+        'query': """
+            SELECT id, patient_id, doctor_id, report_file_path, created_at FROM reports
+            ORDER BY created_at DESC, id DESC
+            LIMIT %s OFFSET %s
+        """,
+        'params': (50, 0),
+        'allow_index_scan': True,
+    },
+    {
+        'name': 'Report.list_reports (patient)',
+        'query': """
+            SELECT id, patient_id, doctor_id, report_file_path, created_at FROM reports
+            WHERE patient_id = %s
+            ORDER BY created_at DESC, id DESC
+            LIMIT %s OFFSET %s
+        """,
+        'params': (1, 50, 0),
+    },
+    {
+        'name': 'Report.list_reports (doctor, date range)',
+        'query': """
+            SELECT id, patient_id, doctor_id, report_file_path, created_at FROM reports
+            WHERE doctor_id = %s AND created_at >= %s AND created_at < %s
+            ORDER BY created_at DESC, id DESC
+            LIMIT %s OFFSET %s
+        """,
+        'params': (2, '2025-01-01', '2026-01-01', 50, 0),
+    },
+    {
+        'name': 'BlobStore.collect_garbage',
+        'query': "SELECT digest, ext FROM blobs WHERE ref_count = 0 LIMIT %s",
+        'params': (500,),
+    },
+    {
+        'name': 'BlobStore.get_upload',
+        'query': """
+            SELECT u.id, u.uploaded_by, b.digest, b.ext
+            FROM uploads u JOIN blobs b ON b.digest = u.blob_digest
+            WHERE u.id = %s
+        """,
+        'params': (1,),
+    },
+    {
+        'name': 'BlobStore.release',
+        'query': "SELECT blob_digest FROM uploads WHERE id = %s",
+        'params': (1,),
+    },
+    {
+        'name': 'ChunkedUploadManager._stored_bytes',
+        'query': """
+            SELECT COALESCE(SUM(b.size), 0) AS used
+            FROM uploads u JOIN blobs b ON b.digest = u.blob_digest
+            WHERE u.uploaded_by = %s
+        """,
+        'params': ('doctor@aidentify.com',),
+    },
+    {
+        'name': 'image_metadata.get_metadata',
+        'query': "SELECT * FROM image_metadata WHERE digest = %s",
+        'params': ('0' * 64,),
+    },
+    {
+        'name': 'image_metadata.list_images',
+        'query': """
+            SELECT u.id AS upload_id, u.original_filename, u.created_at, m.digest, m.format,
+                   m.width, m.height, m.bit_depth, m.channels, m.is_grayscale, m.modality
+            FROM uploads u JOIN image_metadata m ON m.digest = u.blob_digest
+            WHERE u.uploaded_by = %s
+            ORDER BY u.created_at DESC, u.id DESC
+            LIMIT %s OFFSET %s
+        """,
+        'params': ('doctor@aidentify.com', 50, 0),
+    },
+    {
+        'name': 'ProcessingLog.query',
+        'query': """
+            SELECT id, user_id, action, image_path, result_path, created_at
+            FROM processing_logs
+            WHERE user_id = %s AND created_at >= %s
+            ORDER BY created_at DESC, id DESC
+            LIMIT %s OFFSET %s
+        """,
+        'params': ('doctor@aidentify.com', '2025-01-01', 50, 0),
+    },
+    {
+        'name': 'ProcessingLog.query (action)',
+        'query': """
+            SELECT id, user_id, action, image_path, result_path, created_at
+            FROM processing_logs
+            WHERE action = %s
+            ORDER BY created_at DESC, id DESC
+            LIMIT %s OFFSET %s
+        """,
+        'params': ('enhance', 50, 0),
+    },
+    {
+        'name': 'Report.count_reports (patient)',
+        'query': "SELECT COUNT(*) AS total FROM reports WHERE patient_id = %s",
+        'params': (1,),
+    },
+]
+
+
+def _cursor(db, dictionary=True):
+    """Return a cursor on the primary connection of a DatabaseService."""
+    if not db.connection or not db.connection.is_connected():
+        if not db.connect():
+            raise RuntimeError("Could not connect to database")
+    return db.connection.cursor(dictionary=dictionary)
+
+
+def _ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at DATETIME NOT NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+def _index_target(statement):
+    """
+    Return (verb, index, table) for a CREATE [UNIQUE] INDEX or DROP INDEX
+    statement, or None for any other statement.
+    """
+    tokens = statement.split()
+    upper = [t.upper() for t in tokens]
+    if not upper or upper[0] not in ('CREATE', 'DROP') or 'INDEX' not in upper or 'ON' not in upper:
+        return None
+    return upper[0], tokens[upper.index('INDEX') + 1], tokens[upper.index('ON') + 1]
+
+
+def _index_exists(cursor, index_name, table_name):
+    cursor.execute(
+        "SHOW INDEX FROM `{}` WHERE Key_name = %s".format(table_name),
+        (index_name,)
+    )
+    return bool(cursor.fetchall())
+
+
+def _already_applied(cursor, statement):
+    """
+    True for a CREATE INDEX whose index exists or a DROP INDEX whose index
+    is gone.  MySQL has neither IF NOT EXISTS nor IF EXISTS for indexes,
+    and DDL commits implicitly, so a migration that failed halfway is
+    re-run from its first statement.
+    """
+    target = _index_target(statement)
+    if target is None:
+        return False
+    verb, index_name, table_name = target
+    return _index_exists(cursor, index_name, table_name) == (verb == 'CREATE')
+
+
+def get_schema_version(db):
+    """Return the highest applied migration version (0 if none)."""
+    cursor = _cursor(db)
+    try:
+        _ensure_migrations_table(cursor)
+        cursor.execute("SELECT MAX(version) AS version FROM schema_migrations")
+        row = cursor.fetchone()
+        return (row and row['version']) or 0
+    finally:
+        cursor.close()
+
+
+def apply_migrations(db, target=None):
+    """
+    Apply pending migrations in order.
+
+    Args:
+        db: DatabaseService instance
+        target: Optional highest version to apply
+
+    Returns:
+        List of versions that were applied
+    """
+    applied = []
+    cursor = _cursor(db)
+    try:
+        _ensure_migrations_table(cursor)
+        cursor.execute("SELECT version FROM schema_migrations")
+        done = {row['version'] for row in cursor.fetchall()}
+
+        for version, description, statements in MIGRATIONS:
+            if version in done or (target is not None and version > target):
+                continue
+
+            logger.info(f"Applying schema migration {version}: {description}")
+            for statement in statements:
+                if _already_applied(cursor, statement):
+                    continue
+                cursor.execute(statement)
+
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, description, applied_at) VALUES (%s, %s, %s)",
+                (version, description, datetime.now())
+            )
+            db.connection.commit()
+            applied.append(version)
+
+        return applied
+    except Error as e:
+        logger.error(f"Schema migration failed: {e}")
+        raise
+    finally:
+        cursor.close()
+
+
+def explain_query(db, query, params=None):
+    """Run EXPLAIN on a query and return the plan rows."""
+    cursor = _cursor(db)
+    try:
+        cursor.execute(f"EXPLAIN {query}", params or ())
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def _plan_problem(check, row):
+    """Why a plan row is a problem for this check, or None if it is fine."""
+    access = row.get('type')
+    extra = row.get('Extra') or ''
+    # access type ALL means MySQL reads every row of the table
+    if access == 'ALL' and not check.get('allow_full_scan'):
+        return 'full table scan'
+    # index means it reads every entry of an index instead
+    if access == 'index' and not (check.get('allow_full_scan') or check.get('allow_index_scan')):
+        return 'full index scan'
+    if 'Using filesort' in extra and not check.get('allow_filesort'):
+        return 'filesort'
+    return None
+
+
+def check_query_plans(db, checks=None):
+    """
+    EXPLAIN every registered query and report full table scans, full index
+    scans and filesorts.
+
+    Returns:
+        List of problem dicts (empty when every plan uses an index)
+    """
+    problems = []
+    for check in checks or QUERY_PLAN_CHECKS:
+        try:
+            plan = explain_query(db, check['query'], check.get('params'))
+        except Error as e:
+            problems.append({'name': check['name'], 'error': str(e)})
+            continue
+
+        for row in plan:
+            reason = _plan_problem(check, row)
+            if reason:
+                problems.append({
+                    'name': check['name'],
+                    'reason': reason,
+                    'table': row.get('table'),
+                    'type': row.get('type'),
+                    'key': row.get('key'),
+                    'rows': row.get('rows'),
+                    'possible_keys': row.get('possible_keys'),
+                    'extra': row.get('Extra'),
+                })
+    return problems
+
+
+def main(argv=None):
+    """Command line entry point."""
+    from services.database.database_service import db_service
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+    argv = argv if argv is not None else sys.argv[1:]
+    command = argv[0] if argv else 'status'
+
+    if command == 'migrate':
+        applied = apply_migrations(db_service)
+        print(f"Applied migrations: {applied or 'none (schema up to date)'}")
+        print(f"Schema version: {get_schema_version(db_service)}")
+        return 0
+
+    if command == 'check':
+        problems = check_query_plans(db_service)
+        if not problems:
+            print(f"✓ All {len(QUERY_PLAN_CHECKS)} queries use an index")
+            return 0
+        print("✗ Queries with full scans or filesorts:")
+        for problem in problems:
+            print(f"  - {problem}")
+        return 1
+
+    if command == 'status':
+        current = get_schema_version(db_service)
+        latest = MIGRATIONS[-1][0]
+        print(f"Schema version: {current} (latest: {latest})")
+        return 0 if current == latest else 1
+
+    print("Usage: python -m services.database.schema [migrate|check|status]")
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,15 @@
 # backend/services/detection/dental_classification_service.py
 import os
-import cv2
 import numpy as np
-import tensorflow as tf
 import logging
+import threading
 from PIL import Image
 from io import BytesIO
+from services.image_processing.image_io import read_image, load_image, write_image, derived_key
+from services.metrics.metrics_service import stage_timer, timed_stage, model_batch_size
+from services.lazy_import import lazy_import
+
+cv2 = lazy_import('cv2')
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +24,7 @@ class DentalClassifier:
         # Load model if path is provided
         if model_path and os.path.exists(model_path):
             try:
+                import tensorflow as tf
                 self.model = tf.keras.models.load_model(model_path)
                 logger.info(f"Model loaded successfully from {model_path}")
             except Exception as e:
@@ -27,16 +32,21 @@ class DentalClassifier:
         else:
             logger.warning(f"Model path not found: {model_path}")
     
-    def preprocess_image(self, image_path):
+    @timed_stage('preprocess')
+    def preprocess_image(self, image_key):
         """Preprocess the image for the model."""
         try:
-            img = cv2.imread(image_path)
+            # Decode at the smallest scale that still covers the model input
+            img = load_image(image_key, min_size=self.img_size)
             if img is None:
-                logger.error(f"Could not read image at {image_path}")
+                logger.error(f"Could not read image {image_key}")
                 return None
                 
-            # Convert to RGB (from BGR)
-            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            # Convert to RGB (from BGR, or expand single-channel grayscale)
+            if len(img.shape) == 2:
+                img = cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)
+            else:
+                img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
             
             # Resize to model input size
             img = cv2.resize(img, self.img_size)
@@ -49,7 +59,7 @@ class DentalClassifier:
             logger.error(f"Error preprocessing image: {str(e)}")
             return None
     
-    def predict(self, image_path):
+    def predict(self, image_key):
         """Make predictions on the given image."""
         if self.model is None:
             logger.error("Model not loaded")
@@ -57,7 +67,7 @@ class DentalClassifier:
         
         try:
             # Preprocess the image
-            img = self.preprocess_image(image_path)
+            img = self.preprocess_image(image_key)
             if img is None:
                 return None, "Failed to preprocess image"
             
@@ -65,7 +75,9 @@ class DentalClassifier:
             img_array = np.expand_dims(img, axis=0)
             
             # Make prediction
-            predictions = self.model.predict(img_array)[0]
+            with stage_timer('inference'):
+                model_batch_size.observe(len(img_array), 'dental_classifier')
+                predictions = self.model.predict(img_array)[0]
             
             # Process results
             results = []
@@ -91,7 +103,7 @@ class DentalClassifier:
                 })
             
             # Create visualization with detections
-            visualization = self.create_visualization(image_path, results)
+            visualization = self.create_visualization(image_key, results)
             
             return {
                 'detected_conditions': results,
@@ -151,21 +163,18 @@ class DentalClassifier:
     #         logger.error(f"Error creating visualization: {str(e)}")
     #         return None
 
-    def create_visualization(self, image_path, results):
+    @timed_stage('visualization')
+    def create_visualization(self, image_key, results):
         """Create a visualization of the dental conditions without overlaying text."""
         try:
             # Read the original image
-            img = cv2.imread(image_path)
+            img = read_image(image_key)
             
             # No text or modifications on the image
             # Just save a copy of the original image for displaying results
             
-            # Save visualization to a temporary file
-            result_filename = f"dental_analysis_{os.path.basename(image_path)}"
-            result_path = os.path.join(os.path.dirname(image_path), result_filename)
-            cv2.imwrite(result_path, img)
-            
-            return result_path
+            # Save visualization next to the other derived images
+            return write_image(derived_key('dental_analysis_', image_key), img)
                 
         except Exception as e:
             logger.error(f"Error creating visualization: {str(e)}")
@@ -173,10 +182,13 @@ class DentalClassifier:
 
 # Initialize singleton for global use
 dental_classifier = None
+_classifier_lock = threading.Lock()
 
 def get_dental_classifier(model_path=None):
-    """Get or initialize dental classifier singleton."""
+    """Get or initialize dental classifier singleton (the model loads on first call)."""
     global dental_classifier
     if dental_classifier is None:
-        dental_classifier = DentalClassifier(model_path)
+        with _classifier_lock:
+            if dental_classifier is None:
+                dental_classifier = DentalClassifier(model_path)
     return dental_classifier
\ No newline at end of file
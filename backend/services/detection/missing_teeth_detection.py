@@ -1,28 +1,31 @@
 # backend/services/detection/missing_teeth_detection.py
-import cv2
 import numpy as np
-import os
 import logging
+from services.image_processing.image_io import load_image, write_image, derived_key
+from services.metrics.metrics_service import timed_stage
+from services.lazy_import import lazy_import
+
+cv2 = lazy_import('cv2')
 
 logger = logging.getLogger(__name__)
 
-def detect_missing_teeth(image_path, output_dir):
+@timed_stage('inference')
+def detect_missing_teeth(image_key):
     """
     Detect missing teeth in dental X-ray.
     
     Args:
-        image_path: Path to the input image
-        output_dir: Directory to save the result image
+        image_key: Storage key of the input image
         
     Returns:
-        Tuple of (result_path, detection_results) if successful,
+        Tuple of (result_key, detection_results) if successful,
         (None, None) otherwise
     """
     try:
         # Load the image using OpenCV
-        img = cv2.imread(image_path)
+        img = load_image(image_key)
         if img is None:
-            logger.error(f"Could not read image at {image_path}")
+            logger.error(f"Could not read image {image_key}")
             return None, None
         
         # For now, this is a placeholder for actual ML model inference
@@ -67,11 +70,9 @@ def detect_missing_teeth(image_path, output_dir):
                 })
         
         # Save the result image
-        filename = f"missing_teeth_{os.path.basename(image_path)}"
-        output_path = os.path.join(output_dir, filename)
-        cv2.imwrite(output_path, img_copy)
+        output_key = write_image(derived_key('missing_teeth_', image_key), img_copy)
         
-        return output_path, {
+        return output_key, {
             'missing_teeth': missing_teeth,
             'count': len(missing_teeth)
         }
@@ -0,0 +1,102 @@
+# backend/services/health/readiness.py
+"""
+Readiness of this worker to take traffic.
+
+A worker is ready once its warm-up has finished (see warmup.py) and the
+primary database answers.  A warm-up stage that failed (a missing model
+file, say) does not block readiness, since the affected requests fail
+fast rather than slowly, but the status is reported as 'degraded'.  The
+report also covers queue depths and cache state for diagnosis.
+"""
+import time
+import logging
+from services.database.database_service import db_service
+from services.health.warmup import get_warmup
+
+logger = logging.getLogger(__name__)
+
+
+def _database():
+    from database import db
+
+    started = time.monotonic()
+    with db_service.use_primary():
+        ok = db_service.execute_single_query("SELECT 1 AS ok") is not None
+    report = {
+        'ok': ok,
+        'latency_ms': round((time.monotonic() - started) * 1000, 1),
+        'replicas': db_service.replica_status()
+    }
+    try:
+        report['pool'] = db.engine.pool.status()
+    except Exception as e:
+        report['pool'] = f"unavailable: {str(e)}"
+    return report
+
+
+def _queues(app):
+    from services.concurrency.executors import get_cpu_executor
+    from services.concurrency.single_flight import single_flight
+    from services.http.admission import get_admission_limiters
+    from services.logs.processing_log_service import get_processing_log
+    from services.precompute.precompute_service import get_precompute_manager
+
+    precompute = get_precompute_manager(app.config)
+    limiters = get_admission_limiters(app.config) if app.config['ADMISSION_ENABLED'] else {}
+    return {
+        'admission': {name: limiter.report() for name, limiter in limiters.items()},
+        'processing_log_pending': get_processing_log(app.config).pending(),
+        'precompute_queued': precompute.report()['queued'] if precompute else None,
+        'cpu_executor_busy': get_cpu_executor(app.config).report()['busy'],
+        'coalesced_in_flight': single_flight.in_flight()
+    }
+
+
+def _caches(app):
+    from services.image_processing.image_metadata_service import cache_info
+    from services.image_processing.pixel_cache import get_pixel_cache
+    from services.search import patient_search_service
+    from services.storage.storage_backend import get_storage
+
+    pixel_cache = get_pixel_cache(app.config)
+    index = patient_search_service.patient_index
+    return {
+        'storage': get_storage(app.config).describe(),
+        'pixel_cache': pixel_cache.describe() if pixel_cache else None,
+        'image_metadata': cache_info(),
+        'patient_index': {
+            'loaded': bool(index and index.is_loaded),
+            'patients': len(index) if index and index.is_loaded else 0
+        }
+    }
+
+
+def check_readiness(app):
+    """
+    Returns:
+        Tuple of (ready, report dict)
+    """
+    warmup = get_warmup(app)
+    try:
+        database = _database()
+    except Exception as e:
+        database = {'ok': False, 'error': str(e)}
+
+    ready = warmup.done() and database['ok']
+    if not ready:
+        status = 'warming_up' if not warmup.done() else 'unavailable'
+    else:
+        status = 'degraded' if warmup.failed() else 'ready'
+
+    report = {
+        'status': status,
+        'warmup': warmup.report(),
+        'database': database
+    }
+    for section, collect in (('queues', _queues), ('caches', _caches)):
+        try:
+            report[section] = collect(app)
+        except Exception as e:
+            logger.warning(f"Could not collect {section} for readiness: {str(e)}")
+            report[section] = {'error': str(e)}
+    return ready, report
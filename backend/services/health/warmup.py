@@ -0,0 +1,141 @@
+# backend/services/health/warmup.py
+"""
+Staged warm-up: bring a worker to normal request latency before it is ready.
+
+Nothing heavy is imported with the app, so a cold-started machine answers
+/health/live right away.  The warm-up then runs these stages in order, and
+/health/ready only reports ready once none is pending or running:
+
+- database: open a MySQL connection and an SQLAlchemy pool connection
+- opencv: load the OpenCV library
+- xray_model, dental_classifier: load each model and run one dummy
+  prediction, since Keras builds its inference function on the first call
+- caches: build the patient search index
+
+MODEL_WARMUP decides when the model stages run:
+
+- 'background': each worker runs every stage on a background thread
+  after it starts
+- 'lazy': the model stages are skipped and the first request that needs
+  a model loads it
+"""
+import os
+import time
+import logging
+import threading
+import numpy as np
+from services.concurrency.executors import run_cpu_bound
+
+logger = logging.getLogger(__name__)
+
+WARMUP_MODES = ('background', 'lazy')
+
+MODEL_STAGES = ('opencv', 'xray_model', 'dental_classifier')
+
+
+class Warmup:
+    def __init__(self, app):
+        self.app = app
+        self.stages = [
+            ('database', self._connect_database),
+            ('opencv', self._load_opencv),
+            ('xray_model', self._load_xray_model),
+            ('dental_classifier', self._load_dental_classifier),
+            ('caches', self._preload_caches)
+        ]
+        skipped = MODEL_STAGES if app.config['MODEL_WARMUP'] == 'lazy' else ()
+        self.status = {
+            name: {'state': 'skipped' if name in skipped else 'pending', 'seconds': None, 'error': None}
+            for name, _ in self.stages
+        }
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _connect_database(self):
+        from sqlalchemy import text
+        from database import db
+        from services.database.database_service import db_service
+
+        if db_service.execute_single_query("SELECT 1 AS ok") is None:
+            raise RuntimeError("MySQL is unreachable")
+        with self.app.app_context():
+            db.session.execute(text("SELECT 1"))
+            db.session.remove()
+
+    def _load_opencv(self):
+        import cv2
+        cv2.setNumThreads(cv2.getNumThreads())  # forces the library to load
+
+    def _load_xray_model(self):
+        from services.model_inference.xray_service import get_model
+        model = get_model()
+        model.predict(np.zeros((1, 256, 256, 3), dtype=np.float32), verbose=0)
+
+    def _load_dental_classifier(self):
+        from services.detection.dental_classification_service import get_dental_classifier
+        classifier = get_dental_classifier(os.path.join(self.app.config['MODEL_DIR'], 'MultiLabel.keras'))
+        if classifier.model is None:
+            raise RuntimeError("Dental classification model is not available")
+        width, height = classifier.img_size
+        classifier.model.predict(np.zeros((1, height, width, 3), dtype=np.float32), verbose=0)
+
+    def _preload_caches(self):
+        from services.search.patient_search_service import get_patient_index
+        with self.app.app_context():
+            get_patient_index()
+
+    def run(self, only=None):
+        """
+        Run pending stages in order on the calling thread; failures are recorded, not raised.
+
+        Args:
+            only: Names of the stages to run (default: all)
+        """
+        for name, load in self.stages:
+            if self.status[name]['state'] != 'pending' or (only is not None and name not in only):
+                continue
+            self.status[name]['state'] = 'running'
+            started = time.monotonic()
+            try:
+                # Under gevent, loading on an OS thread keeps the event loop serving requests
+                run_cpu_bound(load)
+                self.status[name]['state'] = 'done'
+            except Exception as e:
+                self.status[name]['state'] = 'failed'
+                self.status[name]['error'] = str(e)
+                logger.error(f"Warm-up stage {name} failed: {str(e)}")
+            self.status[name]['seconds'] = round(time.monotonic() - started, 3)
+        summary = ', '.join(f"{name}={stage['state']} ({stage['seconds']}s)" for name, stage in self.status.items())
+        logger.info(f"Warm-up finished: {summary}")
+
+    def start(self):
+        """Run the pending stages on a background daemon thread."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self.run, name='warmup', daemon=True)
+            self._thread.start()
+
+    def done(self):
+        """True once no stage is pending or running."""
+        return all(stage['state'] not in ('pending', 'running') for stage in self.status.values())
+
+    def failed(self):
+        return [name for name, stage in self.status.items() if stage['state'] == 'failed']
+
+    def report(self):
+        return {'done': self.done(), 'stages': self.status}
+
+
+# Initialize singleton for global use
+warmup = None
+
+def get_warmup(app=None):
+    """Get or initialize the warm-up singleton."""
+    global warmup
+    if warmup is None:
+        if app is None:
+            from flask import current_app
+            app = current_app._get_current_object()
+        warmup = Warmup(app)
+    return warmup
@@ -0,0 +1,259 @@
+# backend/services/http/admission.py
+"""
+Admission control for expensive routes.
+
+Each route class (today only 'inference': dental analysis, detection and
+image processing) runs at most `limit` requests at once per worker; up to
+`queue_size` more wait for a slot, best priority first:
+
+- interactive: clinical requests from the app (default)
+- bulk: batch clients, sent with ``X-Request-Priority: bulk``
+- background: speculative precompute, which also takes inference slots
+
+A request is rejected with 503 and Retry-After instead of queueing when
+the queue is full, or when the estimated wait (queue position times the
+recent average service time) is already longer than it may wait.  A full
+queue sheds its lowest-priority waiter to make room for a more important
+arrival, so overload turns bulk work away first.  Requests that outlive
+their wait in the queue are rejected the same way.  Unclassified routes
+(login, admin, patients, ...) are never queued, so they stay fast while
+inference is saturated.
+
+Every classified route requires a JWT, and it is verified before the
+request is admitted: a request without a valid token gets the same 401 or
+422 its view would give, without taking a queue position or a slot.
+"""
+import math
+import time
+import heapq
+import logging
+import itertools
+import threading
+from contextlib import contextmanager
+from flask import g, request, jsonify
+from flask_jwt_extended import verify_jwt_in_request
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = {'interactive': 0, 'bulk': 1, 'background': 2}
+
+PRIORITY_HEADER = 'X-Request-Priority'
+
+# Blueprint name -> route class
+ROUTE_CLASSES = {
+    'dental': 'inference',
+    'detect': 'inference',
+    'process': 'inference'
+}
+
+# Weight of the newest sample in the service time average
+SERVICE_TIME_ALPHA = 0.2
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    def __init__(self, priority):
+        self.priority = priority
+        self.granted = False
+        self.shed = False
+
+
+class AdmissionLimiter:
+    def __init__(self, name, limit, queue_size, max_wait, initial_service_time=5.0):
+        """
+        Args:
+            name: Route class, for logs and reports
+            limit: Requests running at once
+            queue_size: Requests waiting for a slot before new ones are rejected
+            max_wait: Seconds a request may wait for a slot
+            initial_service_time: Service time estimate until one is measured
+        """
+        if limit < 1:
+            raise ValueError(f"Admission limit for {name} must be at least 1, got {limit}")
+        if queue_size < 0:
+            raise ValueError(f"Admission queue size for {name} must not be negative, got {queue_size}")
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.service_time = initial_service_time
+        self._active = 0
+        self._queue = []  # heap of (priority rank, arrival order, waiter)
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+        self.stats = {
+            'admitted': 0,
+            'queued': 0,
+            'rejected_queue_full': 0,
+            'rejected_deadline': 0,
+            'timed_out': 0,
+            'shed': 0
+        }
+
+    def _estimated_wait(self, position):
+        """Seconds until the request at this queue position gets a slot."""
+        return math.ceil((position + 1) / self.limit) * self.service_time
+
+    def _retry_after(self):
+        return max(1, math.ceil(self._estimated_wait(len(self._queue))))
+
+    def _grant_next(self):
+        while self._queue and self._active < self.limit:
+            _, _, waiter = heapq.heappop(self._queue)
+            waiter.granted = True
+            self._active += 1
+        self._cond.notify_all()
+
+    def _shed_lowest(self, rank):
+        """Drop the least important waiter if it ranks below `rank`; returns True if one was dropped."""
+        if not self._queue:
+            return False
+        lowest = max(self._queue)
+        if lowest[0] <= rank:
+            return False
+        self._queue.remove(lowest)
+        heapq.heapify(self._queue)
+        lowest[2].shed = True
+        self.stats['shed'] += 1
+        self._cond.notify_all()
+        return True
+
+    def acquire(self, priority='interactive', max_wait=None):
+        """
+        Wait for a slot.
+
+        Args:
+            priority: Key of PRIORITIES
+            max_wait: Seconds to wait at most (default: the limiter's
+                max_wait; None from a background caller means no deadline)
+
+        Raises:
+            AdmissionRejected: The request should be turned away
+        """
+        rank = PRIORITIES[priority]
+        wait = self.max_wait if max_wait is None and priority != 'background' else max_wait
+        with self._cond:
+            if self._active < self.limit and not self._queue:
+                self._active += 1
+                self.stats['admitted'] += 1
+                return
+
+            # Position among waiters of equal or better priority
+            position = sum(1 for entry in self._queue if entry[0] <= rank)
+            if wait is not None and self._estimated_wait(position) > wait:
+                self.stats['rejected_deadline'] += 1
+                raise AdmissionRejected('estimated wait exceeds deadline', self._retry_after())
+            if len(self._queue) >= self.queue_size and not self._shed_lowest(rank):
+                self.stats['rejected_queue_full'] += 1
+                raise AdmissionRejected('queue full', self._retry_after())
+
+            waiter = _Waiter(priority)
+            heapq.heappush(self._queue, (rank, next(self._order), waiter))
+            self.stats['queued'] += 1
+            deadline = None if wait is None else time.monotonic() + wait
+            while not waiter.granted and not waiter.shed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._queue = [entry for entry in self._queue if entry[2] is not waiter]
+                    heapq.heapify(self._queue)
+                    self.stats['timed_out'] += 1
+                    raise AdmissionRejected('timed out waiting for a slot', self._retry_after())
+                self._cond.wait(remaining)
+            if waiter.shed:
+                raise AdmissionRejected('shed for a higher-priority request', self._retry_after())
+            self.stats['admitted'] += 1
+
+    def release(self, service_time=None):
+        with self._cond:
+            self._active -= 1
+            if service_time is not None:
+                self.service_time += SERVICE_TIME_ALPHA * (service_time - self.service_time)
+            self._grant_next()
+
+    @contextmanager
+    def slot(self, priority='interactive', max_wait=None):
+        self.acquire(priority, max_wait)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def report(self):
+        with self._cond:
+            waiting = {name: 0 for name in PRIORITIES}
+            for _, _, waiter in self._queue:
+                waiting[waiter.priority] += 1
+            return {
+                **self.stats,
+                'limit': self.limit,
+                'active': self._active,
+                'waiting': waiting,
+                'queue_size': self.queue_size,
+                'max_wait': self.max_wait,
+                'service_time': round(self.service_time, 3)
+            }
+
+
+def _admit():
+    route_class = ROUTE_CLASSES.get(request.blueprint)
+    if route_class is None or request.method == 'OPTIONS':
+        return None
+    # Raises the JWT errors the JWTManager turns into 401/422
+    verify_jwt_in_request()
+    limiter = get_admission_limiters()[route_class]
+    priority = request.headers.get(PRIORITY_HEADER, 'interactive').lower()
+    # Clients can lower their priority to bulk; background is for precompute only
+    if priority not in ('interactive', 'bulk'):
+        priority = 'interactive'
+    try:
+        limiter.acquire(priority)
+    except AdmissionRejected as e:
+        logger.warning(f"Rejected {request.method} {request.path} ({priority}): {e.reason}")
+        response = jsonify({'message': 'Server is busy, please retry later', 'retry_after': e.retry_after})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+    g.admission = (limiter, time.monotonic())
+    return None
+
+
+def _release(exc=None):
+    admission = g.pop('admission', None)
+    if admission is not None:
+        limiter, started = admission
+        limiter.release(time.monotonic() - started)
+
+
+def init_admission(app):
+    """Queue or reject requests to classified routes before their views run."""
+    get_admission_limiters(app.config)
+    app.before_request(_admit)
+    app.teardown_request(_release)
+
+
+# Initialize singleton for global use
+admission_limiters = None
+
+def get_admission_limiters(config=None):
+    """Get or initialize the per-route-class limiters."""
+    global admission_limiters
+    if admission_limiters is None:
+        if config is None:
+            from flask import current_app
+            config = current_app.config
+        admission_limiters = {
+            'inference': AdmissionLimiter(
+                'inference',
+                limit=config['ADMISSION_INFERENCE_CONCURRENCY'],
+                queue_size=config['ADMISSION_INFERENCE_QUEUE_SIZE'],
+                max_wait=config['ADMISSION_INFERENCE_MAX_WAIT_SECONDS']
+            )
+        }
+    return admission_limiters
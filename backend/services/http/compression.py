@@ -0,0 +1,109 @@
+# backend/services/http/compression.py
+"""
+Response compression (brotli when available and accepted, else gzip).
+
+Only responses that are large enough, not streamed, not already encoded and
+of a compressible content type are compressed.  Responses carrying base64
+images still shrink by roughly a quarter, since base64 only uses 6 bits per
+byte.
+"""
+import gzip
+import logging
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIMETYPES = (
+    'application/json',
+    'application/javascript',
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/csv',
+    'image/svg+xml'
+)
+
+
+def _accepted_encodings(header):
+    """Encodings the client accepts (q=0 excluded)."""
+    accepted = set()
+    for part in (header or '').split(','):
+        pieces = part.strip().split(';')
+        coding = pieces[0].strip().lower()
+        q = 1.0
+        for param in pieces[1:]:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding)
+    return accepted
+
+
+def choose_encoding(accept_encoding):
+    accepted = _accepted_encodings(accept_encoding)
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding, gzip_level=6, brotli_quality=4):
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    # mtime=0 keeps output deterministic (and cacheable by ETag)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def init_compression(app):
+    """Register the after_request hook that compresses responses."""
+    min_size = app.config['COMPRESSION_MIN_SIZE']
+    mimetypes = tuple(app.config.get('COMPRESSION_MIMETYPES') or DEFAULT_MIMETYPES)
+    gzip_level = app.config['COMPRESSION_GZIP_LEVEL']
+    brotli_quality = app.config['COMPRESSION_BROTLI_QUALITY']
+
+    from flask import request
+
+    @app.after_request
+    def compress_response(response):
+        if response.direct_passthrough or response.is_streamed:
+            return response
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return response
+        if 'Content-Encoding' in response.headers:
+            return response
+        if response.mimetype not in mimetypes:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if response.content_length is not None and response.content_length < min_size:
+            return response
+
+        encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        compressed = compress(data, encoding, gzip_level, brotli_quality)
+        if len(compressed) >= len(data):
+            return response
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        etag, _ = response.get_etag()
+        if etag:
+            # A compressed body is a different representation
+            response.set_etag(etag, weak=True)
+        return response
+
+    logger.info(f"Response compression enabled ({'br, gzip' if brotli else 'gzip'}, >= {min_size} bytes)")
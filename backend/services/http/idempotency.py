@@ -0,0 +1,115 @@
+# backend/services/http/idempotency.py
+"""
+Idempotency-Key support for POST routes that start expensive work.
+
+A client sending ``Idempotency-Key: <unique value>`` may retry the same
+request (after a timeout, say) without running it again: the first
+completed response is stored for IDEMPOTENCY_TTL_SECONDS and replayed,
+and a retry arriving while the original is still running waits for it.
+Keys are scoped to the authenticated user, and reusing a key for a
+different endpoint or request body is rejected with 422.
+"""
+import json
+import time
+import uuid
+import hashlib
+import logging
+from functools import wraps
+from flask import request, jsonify, current_app
+from flask_jwt_extended import get_jwt_identity
+from services.concurrency.single_flight import single_flight
+from services.storage.storage_backend import get_storage
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+FORM_MIMETYPES = ('multipart/form-data', 'application/x-www-form-urlencoded')
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def _record_key(user, idempotency_key):
+    scoped = hashlib.sha256(f"{user}\0{idempotency_key}".encode('utf-8')).hexdigest()
+    return f"idempotency/{scoped}.json"
+
+
+def _body_digest():
+    """SHA-256 of the request body; forms are hashed field by field so uploads stay spooled on disk."""
+    digest = hashlib.sha256()
+    if request.mimetype in FORM_MIMETYPES:
+        for name, value in sorted(request.form.items(multi=True)):
+            digest.update(f"{name}\0{value}\0".encode('utf-8'))
+        for name, file in sorted(request.files.items(multi=True), key=lambda item: item[0]):
+            digest.update(f"{name}\0{file.filename}\0".encode('utf-8'))
+            for chunk in iter(lambda: file.stream.read(HASH_CHUNK_BYTES), b''):
+                digest.update(chunk)
+            file.stream.seek(0)
+    else:
+        digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+def _fingerprint():
+    return f"{request.method} {request.path} {_body_digest()}"
+
+
+def _load(record_key, ttl):
+    try:
+        record = json.loads(get_storage().read_bytes(record_key))
+    except FileNotFoundError:
+        return None
+    if time.time() - record['created_at'] > ttl:
+        return None
+    return record
+
+
+def _replay(record, replayed):
+    response = current_app.response_class(record['body'], status=record['status'], mimetype=record['mimetype'])
+    if replayed:
+        response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view):
+    """Decorate a view (below @jwt_required) to honour Idempotency-Key headers."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        idempotency_key = request.headers.get(HEADER)
+        if not idempotency_key:
+            return view(*args, **kwargs)
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            return jsonify({'message': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'}), 400
+
+        ttl = current_app.config['IDEMPOTENCY_TTL_SECONDS']
+        record_key = _record_key(get_jwt_identity(), idempotency_key)
+        fingerprint = _fingerprint()
+        request_id = uuid.uuid4().hex
+
+        def run():
+            # Another worker may have finished it while this one was queued
+            record = _load(record_key, ttl)
+            if record is not None:
+                return record
+            response = current_app.make_response(view(*args, **kwargs))
+            record = {
+                'fingerprint': fingerprint,
+                'request_id': request_id,
+                'status': response.status_code,
+                'mimetype': response.mimetype,
+                'body': response.get_data(as_text=True),
+                'created_at': time.time()
+            }
+            # Server errors are not stored, so a retry gets another attempt
+            if response.status_code < 500:
+                get_storage().write_bytes(record_key, json.dumps(record).encode('utf-8'))
+            return record
+
+        record = single_flight.do(('idempotency', record_key), run)
+        if record['fingerprint'] != fingerprint:
+            return jsonify({'message': f'{HEADER} was already used for a different request'}), 422
+        # Stored responses and responses shared with a concurrent original are replays
+        return _replay(record, record['request_id'] != request_id)
+
+    return wrapper
@@ -0,0 +1,107 @@
+# backend/services/http/json_provider.py
+"""
+JSON provider for Flask that serializes with orjson when it is installed.
+
+Datetimes and dates are written as ISO 8601 strings, numpy scalars and
+arrays as plain numbers and lists, and Decimals as strings, so route code
+can return database rows and model outputs without converting them first.
+Without orjson (or with JSON_PROVIDER=json) the standard library encoder
+is used with the same rules.
+"""
+import json
+import uuid
+import decimal
+import logging
+from collections.abc import Mapping
+from datetime import date, datetime, time
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+
+def _default(obj):
+    """Serialize the types neither encoder handles by itself."""
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, Mapping):
+        # Mappings that are not dicts (dict subclasses are encoded natively)
+        return dict(obj)
+    if isinstance(obj, bytes):
+        return obj.decode('utf-8', errors='replace')
+    if np is not None:
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if isinstance(obj, np.ndarray):
+            # orjson only handles contiguous arrays of common dtypes natively
+            return obj.tolist()
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Drop-in replacement for Flask's provider (``app.json``)."""
+
+    use_orjson = orjson is not None
+    if orjson is not None:
+        OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(self, obj):
+        if self.use_orjson:
+            return orjson.dumps(obj, default=_default, option=self.OPTIONS)
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Callers asking for specific encoder options (indent, sort_keys, ...)
+            kwargs.setdefault('default', _default)
+            return json.dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        # Encode straight to bytes instead of str and back
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
+
+
+class StdlibJSONProvider(FastJSONProvider):
+    """Same type handling using only the standard library encoder."""
+
+    use_orjson = False
+
+
+JSON_PROVIDERS = {
+    'orjson': FastJSONProvider,
+    'json': StdlibJSONProvider
+}
+
+
+def init_json_provider(app):
+    """Install the provider selected by JSON_PROVIDER."""
+    name = app.config.get('JSON_PROVIDER', 'orjson')
+    provider_class = JSON_PROVIDERS.get(name)
+    if provider_class is None:
+        raise ValueError(f"Unknown JSON_PROVIDER: {name}")
+    app.json = provider_class(app)
+    logger.info(f"JSON provider: {'orjson' if app.json.use_orjson else 'json'}")
@@ -0,0 +1,257 @@
+# backend/services/http/rate_limit.py
+"""
+Token-bucket rate limiting of heavy routes per user.
+
+Each user has one bucket per route class (see admission.ROUTE_CLASSES).
+A bucket holds up to `burst` tokens and refills at `per_minute` tokens a
+minute; a request takes one token or is refused with 429 and Retry-After.
+Limits are looked up by user first, then by the role in the user's JWT,
+then 'default', so doctors can be given a larger burst than scripts
+running under other accounts.  Limited routes all require a JWT; requests
+without a valid one are refused with the view's own 401 or 422 before
+they reach a bucket or the admission queue.
+
+Responses from limited routes carry:
+
+- X-RateLimit-Limit: bucket size (burst)
+- X-RateLimit-Remaining: whole tokens left
+- X-RateLimit-Reset: seconds until the bucket is full again
+
+Buckets live in process memory by default, so each worker process limits
+on its own.  RATE_LIMIT_BACKEND=redis shares them between workers and
+machines; if Redis is unreachable, requests are let through.
+"""
+import json
+import math
+import time
+import logging
+import threading
+from flask import g, request, jsonify
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
+from services.http.admission import ROUTE_CLASSES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMITS = {
+    'inference': {
+        'doctor': {'per_minute': 20, 'burst': 10},
+        'admin': {'per_minute': 20, 'burst': 5},
+        'default': {'per_minute': 6, 'burst': 3}
+    }
+}
+
+# Buckets untouched for this long are full again and can be forgotten
+PRUNE_INTERVAL_SECONDS = 300
+
+
+class MemoryBucketStore:
+    """Buckets in this process's memory."""
+
+    def __init__(self):
+        self._buckets = {}  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+        self._pruned_at = time.monotonic()
+
+    def take(self, key, per_second, burst, cost=1):
+        """
+        Refill the bucket and take `cost` tokens if available.
+
+        Returns:
+            Tuple of (allowed, tokens left)
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * per_second)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            if now - self._pruned_at > PRUNE_INTERVAL_SECONDS:
+                self._prune(now)
+        return allowed, tokens
+
+    def _prune(self, now):
+        self._buckets = {key: state for key, state in self._buckets.items()
+                         if now - state[1] < PRUNE_INTERVAL_SECONDS}
+        self._pruned_at = now
+
+    def describe(self):
+        return {'backend': 'memory', 'buckets': len(self._buckets)}
+
+
+# Refill and take atomically, on Redis's clock so machines agree
+_TAKE_SCRIPT = """
+local per_second = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or burst
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - updated_at) * per_second)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / per_second) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisBucketStore:
+    """Buckets shared by every worker and machine through Redis."""
+
+    def __init__(self, url, prefix='ratelimit:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires redis (pip install redis)")
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._take = self._client.register_script(_TAKE_SCRIPT)
+        self.prefix = prefix
+        self.errors = 0
+
+    def take(self, key, per_second, burst, cost=1):
+        try:
+            allowed, tokens = self._take(keys=[self.prefix + key], args=[per_second, burst, cost])
+            return bool(allowed), float(tokens)
+        except Exception as e:
+            # Failing open: an outage of the limiter must not take the API down
+            self.errors += 1
+            logger.warning(f"Rate limit store unavailable, allowing request: {str(e)}")
+            return True, burst
+
+    def describe(self):
+        return {'backend': 'redis', 'errors': self.errors}
+
+
+def _validate_limit(where, limit):
+    """Raise ValueError unless `limit` is a usable {'per_minute', 'burst'} dict."""
+    if not isinstance(limit, dict):
+        raise ValueError(f"Rate limit {where} must be an object with per_minute and burst")
+    per_minute, burst = limit.get('per_minute'), limit.get('burst')
+    if isinstance(per_minute, bool) or not isinstance(per_minute, (int, float)) or per_minute <= 0:
+        raise ValueError(f"Rate limit {where}: per_minute must be a number above 0, got {per_minute!r}")
+    if isinstance(burst, bool) or not isinstance(burst, (int, float)) or burst < 1:
+        raise ValueError(f"Rate limit {where}: burst must be at least 1, got {burst!r}")
+
+
+class RateLimiter:
+    def __init__(self, store, limits=None):
+        """
+        Args:
+            store: MemoryBucketStore or RedisBucketStore
+            limits: {route class: {role or 'default': {'per_minute', 'burst'}},
+                     'users': {identity: {route class: {'per_minute', 'burst'}}}}
+                merged over DEFAULT_LIMITS
+
+        Raises:
+            ValueError: A limit is missing per_minute or burst, or they are
+                not positive (per_minute 0 would never refill)
+        """
+        self.store = store
+        self.stats = {'allowed': 0, 'limited': 0}
+        limits = limits or {}
+        self.users = limits.get('users', {})
+        self.limits = {route_class: dict(roles) for route_class, roles in DEFAULT_LIMITS.items()}
+        for route_class, roles in limits.items():
+            if route_class != 'users':
+                self.limits.setdefault(route_class, {}).update(roles)
+        for route_class, roles in self.limits.items():
+            for role, limit in roles.items():
+                _validate_limit(f"{route_class}.{role}", limit)
+        for identity, route_classes in self.users.items():
+            for route_class, limit in route_classes.items():
+                _validate_limit(f"users.{identity}.{route_class}", limit)
+
+    def limit_for(self, route_class, identity, role):
+        """The {'per_minute', 'burst'} limit for a user, or None if the class is unlimited."""
+        user_limit = self.users.get(identity, {}).get(route_class)
+        if user_limit:
+            return user_limit
+        roles = self.limits.get(route_class)
+        if not roles:
+            return None
+        return roles.get(role) or roles.get('default')
+
+    def check(self, route_class, identity, role):
+        """
+        Take a token for this request.
+
+        Returns:
+            Tuple of (allowed, headers dict), or (True, None) when unlimited
+        """
+        limit = self.limit_for(route_class, identity, role)
+        if limit is None:
+            return True, None
+        per_second = limit['per_minute'] / 60.0
+        burst = limit['burst']
+        allowed, tokens = self.store.take(f"{route_class}:{identity}", per_second, burst)
+        self.stats['allowed' if allowed else 'limited'] += 1
+        headers = {
+            'X-RateLimit-Limit': str(burst),
+            'X-RateLimit-Remaining': str(int(tokens)),
+            'X-RateLimit-Reset': str(math.ceil((burst - tokens) / per_second))
+        }
+        if not allowed:
+            headers['Retry-After'] = str(max(1, math.ceil((1 - tokens) / per_second)))
+        return allowed, headers
+
+
+def _limit_request():
+    route_class = ROUTE_CLASSES.get(request.blueprint)
+    if route_class is None or request.method == 'OPTIONS':
+        return None
+    # Raises the JWT errors the JWTManager turns into 401/422
+    verify_jwt_in_request()
+    identity = get_jwt_identity()
+
+    allowed, headers = get_rate_limiter().check(route_class, identity, get_jwt().get('role'))
+    if headers is None:
+        return None
+    g.rate_limit_headers = headers
+    if not allowed:
+        logger.warning(f"Rate limited {identity} on {request.method} {request.path}")
+        response = jsonify({'message': 'Too many requests, please slow down',
+                            'retry_after': int(headers['Retry-After'])})
+        response.status_code = 429
+        return response
+    return None
+
+
+def _add_headers(response):
+    headers = g.pop('rate_limit_headers', None)
+    if headers:
+        response.headers.update(headers)
+    return response
+
+
+def init_rate_limit(app):
+    """Rate-limit classified routes; register before admission control so refused requests never queue."""
+    get_rate_limiter(app.config)
+    app.before_request(_limit_request)
+    app.after_request(_add_headers)
+
+
+# Initialize singleton for global use
+rate_limiter = None
+
+def get_rate_limiter(config=None):
+    """Get or initialize the rate limiter singleton from app config."""
+    global rate_limiter
+    if rate_limiter is None:
+        if config is None:
+            from flask import current_app
+            config = current_app.config
+        if config['RATE_LIMIT_BACKEND'] == 'redis':
+            store = RedisBucketStore(config['RATE_LIMIT_REDIS_URL'])
+        elif config['RATE_LIMIT_BACKEND'] == 'memory':
+            store = MemoryBucketStore()
+        else:
+            raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {config['RATE_LIMIT_BACKEND']}")
+        rate_limiter = RateLimiter(store, json.loads(config['RATE_LIMITS'] or '{}'))
+    return rate_limiter
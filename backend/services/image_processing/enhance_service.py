@@ -1,27 +1,30 @@
 # backend/services/image_processing/enhance_service.py
-import cv2
 import numpy as np
-import os
 import logging
+from services.image_processing.image_io import load_image, write_image, derived_key
+from services.metrics.metrics_service import timed_stage
+from services.lazy_import import lazy_import
+
+cv2 = lazy_import('cv2')
 
 logger = logging.getLogger(__name__)
 
-def enhance_image(image_path, output_dir):
+@timed_stage('processing')
+def enhance_image(image_key):
     """
     Enhance dental X-ray or CT scan image.
     
     Args:
-        image_path: Path to the input image
-        output_dir: Directory to save the enhanced image
+        image_key: Storage key of the input image
         
     Returns:
-        Path to the enhanced image if successful, None otherwise
+        Storage key of the enhanced image if successful, None otherwise
     """
     try:
         # Load the image using OpenCV
-        img = cv2.imread(image_path)
+        img = load_image(image_key)
         if img is None:
-            logger.error(f"Could not read image at {image_path}")
+            logger.error(f"Could not read image {image_key}")
             return None
         
         # Convert to grayscale if not already
@@ -35,11 +38,9 @@ def enhance_image(image_path, output_dir):
         enhanced = clahe.apply(gray)
         
         # Save the enhanced image
-        filename = f"enhanced_{os.path.basename(image_path)}"
-        output_path = os.path.join(output_dir, filename)
-        cv2.imwrite(output_path, enhanced)
+        output_key = write_image(derived_key('enhanced_', image_key), enhanced)
         
-        return output_path
+        return output_key
         
     except Exception as e:
         logger.error(f"Error enhancing image: {str(e)}")
@@ -0,0 +1,141 @@
+# backend/services/image_processing/image_io.py
+"""
+Read and write images through the configured storage backend.
+
+Images are addressed by storage key rather than filesystem path, so the
+processing services work the same on local disk and object storage.
+"""
+import os
+import hashlib
+import numpy as np
+import logging
+from services.storage.storage_backend import get_storage
+from services.image_processing.image_metadata_service import get_metadata_for_key
+from services.image_processing.pixel_cache import get_pixel_cache
+from services.metrics.metrics_service import stage_timer, timed_stage
+from services.lazy_import import lazy_import
+
+cv2 = lazy_import('cv2')
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DERIVED_EXT = '.png'
+
+# imread flag names for (grayscale, downscale factor), resolved on use so
+# importing this module does not load OpenCV
+_DECODE_FLAGS = {
+    (False, 1): 'IMREAD_COLOR',
+    (False, 2): 'IMREAD_REDUCED_COLOR_2',
+    (False, 4): 'IMREAD_REDUCED_COLOR_4',
+    (False, 8): 'IMREAD_REDUCED_COLOR_8',
+    (True, 1): 'IMREAD_GRAYSCALE',
+    (True, 2): 'IMREAD_REDUCED_GRAYSCALE_2',
+    (True, 4): 'IMREAD_REDUCED_GRAYSCALE_4',
+    (True, 8): 'IMREAD_REDUCED_GRAYSCALE_8',
+}
+
+
+@timed_stage('decode')
+def read_image(image_key, flags=None):
+    """
+    Decode an image from storage.
+
+    Args:
+        image_key: Storage key of the image
+        flags: cv2.imread flags (default: cv2.IMREAD_COLOR)
+
+    Returns:
+        The decoded image array, or None if the key is missing or undecodable
+    """
+    try:
+        data = get_storage().read_bytes(image_key)
+    except FileNotFoundError:
+        logger.error(f"Image not found in storage: {image_key}")
+        return None
+    if flags is None:
+        flags = cv2.IMREAD_COLOR
+    return cv2.imdecode(np.frombuffer(data, np.uint8), flags)
+
+
+def decode_mode(metadata, allow_grayscale=True, min_size=None):
+    """
+    Pick the decode mode from recorded metadata.
+
+    Args:
+        metadata: image_metadata row, or None when unknown
+        allow_grayscale: Decode single-channel when the pixels are grayscale
+        min_size: (width, height) the caller needs at least; allows a
+            reduced-scale decode (JPEG decodes at 1/2, 1/4 or 1/8 directly)
+
+    Returns:
+        Tuple of (grayscale, downscale factor)
+    """
+    if not metadata:
+        return False, 1
+    grayscale = bool(allow_grayscale and metadata['is_grayscale'])
+    scale = 1
+    if min_size and metadata['width'] and metadata['height']:
+        for factor in (8, 4, 2):
+            if metadata['width'] // factor >= min_size[0] and metadata['height'] // factor >= min_size[1]:
+                scale = factor
+                break
+    return grayscale, scale
+
+
+def load_image(image_key, allow_grayscale=True, min_size=None):
+    """
+    Decode an image using the cheapest mode its recorded metadata allows.
+
+    Grayscale images come back single-channel, so callers' ``len(img.shape)``
+    checks skip colour conversion; images without metadata decode as before.
+    Grayscale decodes are served from the shared pixel cache when enabled,
+    as read-only arrays.
+    """
+    try:
+        metadata = get_metadata_for_key(image_key)
+    except Exception as e:
+        logger.warning(f"Image metadata unavailable for {image_key}: {str(e)}")
+        metadata = None
+    grayscale, scale = decode_mode(metadata, allow_grayscale, min_size)
+
+    cache = get_pixel_cache() if grayscale else None
+    if cache:
+        with stage_timer('decode'):
+            pixels = cache.get(metadata['digest'], scale)
+        if pixels is not None:
+            return pixels
+
+    img = read_image(image_key, getattr(cv2, _DECODE_FLAGS[(grayscale, scale)]))
+    if cache and img is not None:
+        cache.put(metadata['digest'], img, scale)
+    return img
+
+
+def derived_key(prefix, image_key):
+    """
+    Key for a result derived from an image, e.g. derived/3f/a0/enhanced_<name>.
+
+    Results are sharded like blobs, by a hash of the name, so no directory
+    (or object listing) has to hold all of them.
+    """
+    name = os.path.basename(image_key)
+    if not os.path.splitext(name)[1]:
+        name += DEFAULT_DERIVED_EXT
+    shard = hashlib.sha256(name.encode('utf-8')).hexdigest()
+    return f"derived/{shard[:2]}/{shard[2:4]}/{prefix}{name}"
+
+
+@timed_stage('encode')
+def write_image(key, img):
+    """
+    Encode an image and store it; remote uploads happen in the background.
+
+    Returns:
+        The key on success, None if encoding failed
+    """
+    ok, buffer = cv2.imencode(os.path.splitext(key)[1] or DEFAULT_DERIVED_EXT, img)
+    if not ok:
+        logger.error(f"Could not encode image for {key}")
+        return None
+    get_storage().write_bytes(key, buffer.tobytes(), background=True)
+    return key
@@ -0,0 +1,212 @@
+# backend/services/image_processing/image_metadata_service.py
+"""
+Image facts recorded once per unique upload (keyed by content hash).
+
+Dimensions, bit depth, channels and format come from the file headers.
+Whether the pixels are really grayscale is checked once on a reduced-scale
+decode, since X-rays are often saved as three identical colour channels.
+Modality is a heuristic label derived from those facts.
+"""
+import re
+import time
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from datetime import datetime
+from services.database.database_service import db_service
+from services.image_processing.image_probe import probe_image
+from services.concurrency.executors import run_cpu_bound
+from services.lazy_import import lazy_import
+
+cv2 = lazy_import('cv2')
+
+logger = logging.getLogger(__name__)
+
+HEADER_PROBE_BYTES = 64 * 1024
+
+# Panoramic radiographs are roughly twice as wide as they are tall
+PANORAMIC_MIN_ASPECT = 1.6
+
+_DIGEST_KEY = re.compile(r'(?:^|/)([0-9a-f]{64})(?:\.[\w]+)?$')
+
+# Metadata never changes for a digest, so lookups are cached per process
+CACHE_SIZE = 4096
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_stats = {'hits': 0, 'misses': 0}
+
+# Cached list_images totals, keyed by uploader (None: everyone).  The blob
+# store clears them when uploads are added or removed; the TTL bounds
+# staleness from uploads handled by other processes.
+COUNT_CACHE_TTL_SECONDS = 60
+_count_cache = {}
+_count_cache_lock = threading.Lock()
+
+
+def digest_for_key(image_key):
+    """Content hash of a blob key, or None for keys that are not blobs."""
+    match = _DIGEST_KEY.search(image_key or '')
+    return match.group(1) if match else None
+
+
+def _looks_grayscale(path):
+    """Decode at 1/8 scale and compare the colour channels."""
+    img = cv2.imread(path, cv2.IMREAD_REDUCED_COLOR_8)
+    if img is None:
+        return False
+    if img.ndim == 2:
+        return True
+    b, g, r = img[..., 0].astype(np.int16), img[..., 1].astype(np.int16), img[..., 2].astype(np.int16)
+    # JPEG chroma noise keeps channels from matching exactly
+    return max(np.abs(b - g).mean(), np.abs(g - r).mean()) < 2.0
+
+
+def classify_modality(info, is_grayscale):
+    """Heuristic modality label for an image."""
+    if info['format'] == 'dicom':
+        return 'dicom'
+    if not is_grayscale:
+        return 'photo'
+    width, height = info.get('width'), info.get('height')
+    if width and height and width / height >= PANORAMIC_MIN_ASPECT:
+        return 'panoramic_xray'
+    return 'xray'
+
+
+def extract_metadata(path, digest):
+    """
+    Collect metadata for a local image file.
+
+    Returns:
+        Metadata dict, or None if the file is not a recognized image
+    """
+    with open(path, 'rb') as f:
+        info = probe_image(f.read(HEADER_PROBE_BYTES))
+    if info is None:
+        return None
+    # The decode runs on the CPU pool so it does not stall the event loop
+    is_grayscale = info['channels'] == 1 or (info['format'] != 'dicom' and run_cpu_bound(_looks_grayscale, path))
+    return {
+        'digest': digest,
+        'format': info['format'],
+        'width': info['width'],
+        'height': info['height'],
+        'bit_depth': info['bit_depth'],
+        'channels': info['channels'],
+        'is_grayscale': bool(is_grayscale),
+        'modality': classify_modality(info, is_grayscale)
+    }
+
+
+def save_metadata(metadata):
+    """Store metadata for a digest (identical content never changes, so first write wins)."""
+    db_service.execute_query("""
+        INSERT IGNORE INTO image_metadata
+            (digest, format, width, height, bit_depth, channels, is_grayscale, modality, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, (
+        metadata['digest'], metadata['format'], metadata['width'], metadata['height'],
+        metadata['bit_depth'], metadata['channels'], int(metadata['is_grayscale']),
+        metadata['modality'], datetime.now()
+    ))
+    _remember(metadata['digest'], metadata)
+
+
+def record_metadata(path, digest):
+    """Extract and store metadata for a newly stored blob; failures are logged only."""
+    try:
+        metadata = extract_metadata(path, digest)
+        if metadata:
+            save_metadata(metadata)
+        return metadata
+    except Exception as e:
+        logger.warning(f"Could not record metadata for {digest}: {str(e)}")
+        return None
+
+
+def _remember(digest, metadata):
+    with _cache_lock:
+        _cache[digest] = metadata
+        _cache.move_to_end(digest)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def cache_info():
+    with _cache_lock:
+        return {'entries': len(_cache), 'max_entries': CACHE_SIZE, **_cache_stats}
+
+
+def get_metadata(digest):
+    """Metadata for a digest, or None if it was never recorded."""
+    with _cache_lock:
+        if digest in _cache:
+            _cache.move_to_end(digest)
+            _cache_stats['hits'] += 1
+            return _cache[digest]
+        _cache_stats['misses'] += 1
+    row = db_service.execute_single_query(
+        "SELECT * FROM image_metadata WHERE digest = %s", (digest,)
+    )
+    if not row:
+        return None  # not cached: it may be recorded later
+    row['is_grayscale'] = bool(row['is_grayscale'])
+    _remember(digest, row)
+    return row
+
+
+def get_metadata_for_key(image_key):
+    digest = digest_for_key(image_key)
+    return get_metadata(digest) if digest else None
+
+
+def invalidate_image_counts():
+    """Drop every cached list_images total."""
+    with _count_cache_lock:
+        _count_cache.clear()
+
+
+def _count_images(where, params, uploaded_by):
+    now = time.monotonic()
+    with _count_cache_lock:
+        cached = _count_cache.get(uploaded_by)
+        if cached and now - cached[1] < COUNT_CACHE_TTL_SECONDS:
+            return cached[0]
+    result = db_service.execute_single_query(f"""
+        SELECT COUNT(*) AS total
+        FROM uploads u JOIN image_metadata m ON m.digest = u.blob_digest
+        {where}
+    """, tuple(params))
+    if result is None:
+        return None
+    with _count_cache_lock:
+        _count_cache[uploaded_by] = (result['total'], now)
+    return result['total']
+
+
+def list_images(uploaded_by=None, page=1, per_page=50):
+    """
+    List uploads with their image metadata, newest first.
+
+    Returns:
+        Tuple of (rows, total), or (None, None) on database errors
+    """
+    where, params = "", []
+    if uploaded_by is not None:
+        where = "WHERE u.uploaded_by = %s"
+        params.append(uploaded_by)
+    rows = db_service.execute_query(f"""
+        SELECT u.id AS upload_id, u.original_filename, u.created_at, m.digest, m.format,
+               m.width, m.height, m.bit_depth, m.channels, m.is_grayscale, m.modality
+        FROM uploads u JOIN image_metadata m ON m.digest = u.blob_digest
+        {where}
+        ORDER BY u.created_at DESC, u.id DESC
+        LIMIT %s OFFSET %s
+    """, tuple(params + [per_page, (page - 1) * per_page]), fetch=True)
+    total = _count_images(where, params, uploaded_by)
+    if rows is None or total is None:
+        return None, None
+    for row in rows:
+        row['is_grayscale'] = bool(row['is_grayscale'])
+    return rows, total
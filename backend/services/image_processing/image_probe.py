@@ -0,0 +1,171 @@
+# backend/services/image_processing/image_probe.py
+"""
+Identify image files from their first bytes, without decoding them.
+"""
+import struct
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Canonical file extension for each detected format
+FORMAT_EXTENSIONS = {
+    'jpeg': '.jpg',
+    'png': '.png',
+    'bmp': '.bmp',
+    'tiff': '.tif',
+    'webp': '.webp',
+    'dicom': '.dcm'
+}
+
+
+def detect_format(header):
+    """
+    Detect the image format from the leading bytes of a file.
+
+    Args:
+        header: At least the first 132 bytes of the file
+
+    Returns:
+        Format name (a key of FORMAT_EXTENSIONS) or None if unknown
+    """
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if header.startswith(b'BM'):
+        return 'bmp'
+    if header.startswith((b'II*\x00', b'MM\x00*')):
+        return 'tiff'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    if header[128:132] == b'DICM':
+        return 'dicom'
+    return None
+
+
+def extension_for(header, filename=None):
+    """Canonical extension for the content, falling back to the filename's."""
+    image_format = detect_format(header)
+    if image_format:
+        return FORMAT_EXTENSIONS[image_format]
+    if filename and '.' in filename:
+        return '.' + filename.rsplit('.', 1)[1].lower()[:8]
+    return ''
+
+
+def _probe_png(header):
+    if len(header) < 29 or header[12:16] != b'IHDR':
+        return None
+    width, height = struct.unpack('>II', header[16:24])
+    bit_depth, color_type = header[24], header[25]
+    channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}.get(color_type)
+    return {'width': width, 'height': height, 'bit_depth': bit_depth, 'channels': channels}
+
+
+def _probe_jpeg(header):
+    # Walk the marker segments until a start-of-frame marker
+    pos = 2
+    while pos + 9 < len(header):
+        if header[pos] != 0xFF:
+            return None
+        marker = header[pos + 1]
+        if marker == 0xFF:
+            pos += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            pos += 2
+            continue
+        length = struct.unpack('>H', header[pos + 2:pos + 4])[0]
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            precision = header[pos + 4]
+            height, width = struct.unpack('>HH', header[pos + 5:pos + 9])
+            channels = header[pos + 9]
+            return {'width': width, 'height': height, 'bit_depth': precision, 'channels': channels}
+        pos += 2 + length
+    return None
+
+
+def _probe_bmp(header):
+    if len(header) < 30:
+        return None
+    width, height = struct.unpack('<ii', header[18:26])
+    bits = struct.unpack('<H', header[28:30])[0]
+    channels = 1 if bits <= 8 else (4 if bits == 32 else 3)
+    return {'width': width, 'height': abs(height), 'bit_depth': 8 if bits > 8 else bits, 'channels': channels}
+
+
+def _probe_tiff(header):
+    endian = '<' if header[:2] == b'II' else '>'
+    if len(header) < 8:
+        return None
+    ifd = struct.unpack(endian + 'I', header[4:8])[0]
+    if ifd + 2 > len(header):
+        return None
+    count = struct.unpack(endian + 'H', header[ifd:ifd + 2])[0]
+    tags = {}
+    for i in range(count):
+        entry = ifd + 2 + i * 12
+        if entry + 12 > len(header):
+            break
+        tag, field_type, _ = struct.unpack(endian + 'HHI', header[entry:entry + 8])
+        if field_type == 3:  # SHORT
+            value = struct.unpack(endian + 'H', header[entry + 8:entry + 10])[0]
+        else:
+            value = struct.unpack(endian + 'I', header[entry + 8:entry + 12])[0]
+        tags[tag] = value
+    if 256 not in tags or 257 not in tags:
+        return None
+    channels = tags.get(277, 1)
+    # BitsPerSample is an offset when there are several samples; assume 8
+    bit_depth = tags.get(258, 8) if channels == 1 else 8
+    return {'width': tags[256], 'height': tags[257], 'bit_depth': bit_depth, 'channels': channels}
+
+
+def _probe_webp(header):
+    chunk = header[12:16]
+    if chunk == b'VP8X' and len(header) >= 30:
+        width = int.from_bytes(header[24:27], 'little') + 1
+        height = int.from_bytes(header[27:30], 'little') + 1
+    elif chunk == b'VP8 ' and len(header) >= 30:
+        width, height = struct.unpack('<HH', header[26:30])
+        width, height = width & 0x3FFF, height & 0x3FFF
+    elif chunk == b'VP8L' and len(header) >= 25:
+        bits = int.from_bytes(header[21:25], 'little')
+        width, height = (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    else:
+        return None
+    return {'width': width, 'height': height, 'bit_depth': 8, 'channels': None}
+
+
+_PROBES = {
+    'png': _probe_png,
+    'jpeg': _probe_jpeg,
+    'bmp': _probe_bmp,
+    'tiff': _probe_tiff,
+    'webp': _probe_webp
+}
+
+
+def probe_image(header):
+    """
+    Read format, dimensions, bit depth and channel count from file headers.
+
+    Args:
+        header: Leading bytes of the file (64KB covers large EXIF blocks)
+
+    Returns:
+        Dict with format, width, height, bit_depth and channels (values may
+        be None when the header does not carry them), or None if the bytes
+        are not a recognized image
+    """
+    image_format = detect_format(header)
+    if image_format is None:
+        return None
+    info = {'format': image_format, 'width': None, 'height': None, 'bit_depth': None, 'channels': None}
+    probe = _PROBES.get(image_format)
+    if probe:
+        try:
+            info.update(probe(header) or {})
+        except struct.error as e:
+            logger.warning(f"Truncated {image_format} header: {e}")
+    return info
@@ -0,0 +1,134 @@
+# backend/services/image_processing/pixel_cache.py
+"""
+Shared on-disk cache of decoded single-channel images.
+
+Decoded arrays are saved as .npy files named after the image's content hash
+and decode scale.  Readers memory-map them read-only, so every worker
+process on the machine shares the same page-cache pages and a hot image
+opens without decoding.  File modification times serve as the LRU clock;
+the cache is trimmed to its size cap whenever a write pushes it over.
+"""
+import os
+import time
+import logging
+import tempfile
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Trim down to this fraction of the cap so eviction does not run on every write
+EVICT_TARGET_RATIO = 0.9
+
+# Hits refresh the LRU clock at most this often per entry
+TOUCH_INTERVAL_SECONDS = 60
+
+
+class PixelCache:
+    def __init__(self, root, max_bytes):
+        """
+        Args:
+            root: Directory holding the .npy files
+            max_bytes: Size cap for the whole directory
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._bytes = self._scan_size()
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+    def _path(self, digest, scale):
+        return os.path.join(self.root, f"{digest}_{scale}.npy")
+
+    def _scan_size(self):
+        total = 0
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if entry.name.endswith('.npy'):
+                    try:
+                        total += entry.stat().st_size
+                    except FileNotFoundError:
+                        pass
+        return total
+
+    def get(self, digest, scale=1):
+        """Return a read-only memory-mapped array, or None on a miss."""
+        path = self._path(digest, scale)
+        try:
+            pixels = np.load(path, mmap_mode='r')
+        except (FileNotFoundError, ValueError, OSError):
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        try:
+            if time.time() - os.stat(path).st_mtime > TOUCH_INTERVAL_SECONDS:
+                os.utime(path)
+        except FileNotFoundError:
+            pass  # evicted by another process; the mapping stays valid
+        return pixels
+
+    def put(self, digest, pixels, scale=1):
+        """Store a decoded single-channel array (written atomically)."""
+        if pixels is None or pixels.ndim != 2:
+            return
+        path = self._path(digest, scale)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, pixels)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            logger.warning(f"Could not cache pixels for {digest}: {str(e)}")
+            return
+        self.stats['writes'] += 1
+        with self._lock:
+            self._bytes += size
+            over = self._bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache is under its cap."""
+        with self._lock:
+            entries = []
+            with os.scandir(self.root) as it:
+                for entry in it:
+                    if not entry.name.endswith('.npy'):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+            # Other processes write here too, so start from the real size
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * EVICT_TARGET_RATIO
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    # Open memory maps in other processes stay valid after unlink
+                    os.remove(path)
+                    self.stats['evictions'] += 1
+                except FileNotFoundError:
+                    pass
+                total -= size
+            self._bytes = total
+
+    def describe(self):
+        return {'root': self.root, 'bytes': self._bytes, 'max_bytes': self.max_bytes, **self.stats}
+
+
+# Initialize singleton for global use
+pixel_cache = None
+
+def get_pixel_cache(config=None):
+    """Get or initialize the pixel cache singleton (None when disabled)."""
+    global pixel_cache
+    if pixel_cache is None and config is not None and config['PIXEL_CACHE_ENABLED']:
+        pixel_cache = PixelCache(config['PIXEL_CACHE_DIR'], config['PIXEL_CACHE_MAX_BYTES'])
+    return pixel_cache
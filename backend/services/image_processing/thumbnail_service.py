@@ -0,0 +1,49 @@
+# backend/services/image_processing/thumbnail_service.py
+import os
+import logging
+from services.image_processing.image_io import load_image, write_image, derived_key
+from services.metrics.metrics_service import timed_stage
+from services.lazy_import import lazy_import
+
+cv2 = lazy_import('cv2')
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_MAX_SIDE = 256
+
+
+def thumbnail_key(image_key):
+    """Storage key of an image's thumbnail (always JPEG)."""
+    return os.path.splitext(derived_key('thumb_', image_key))[0] + '.jpg'
+
+
+@timed_stage('processing')
+def create_thumbnail(image_key, max_side=THUMBNAIL_MAX_SIDE):
+    """
+    Create a JPEG thumbnail that fits in a max_side square.
+
+    Args:
+        image_key: Storage key of the input image
+        max_side: Longest side of the thumbnail in pixels
+
+    Returns:
+        Storage key of the thumbnail if successful, None otherwise
+    """
+    try:
+        # A reduced-scale decode is plenty for a thumbnail
+        img = load_image(image_key, min_size=(max_side, max_side))
+        if img is None:
+            logger.error(f"Could not read image {image_key}")
+            return None
+
+        height, width = img.shape[:2]
+        scale = max_side / max(height, width)
+        if scale < 1:
+            img = cv2.resize(img, (max(1, round(width * scale)), max(1, round(height * scale))),
+                             interpolation=cv2.INTER_AREA)
+
+        return write_image(thumbnail_key(image_key), img)
+
+    except Exception as e:
+        logger.error(f"Error creating thumbnail: {str(e)}")
+        return None
@@ -0,0 +1,46 @@
+# backend/services/lazy_import.py
+"""
+Defer importing heavy extension modules until they are first used.
+
+    cv2 = lazy_import('cv2')
+
+binds a placeholder module whose first attribute access runs the real
+import, so importing the app (for /health, login, admin pages) does not
+pay for OpenCV.  Code using the module is unchanged; only module-level
+uses such as constants in default arguments would trigger the import
+early.
+
+The placeholder is not importlib's LazyLoader: before Python 3.12.3 two
+threads touching a LazyLoader module at once can both execute it, or see
+it half-initialized.  Here the first use goes through a normal import,
+serialized by a lock, and the module appears in sys.modules only once it
+is fully loaded.
+"""
+import sys
+import types
+import threading
+import importlib
+import importlib.util
+
+_import_lock = threading.RLock()
+
+
+class _LazyModule(types.ModuleType):
+    """Placeholder for a module that has not been imported yet."""
+
+    def __getattr__(self, attr):
+        # Only called for names not yet in this placeholder's namespace
+        with _import_lock:
+            module = importlib.import_module(self.__name__)
+            # Later lookups find the module's names directly
+            self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name):
+    """Return module `name`, imported on first attribute access."""
+    if name in sys.modules:
+        return sys.modules[name]
+    if importlib.util.find_spec(name) is None:
+        raise ImportError(f"No module named '{name}'", name=name)
+    return _LazyModule(name)
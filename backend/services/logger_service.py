@@ -2,6 +2,7 @@
 import os
 import mysql.connector
 from datetime import datetime
+from services.database.database_service import mysql_connect_options
 
 def log_activity(user_id, action, description):
     try:
@@ -10,13 +11,14 @@ def log_activity(user_id, action, description):
             user=os.getenv('DB_USER', 'root'),
             password=os.getenv('DB_PASSWORD', ''),
             database=os.getenv('DB_NAME', 'dental_diagnostic_system'),
-            port=int(os.getenv('DB_PORT', 3306))
+            port=int(os.getenv('DB_PORT', 3306)),
+            **mysql_connect_options()
         )
         cursor = connection.cursor()
         cursor.execute("""
-            INSERT INTO activity_logs (user_id, action_description, action_time)
-            VALUES (%s, %s, %s)
-        """, (user_id, f"{action}: {description}", datetime.utcnow()))
+            INSERT INTO activity_logs (user_id, action, description, timestamp)
+            VALUES (%s, %s, %s, %s)
+        """, (user_id, action, description, datetime.utcnow()))
         connection.commit()
         cursor.close()
         connection.close()
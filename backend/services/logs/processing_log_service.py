@@ -0,0 +1,210 @@
+# backend/services/logs/processing_log_service.py
+"""
+Log of image processing actions (enhance, colorize, detections, analysis).
+
+Entries go into a bounded in-memory ring buffer for the most recent
+activity and are written to the ``processing_logs`` table in batches by a
+background thread, so recording one never waits on the database.  Queries
+are answered from the table with its (user, time) and (action, time)
+indexes; the ring buffer only serves them while the database is down.
+"""
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+
+from services.database.database_service import db_service
+
+logger = logging.getLogger(__name__)
+
+# Unwritten entries kept while the database is unreachable, per buffer slot
+MAX_PENDING_FACTOR = 10
+
+
+class ProcessingLog:
+    def __init__(self, buffer_size=1000, flush_interval=2.0, batch_size=200):
+        """
+        Args:
+            buffer_size: Recent entries kept in memory
+            flush_interval: Seconds between background writes
+            batch_size: Largest number of rows per INSERT
+        """
+        self.recent = deque(maxlen=buffer_size)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = buffer_size * MAX_PENDING_FACTOR
+        self._queue = queue.Queue()
+        self._retry = []
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.stats = {'recorded': 0, 'written': 0, 'dropped': 0, 'write_errors': 0}
+
+    def record(self, user_id, action, image_path, result_path=None):
+        """Record one processing action; returns the entry."""
+        entry = {
+            'user_id': user_id,
+            'action': action,
+            'image_path': image_path,
+            'result_path': result_path,
+            'timestamp': time.time()
+        }
+        self.recent.append(entry)
+        self._queue.put(entry)
+        self.stats['recorded'] += 1
+        self._ensure_writer()
+        return entry
+
+    def _ensure_writer(self):
+        # Started lazily so each worker process runs its own writer
+        if self._thread and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='processing-log-writer', daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def _write(self, batch):
+        rows = [
+            (e['user_id'], e['action'], e['image_path'], e['result_path'],
+             datetime.fromtimestamp(e['timestamp']))
+            for e in batch
+        ]
+        with db_service.transaction() as cursor:
+            cursor.executemany("""
+                INSERT INTO processing_logs (user_id, action, image_path, result_path, created_at)
+                VALUES (%s, %s, %s, %s, %s)
+            """, rows)
+
+    def flush(self):
+        """Write every queued entry to the database."""
+        with self._flush_lock:
+            pending = self._retry
+            self._retry = []
+            while True:
+                try:
+                    pending.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for start in range(0, len(pending), self.batch_size):
+                batch = pending[start:start + self.batch_size]
+                try:
+                    self._write(batch)
+                    self.stats['written'] += len(batch)
+                except Exception as e:
+                    self.stats['write_errors'] += 1
+                    logger.warning(f"Could not write processing log entries: {str(e)}")
+                    self._retry = pending[start:]
+                    break
+
+            overflow = len(self._retry) - self.max_pending
+            if overflow > 0:
+                # Keep the newest entries when the database stays unavailable
+                self._retry = self._retry[overflow:]
+                self.stats['dropped'] += overflow
+                logger.error(f"Dropped {overflow} processing log entries")
+
+    def pending(self):
+        """Entries recorded but not yet written to the database."""
+        return self._queue.qsize() + len(self._retry)
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+    @staticmethod
+    def _where(user_id=None, action=None, date_from=None, date_to=None):
+        clauses, params = [], []
+        if user_id is not None:
+            clauses.append("user_id = %s")
+            params.append(user_id)
+        if action is not None:
+            clauses.append("action = %s")
+            params.append(action)
+        if date_from is not None:
+            clauses.append("created_at >= %s")
+            params.append(date_from)
+        if date_to is not None:
+            clauses.append("created_at < %s")
+            params.append(date_to)
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    @staticmethod
+    def _to_entry(row):
+        return {
+            'id': row['id'],
+            'user_id': row['user_id'],
+            'action': row['action'],
+            'timestamp': row['created_at'].timestamp(),
+            'image_path': row['image_path'],
+            'result_path': row['result_path']
+        }
+
+    def query(self, user_id=None, action=None, date_from=None, date_to=None, page=1, per_page=50):
+        """
+        Query logged actions, newest first.
+
+        Entries recorded in the last flush interval may not be visible yet.
+
+        Returns:
+            Tuple of (entries, total)
+        """
+        where, params = self._where(user_id, action, date_from, date_to)
+        rows = db_service.execute_query(f"""
+            SELECT id, user_id, action, image_path, result_path, created_at
+            FROM processing_logs
+            {where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT %s OFFSET %s
+        """, tuple(params + [per_page, (page - 1) * per_page]), fetch=True)
+        total = db_service.execute_single_query(
+            f"SELECT COUNT(*) AS total FROM processing_logs {where}", tuple(params)
+        )
+        if rows is not None and total is not None:
+            return [self._to_entry(row) for row in rows], total['total']
+
+        logger.warning("Processing log table unavailable; answering from recent entries")
+        return self._query_recent(user_id, action, date_from, date_to, page, per_page)
+
+    def _query_recent(self, user_id, action, date_from, date_to, page, per_page):
+        since = date_from.timestamp() if date_from else None
+        until = date_to.timestamp() if date_to else None
+        matches = [
+            entry for entry in reversed(self.recent)
+            if (user_id is None or entry['user_id'] == user_id)
+            and (action is None or entry['action'] == action)
+            and (since is None or entry['timestamp'] >= since)
+            and (until is None or entry['timestamp'] < until)
+        ]
+        start = (page - 1) * per_page
+        return [dict(entry, id=None) for entry in matches[start:start + per_page]], len(matches)
+
+
+# Initialize singleton for global use
+processing_log = None
+_processing_log_lock = threading.Lock()
+
+def get_processing_log(config=None):
+    """Get or initialize the processing log singleton (defaults to the app config)."""
+    global processing_log
+    if processing_log is None:
+        with _processing_log_lock:
+            if processing_log is None:
+                if config is None:
+                    from flask import current_app
+                    config = current_app.config
+                processing_log = ProcessingLog(
+                    buffer_size=config['PROCESSING_LOG_BUFFER_SIZE'],
+                    flush_interval=config['PROCESSING_LOG_FLUSH_INTERVAL']
+                )
+    return processing_log
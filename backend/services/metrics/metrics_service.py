@@ -0,0 +1,374 @@
+# backend/services/metrics/metrics_service.py
+"""
+Request and per-stage metrics in the Prometheus text format.
+
+Counters and histograms are updated inline and cost a dictionary lookup,
+a bisect and a lock per observation.  Everything else (cache hit counts,
+pool gauges, queue depths) is read from the services' own stats when
+/metrics is scraped, so it costs nothing per request.
+
+stage_timer records exclusive time: a stage nested in another (decode
+inside preprocess, say) is subtracted from its parent, so a request's
+stages add up to at most its total time.  Stages are labelled with the
+route template of the request being served, or the route handed over by
+run_cpu_bound, or 'background'.
+
+Every sample carries a worker label (the process id).  Each worker
+writes a snapshot of its metrics to METRICS_DIR every
+METRICS_SNAPSHOT_SECONDS, and /metrics serves the answering worker's live
+values together with the other workers' snapshots, so one scrape covers
+the whole machine and each worker's counters stay monotonic for rate().
+Sum over the worker label to aggregate.
+"""
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from functools import wraps
+from contextlib import contextmanager
+from flask import g, request, has_request_context
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+STAGES = ('upload_save', 'decode', 'preprocess', 'processing', 'inference', 'visualization', 'encode', 'db')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_extra(labels):
+    """Labels added to every sample, pre-formatted for _format_labels."""
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in (labels or {}).items())
+
+
+def render_families(families):
+    """
+    Prometheus text for [(name, type, help, [sample lines]), ...]; families
+    with the same name (from different workers) are merged into one block.
+    """
+    merged = {}
+    for name, kind, help_text, samples in families:
+        merged.setdefault(name, (kind, help_text, []))[2].extend(samples)
+    lines = []
+    for name, (kind, help_text, samples) in merged.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+    return '\n'.join(lines) + '\n'
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def collect(self, extra=''):
+        with self._lock:
+            items = list(self._values.items())
+        samples = [f"{self.name}{_format_labels(self.labelnames, labelvalues, extra)} {_format_value(value)}"
+                   for labelvalues, value in items]
+        return self.name, 'counter', self.help, samples
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._le = [f'le="{_format_value(float(bound))}"' for bound in self.buckets] + ['le="+Inf"']
+        self._series = {}  # labelvalues -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def collect(self, extra=''):
+        with self._lock:
+            items = [(labelvalues, list(series)) for labelvalues, series in self._series.items()]
+        samples = []
+        for labelvalues, series in items:
+            cumulative = 0
+            for le, count in zip(self._le, series[:-1]):
+                cumulative += count
+                bucket_extra = f"{extra},{le}" if extra else le
+                samples.append(f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, bucket_extra)} "
+                               f"{cumulative}")
+            labels = _format_labels(self.labelnames, labelvalues, extra)
+            samples.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            samples.append(f"{self.name}_count{labels} {cumulative}")
+        return self.name, 'histogram', self.help, samples
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help_text, labelnames=()):
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn):
+        """
+        Register fn() returning [(name, type, help, [(labels dict, value), ...]), ...],
+        called at scrape and snapshot time.
+        """
+        self._collectors.append(fn)
+        return fn
+
+    def collect(self, labels=None):
+        """Every family as (name, type, help, [sample lines]), with `labels` added to each sample."""
+        extra = _format_extra(labels)
+        families = [metric.collect(extra) for metric in self._metrics]
+        for collect in self._collectors:
+            try:
+                collected = collect()
+            except Exception as e:
+                name = getattr(collect, '__name__', None) or getattr(collect, 'func', collect).__name__
+                logger.warning(f"Metrics collector {name} failed: {str(e)}")
+                continue
+            for name, kind, help_text, samples in collected:
+                families.append((name, kind, help_text, [
+                    f"{name}{_format_labels(sample_labels.keys(), sample_labels.values(), extra)} {_format_value(value)}"
+                    for sample_labels, value in samples if value is not None
+                ]))
+        return families
+
+    def render(self, labels=None):
+        return render_families(self.collect(labels))
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    'aidentify_http_requests_total', 'HTTP requests by route template and status.',
+    ('method', 'route', 'status'))
+http_latency = registry.histogram(
+    'aidentify_http_request_duration_seconds', 'Time to produce a response, by route template.',
+    ('method', 'route'))
+stage_latency = registry.histogram(
+    'aidentify_stage_duration_seconds', 'Exclusive time spent in each processing stage.',
+    ('route', 'stage'))
+model_batch_size = registry.histogram(
+    'aidentify_model_batch_size', 'Images per model prediction call.',
+    ('model',), BATCH_BUCKETS)
+
+_local = threading.local()
+
+
+def current_route():
+    """Route template of the request this thread is serving, or 'background'."""
+    route = getattr(_local, 'route', None)
+    if route is not None:
+        return route
+    if has_request_context():
+        return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    return 'background'
+
+
+@contextmanager
+def route_context(route):
+    """Attribute stages timed on this thread to `route` (for work handed to other threads)."""
+    previous = getattr(_local, 'route', None)
+    _local.route = route
+    try:
+        yield
+    finally:
+        _local.route = previous
+
+
+@contextmanager
+def stage_sink(sink):
+    """Also pass every stage timed on this thread to sink(stage, seconds) (used by the profiler)."""
+    previous = getattr(_local, 'sink', None)
+    _local.sink = sink
+    try:
+        yield
+    finally:
+        _local.sink = previous
+
+
+def _record(stage, seconds):
+    stage_latency.observe(seconds, current_route(), stage)
+    sink = getattr(_local, 'sink', None)
+    if sink is not None:
+        sink(stage, seconds)
+
+
+@contextmanager
+def stage_timer(stage):
+    """Time a processing stage, excluding time spent in stages nested inside it."""
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    frame = [0.0]  # time spent in nested stages
+    stack.append(frame)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stack.pop()
+        if stack:
+            stack[-1][0] += elapsed
+        _record(stage, elapsed - frame[0])
+
+
+def record_stage(stage, elapsed):
+    """Record a stage timed elsewhere (a driver callback, say) as if it ran under stage_timer."""
+    stack = getattr(_local, 'stack', None)
+    if stack:
+        stack[-1][0] += elapsed
+    _record(stage, elapsed)
+
+
+def timed_stage(stage):
+    """Decorator form of stage_timer."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def init_metrics(app):
+    """Count requests and time them per route template."""
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            http_latency.observe(time.perf_counter() - started, request.method, route)
+            http_requests.inc(request.method, route, str(response.status_code))
+        return response
+
+
+class WorkerMetrics:
+    """Shares a worker's metrics with the other workers on the machine through snapshot files."""
+
+    def __init__(self, registry, directory, interval):
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        # Snapshots of workers that stopped writing are dropped after this long
+        self.max_age = 3 * interval
+        self._stop = threading.Event()
+        self._thread = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, pid):
+        return os.path.join(self.directory, f"worker-{pid}.json")
+
+    def _families(self):
+        return self.registry.collect({'worker': os.getpid()})
+
+    def write(self):
+        """Write this worker's current metrics for the others to serve."""
+        path = self._path(os.getpid())
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'written_at': time.time(), 'families': self._families()}, f)
+        os.replace(tmp_path, path)
+
+    def remove(self):
+        """Withdraw this worker's snapshot (on exit)."""
+        self._stop.set()
+        try:
+            os.remove(self._path(os.getpid()))
+        except FileNotFoundError:
+            pass
+
+    def _loop(self):
+        while True:
+            try:
+                self.write()
+            except Exception as e:
+                logger.warning(f"Could not write metrics snapshot: {str(e)}")
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self):
+        """Write snapshots every `interval` seconds on a background daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='metrics-snapshot', daemon=True)
+        self._thread.start()
+
+    def render(self):
+        """This worker's live metrics plus every other live worker's latest snapshot."""
+        families = self._families()
+        own = os.path.basename(self._path(os.getpid()))
+        now = time.time()
+        for name in sorted(os.listdir(self.directory)):
+            if name == own or not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+                if now - snapshot['written_at'] > self.max_age:
+                    os.remove(path)  # the worker is gone
+                    continue
+            except (OSError, ValueError, KeyError):
+                continue
+            families.extend(snapshot['families'])
+        return render_families(families)
+
+
+# Initialize singleton for global use
+worker_metrics = None
+
+def get_worker_metrics(config=None):
+    """Get or initialize the worker metrics singleton."""
+    global worker_metrics
+    if worker_metrics is None:
+        if config is None:
+            from flask import current_app
+            config = current_app.config
+        worker_metrics = WorkerMetrics(registry, config['METRICS_DIR'], config['METRICS_SNAPSHOT_SECONDS'])
+    return worker_metrics
@@ -0,0 +1,304 @@
+# backend/services/metrics/request_profiler.py
+"""
+On-demand statistical profiling of single requests.
+
+A request is profiled when an admin sends ``X-Profile: 1`` or, for
+inference routes, when it is picked at PROFILE_SAMPLE_RATE.  While it
+runs, a sampler thread reads the stacks of the threads serving it every
+PROFILE_INTERVAL_MS (including CPU executor threads working on its
+behalf), and every stage timed by metrics_service is added to a per-stage
+summary.  When the response is ready the profile is saved to PROFILE_DIR
+as:
+
+- <id>.folded: one "frame;frame;frame count" line per distinct stack,
+  the input of flamegraph.pl, speedscope and similar viewers
+- <id>.json: request, duration, sample count and the stage summary
+
+Responses of profiled requests carry an X-Profile-Id header; profiles
+are listed and downloaded through /api/admin/profiles.  Requests that are
+not profiled only pay for the header lookup (and a random() call when
+sampling is on); no sampler runs.
+
+Under the gevent worker the request's own OS thread is shared with other
+greenlets, so its samples can include their stacks too; the CPU-bound
+work run_cpu_bound hands to executor threads is sampled exactly.
+"""
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import random
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt
+from services.http.admission import ROUTE_CLASSES
+from services.metrics.metrics_service import stage_sink, current_route
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile'
+
+PROFILE_ID_HEADER = 'X-Profile-Id'
+
+_PROFILE_ID = re.compile(r'^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$')
+
+# Stacks deeper than this are cut at the root end
+MAX_STACK_DEPTH = 128
+
+_BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_local = threading.local()
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    path = code.co_filename
+    if path.startswith(_BACKEND_ROOT):
+        path = os.path.relpath(path, _BACKEND_ROOT)
+    else:
+        path = os.path.basename(path)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+def _fold(frame):
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+def _native(module, name):
+    """The unpatched threading primitive: samples are keyed by OS thread, not greenlet."""
+    from services.concurrency.executors import cooperative
+    if cooperative():
+        from gevent import monkey
+        return monkey.get_original(module, name)
+    return getattr(sys.modules[module], name)
+
+
+class Profile:
+    def __init__(self, interval):
+        self.id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.interval = interval
+        self.started_at = time.time()
+        self.samples = Counter()
+        self.sample_count = 0
+        self.stages = {}  # stage -> {'seconds', 'calls'}
+        self._threads = set()
+        self._lock = _native('_thread', 'allocate_lock')()
+        self._stop = False
+
+    def add_thread(self, ident):
+        with self._lock:
+            self._threads.add(ident)
+
+    def remove_thread(self, ident):
+        with self._lock:
+            self._threads.discard(ident)
+
+    def record_stage(self, stage, seconds):
+        with self._lock:
+            entry = self.stages.setdefault(stage, {'seconds': 0.0, 'calls': 0})
+            entry['seconds'] += seconds
+            entry['calls'] += 1
+
+    def _sample_loop(self, sleep):
+        while not self._stop:
+            frames = sys._current_frames()
+            with self._lock:
+                threads = list(self._threads)
+            stacks = [_fold(frames[ident]) for ident in threads if ident in frames]
+            del frames
+            with self._lock:
+                self.samples.update(stacks)
+                self.sample_count += len(stacks)
+            sleep(self.interval)
+
+    def start(self):
+        _native('_thread', 'start_new_thread')(self._sample_loop, (_native('time', 'sleep'),))
+
+    def stop(self):
+        self._stop = True
+        self.duration = time.time() - self.started_at
+
+    def folded(self):
+        with self._lock:
+            samples = self.samples.most_common()
+        return ''.join(f"{stack} {count}\n" for stack, count in samples)
+
+    def summary(self, **details):
+        stages = {name: {'seconds': round(entry['seconds'], 4), 'calls': entry['calls']}
+                  for name, entry in sorted(self.stages.items(), key=lambda item: -item[1]['seconds'])}
+        timed = sum(entry['seconds'] for entry in self.stages.values())
+        return {
+            'id': self.id,
+            'started_at': self.started_at,
+            'duration': round(self.duration, 4),
+            'interval_ms': self.interval * 1000,
+            'samples': self.sample_count,
+            'stages': stages,
+            'untimed_seconds': round(max(0.0, self.duration - timed), 4),
+            **details
+        }
+
+
+@contextmanager
+def profiling(profile):
+    """Sample this thread and collect its stage timings into `profile` (no-op for None)."""
+    if profile is None:
+        yield
+        return
+    previous = getattr(_local, 'profile', None)
+    _local.profile = profile
+    ident = _native('_thread', 'get_ident')()
+    profile.add_thread(ident)
+    try:
+        with stage_sink(profile.record_stage):
+            yield
+    finally:
+        profile.remove_thread(ident)
+        _local.profile = previous
+
+
+def current_profile():
+    """The profile collecting this thread's work, or None."""
+    return getattr(_local, 'profile', None)
+
+
+class ProfileStore:
+    """Saved profiles in a directory shared by the machine's workers, newest `max_profiles` kept."""
+
+    def __init__(self, directory, max_profiles):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, profile_id, suffix):
+        return os.path.join(self.directory, profile_id + suffix)
+
+    def _write(self, path, content):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def save(self, profile, summary):
+        self._write(self._path(profile.id, '.folded'), profile.folded())
+        self._write(self._path(profile.id, '.json'), json.dumps(summary))
+        self._prune()
+
+    def _prune(self):
+        ids = self.list_ids()
+        for profile_id in ids[self.max_profiles:]:
+            for suffix in ('.json', '.folded'):
+                try:
+                    os.remove(self._path(profile_id, suffix))
+                except FileNotFoundError:
+                    pass
+
+    def list_ids(self):
+        """Profile ids, newest first."""
+        names = [name[:-5] for name in os.listdir(self.directory) if name.endswith('.json')]
+        return sorted((name for name in names if _PROFILE_ID.match(name)), reverse=True)
+
+    def summary(self, profile_id):
+        """The saved summary, or None for an unknown id."""
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        try:
+            with open(self._path(profile_id, '.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def folded(self, profile_id):
+        """The saved folded stacks, or None for an unknown id."""
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        try:
+            with open(self._path(profile_id, '.folded')) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+
+def _is_admin():
+    try:
+        verify_jwt_in_request(optional=True)
+    except Exception:
+        return False
+    return get_jwt().get('role') == 'admin'
+
+
+def init_profiler(app):
+    """Profile requests that ask for it (admins only) or are sampled."""
+    store = get_profile_store(app.config)
+    interval = app.config['PROFILE_INTERVAL_MS'] / 1000.0
+    sample_rate = app.config['PROFILE_SAMPLE_RATE']
+
+    @app.before_request
+    def start_profile():
+        if request.headers.get(PROFILE_HEADER):
+            if not _is_admin():
+                return None
+            reason = 'header'
+        elif sample_rate and ROUTE_CLASSES.get(request.blueprint) and random.random() < sample_rate:
+            reason = 'sampled'
+        else:
+            return None
+        profile = Profile(interval)
+        context = profiling(profile)
+        context.__enter__()
+        profile.start()
+        g.profile = (profile, context, reason)
+        return None
+
+    def finish_profile(status):
+        profile, context, reason = g.pop('profile')
+        profile.stop()
+        context.__exit__(None, None, None)
+        summary = profile.summary(
+            method=request.method,
+            path=request.path,
+            route=current_route(),
+            status=status,
+            reason=reason
+        )
+        try:
+            store.save(profile, summary)
+        except OSError as e:
+            logger.warning(f"Could not save profile {profile.id}: {str(e)}")
+        return profile
+
+    @app.after_request
+    def save_profile(response):
+        if 'profile' in g:
+            profile = finish_profile(response.status_code)
+            response.headers[PROFILE_ID_HEADER] = profile.id
+        return response
+
+    @app.teardown_request
+    def discard_profile(exc=None):
+        # after_request does not run when the view raised
+        if 'profile' in g:
+            finish_profile(500)
+
+
+# Initialize singleton for global use
+profile_store = None
+
+def get_profile_store(config=None):
+    """Get or initialize the profile store singleton."""
+    global profile_store
+    if profile_store is None:
+        if config is None:
+            from flask import current_app
+            config = current_app.config
+        profile_store = ProfileStore(config['PROFILE_DIR'], config['PROFILE_MAX_FILES'])
+    return profile_store
@@ -0,0 +1,161 @@
+# backend/services/metrics/service_metrics.py
+"""
+Scrape-time metrics read from the services' own counters.
+
+Cache, pool, queue and limiter state is already tracked by each service
+(the same numbers /health/ready reports), so it is turned into metric
+samples only when /metrics is scraped.  SQLAlchemy queries are timed as
+the 'db' stage through engine events, alongside the raw MySQL queries
+timed in database_service.
+"""
+import time
+import logging
+from functools import partial
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from services.metrics.metrics_service import registry, record_stage
+
+logger = logging.getLogger(__name__)
+
+_collectors_registered = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('metrics_started')
+    if started:
+        record_stage('db', time.perf_counter() - started.pop())
+
+
+def _handle_error(context):
+    started = context.connection.info.get('metrics_started') if context.connection is not None else None
+    if started:
+        record_stage('db', time.perf_counter() - started.pop())
+
+
+def _gauge(name, help_text, samples):
+    return (name, 'gauge', help_text, samples)
+
+
+def _counter(name, help_text, samples):
+    return (name, 'counter', help_text, samples)
+
+
+def _caches(app):
+    from services.image_processing.image_metadata_service import cache_info
+    from services.image_processing.pixel_cache import get_pixel_cache
+    from services.storage.storage_backend import get_storage
+
+    stats = {'image_metadata': cache_info(), 'storage': get_storage(app.config).describe()}
+    pixel_cache = get_pixel_cache(app.config)
+    if pixel_cache:
+        stats['pixel'] = pixel_cache.describe()
+    return [
+        _counter('aidentify_cache_hits_total', 'Cache lookups answered from the cache.',
+                 [({'cache': name}, info.get('hits')) for name, info in stats.items()]),
+        _counter('aidentify_cache_misses_total', 'Cache lookups that went to the source.',
+                 [({'cache': name}, info.get('misses')) for name, info in stats.items()])
+    ]
+
+
+def _database(app):
+    from database import db
+    from services.database.database_service import db_service
+
+    families = [
+        _counter('aidentify_db_queries_total', 'Raw MySQL statements by target.',
+                 [({'target': name}, value) for name, value in db_service.stats.items()]),
+        _gauge('aidentify_db_replica_healthy', 'Whether each read replica is in rotation.',
+               [({'replica': f"{replica.host}:{replica.port}"}, int(replica.healthy))
+                for replica in db_service.replicas]),
+        _gauge('aidentify_db_connections', 'MySQL pool connections to the primary by state.',
+               [({'state': state}, value) for state, value in db_service.pool_status().items()])
+    ]
+    pool = db.engine.pool
+    # QueuePool only; other pools (sqlite's) do not report sizes
+    if hasattr(pool, 'checkedout'):
+        families.append(_gauge('aidentify_db_pool_connections', 'SQLAlchemy pool connections by state.', [
+            ({'state': 'size'}, pool.size()),
+            ({'state': 'checked_out'}, pool.checkedout()),
+            ({'state': 'overflow'}, max(0, pool.overflow()))
+        ]))
+    return families
+
+
+def _queues(app):
+    from services.concurrency.executors import get_cpu_executor
+    from services.concurrency.single_flight import single_flight
+    from services.logs.processing_log_service import get_processing_log
+    from services.precompute.precompute_service import get_precompute_manager
+
+    executor = get_cpu_executor(app.config).report()
+    families = [
+        _gauge('aidentify_cpu_executor_busy', 'OS threads running CPU-bound work.', [({}, executor['busy'])]),
+        _gauge('aidentify_processing_log_pending', 'Processing log entries not yet written.',
+               [({}, get_processing_log(app.config).pending())]),
+        _counter('aidentify_single_flight_calls_total', 'Identical concurrent calls, executed or coalesced.',
+                 [({'outcome': name}, value) for name, value in single_flight.stats.items()])
+    ]
+    precompute = get_precompute_manager(app.config)
+    if precompute:
+        report = precompute.report()
+        families.append(_counter('aidentify_precompute_total', 'Speculative precompute outcomes.',
+                                 [({'outcome': name}, report[name]) for name in ('computed', 'dropped', 'failed')]))
+        # Read from shared storage: every worker reports the same values
+        families.append(_gauge('aidentify_precompute_results', 'Precomputed results of the last day, all workers.',
+                               [({'state': name}, report[name]) for name in ('used', 'wasted', 'unused_results')]))
+        families.append(_gauge('aidentify_precompute_queued', 'Images waiting for precompute.',
+                               [({}, report['queued'])]))
+    return families
+
+
+def _limits(app):
+    families = []
+    if app.config['ADMISSION_ENABLED']:
+        from services.http.admission import get_admission_limiters
+
+        reports = {name: limiter.report() for name, limiter in get_admission_limiters(app.config).items()}
+        families += [
+            _gauge('aidentify_admission_active', 'Requests holding an admission slot.',
+                   [({'class': name}, report['active']) for name, report in reports.items()]),
+            _gauge('aidentify_admission_waiting', 'Requests queued for an admission slot.',
+                   [({'class': name, 'priority': priority}, count)
+                    for name, report in reports.items() for priority, count in report['waiting'].items()]),
+            _counter('aidentify_admission_rejected_total', 'Requests turned away by admission control.',
+                     [({'class': name, 'reason': reason}, report[reason])
+                      for name, report in reports.items()
+                      for reason in ('rejected_queue_full', 'rejected_deadline', 'timed_out', 'shed')])
+        ]
+    if app.config['RATE_LIMIT_ENABLED']:
+        from services.http.rate_limit import get_rate_limiter
+
+        families.append(_counter('aidentify_rate_limit_decisions_total', 'Rate limit checks by outcome.',
+                                 [({'outcome': name}, value)
+                                  for name, value in get_rate_limiter(app.config).stats.items()]))
+    return families
+
+
+def _warmup(app):
+    from services.health.warmup import get_warmup
+
+    stages = get_warmup(app).report()['stages']
+    return [_gauge('aidentify_warmup_stage_done', 'Warm-up stages finished (or skipped) in this worker.',
+                   [({'stage': name}, int(stage['state'] in ('done', 'skipped')))
+                    for name, stage in stages.items()])]
+
+
+def init_service_metrics(app):
+    """Register the scrape-time collectors and time SQLAlchemy queries (once per process)."""
+    global _collectors_registered
+    if not _collectors_registered:
+        for collect in (_caches, _database, _queues, _limits, _warmup):
+            registry.collector(partial(collect, app))
+        _collectors_registered = True
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
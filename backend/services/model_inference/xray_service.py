@@ -1,23 +1,52 @@
+import os
+import io
+import logging
+import threading
 import numpy as np
-import tensorflow as tf
 from PIL import Image
-import io
+from services.metrics.metrics_service import stage_timer, model_batch_size
+
+logger = logging.getLogger(__name__)
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                          'models', 'MultiLabel.keras')
+
+# Loaded on first use (or by the warm-up thread), not at import time
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """Load the x-ray model once; concurrent callers wait for the same load."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                import tensorflow as tf
+                _model = tf.keras.models.load_model(MODEL_PATH)
+                logger.info(f"X-ray model loaded from {MODEL_PATH}")
+    return _model
 
-# Load the model once at startup
-model = tf.keras.models.load_model('models/MultiLabel.keras')
 
 def predict_xray(image_bytes):
     class_labels = ["caries", "ectopic", "decayed tooth", "healthy teeth"]  # Adjust order if needed
-    image = Image.open(io.BytesIO(image_bytes)).convert('RGB')  # Ensure 3 channels
-    image = image.resize((256, 256))  # Model expects 256x256
-    img_array = np.array(image) / 255.0
-    img_array = np.expand_dims(img_array, axis=0)  # Shape: (1, 256, 256, 3)
-    prediction = model.predict(img_array)
+    with stage_timer('decode'):
+        image = Image.open(io.BytesIO(image_bytes))
+        image.draft('RGB', (256, 256))  # JPEGs decode at a reduced scale when large enough
+        image = image.convert('RGB')  # Ensure 3 channels
+    with stage_timer('preprocess'):
+        image = image.resize((256, 256))  # Model expects 256x256
+        img_array = np.array(image) / 255.0
+        img_array = np.expand_dims(img_array, axis=0)  # Shape: (1, 256, 256, 3)
+    model = get_model()
+    with stage_timer('inference'):
+        model_batch_size.observe(len(img_array), 'xray')
+        prediction = model.predict(img_array)
     predicted_index = int(np.argmax(prediction))
     predicted_label = class_labels[predicted_index]
     confidence = float(np.max(prediction))
     return {
         "label": predicted_label,
         "confidence": confidence,
-        "raw": prediction.tolist()
+        "raw": prediction  # numpy arrays are serialized by the app's JSON provider
     }
\ No newline at end of file
@@ -0,0 +1,414 @@
+# backend/services/precompute/precompute_service.py
+"""
+Speculative precomputation of results for freshly uploaded images.
+
+When an image is uploaded, its thumbnail, classification and enhanced
+version are queued for a low-priority background worker, so they are
+usually in storage by the time a doctor asks for them.  The worker backs
+off while interactive requests are in flight or the machine is loaded,
+and results are stored under their normal derived keys, so any worker
+process can pick them up.
+
+Whether a precomputed result was used is tracked in shared storage too,
+since the worker that computed it is rarely the one that serves it: each
+result gets a marker under precompute/pending/, which the first lookup
+moves to precompute/used/ and the sweep moves to precompute/wasted/ once
+it is PRECOMPUTE_WASTE_AFTER_SECONDS old.  Each worker also counts the
+markers it writes, in hourly buckets, in its own small file under
+precompute/counts/, so the used and wasted counts cover the last day
+across all workers without listing the markers; the other stats count
+this worker's own work.  Health and metrics probes do not count as
+interactive requests, so being scraped does not keep the worker paused.
+"""
+import os
+import json
+import time
+import hashlib
+import queue
+import socket
+import logging
+import threading
+from contextlib import contextmanager
+from flask import g, request
+from services.storage.storage_backend import get_storage
+from services.concurrency.executors import run_cpu_bound, cooperative
+from services.http.admission import AdmissionRejected, get_admission_limiters
+from services.image_processing.image_io import derived_key
+from services.image_processing.image_metadata_service import digest_for_key
+
+logger = logging.getLogger(__name__)
+
+# Order matters: cheap results first so they are ready soonest
+PRECOMPUTE_KINDS = ('thumbnail', 'classification', 'enhanced')
+
+# Seconds to wait before re-checking whether the server is still busy
+BUSY_BACKOFF_SECONDS = 0.5
+
+# States of a precomputed result's marker in storage
+RESULT_STATES = ('pending', 'used', 'wasted')
+
+# Seconds between sweeps of pending markers for wasted results
+SWEEP_INTERVAL_SECONDS = 60
+
+# Result keys whose marker this process has already settled
+MAX_SETTLED_KEYS = 10000
+
+# Marker counts are kept per hour and summed over the last day
+COUNT_BUCKET_SECONDS = 3600
+COUNT_WINDOW_SECONDS = 24 * 3600
+
+# Seconds the summed counts of all workers are reused
+COUNTS_CACHE_SECONDS = 30
+
+# Blueprints of probes that are not interactive load
+PROBE_BLUEPRINTS = ('health', 'metrics')
+
+# Interactive requests currently being served by this process
+_active_requests = 0
+_active_lock = threading.Lock()
+
+
+def _request_started():
+    global _active_requests
+    if request.blueprint in PROBE_BLUEPRINTS:
+        return
+    with _active_lock:
+        _active_requests += 1
+    g.precompute_counted = True
+
+
+def _request_finished(exc=None):
+    global _active_requests
+    # Teardown also runs for requests an earlier hook short-circuited
+    if g.pop('precompute_counted', False):
+        with _active_lock:
+            _active_requests -= 1
+
+
+def active_requests():
+    return _active_requests
+
+
+def classification_key(image_key):
+    """Storage key of the cached classification result for an image."""
+    name = digest_for_key(image_key) or os.path.splitext(os.path.basename(image_key))[0]
+    return derived_key('classification_', f"{name}.json")
+
+
+def result_key(kind, image_key):
+    if kind == 'enhanced':
+        return derived_key('enhanced_', image_key)
+    if kind == 'thumbnail':
+        from services.image_processing.thumbnail_service import thumbnail_key
+        return thumbnail_key(image_key)
+    if kind == 'classification':
+        return classification_key(image_key)
+    raise ValueError(f"Unknown precompute kind: {kind}")
+
+
+def marker_key(state, key):
+    """Storage key of the marker recording a precomputed result's state."""
+    return f"precompute/{state}/{hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]}"
+
+
+class PrecomputeManager:
+    def __init__(self, model_path, queue_size=100, busy_requests=1, waste_after=3600, admission_limiters=None):
+        """
+        Args:
+            model_path: Classifier model used for speculative classification
+            queue_size: Pending uploads kept before new ones are dropped
+            busy_requests: In-flight requests at which the worker pauses
+            waste_after: Seconds after which an unused result counts as wasted
+            admission_limiters: Route class limiters whose inference slots
+                the worker shares, at background priority
+        """
+        self.model_path = model_path
+        self.admission_limiters = admission_limiters
+        self.busy_requests = busy_requests
+        self.waste_after = waste_after
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._settled = set()  # result keys known to have no pending marker
+        self._marked = {}  # bucket start -> markers this worker wrote, by state
+        self._counts = None
+        self._counted_at = 0.0
+        self._swept_at = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.stats = {
+            'scheduled': 0,
+            'dropped': 0,
+            'computed': 0,
+            'already_present': 0,
+            'failed': 0,
+            'busy_waits': 0
+        }
+
+    def schedule(self, image_key):
+        """Queue an uploaded image for precomputation (never blocks)."""
+        try:
+            self._queue.put_nowait(image_key)
+            self.stats['scheduled'] += 1
+        except queue.Full:
+            self.stats['dropped'] += 1
+            return False
+        self._ensure_worker()
+        return True
+
+    def _ensure_worker(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='precompute', daemon=True)
+            self._thread.start()
+
+    def _busy(self):
+        if active_requests() >= self.busy_requests:
+            return True
+        try:
+            return os.getloadavg()[0] >= (os.cpu_count() or 1)
+        except OSError:
+            return False
+
+    def _wait_until_idle(self):
+        while self._busy() and not self._stop.is_set():
+            self.stats['busy_waits'] += 1
+            self._stop.wait(BUSY_BACKOFF_SECONDS)
+
+    def _loop(self):
+        # Under gevent this is a greenlet on the worker's only thread, which must keep its priority
+        if not cooperative():
+            try:
+                # Linux applies niceness per thread, so only this thread is deprioritized
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+            except (AttributeError, OSError):
+                pass
+        while not self._stop.is_set():
+            self._sweep_wasted()
+            try:
+                image_key = self._queue.get(timeout=60)
+            except queue.Empty:
+                continue
+            for kind in PRECOMPUTE_KINDS:
+                # Yield between steps, not just between images
+                self._wait_until_idle()
+                if self._stop.is_set():
+                    return
+                self._run(kind, image_key)
+
+    def _run(self, kind, image_key):
+        key = result_key(kind, image_key)
+        storage = get_storage()
+        try:
+            if storage.exists(key):
+                self.stats['already_present'] += 1
+                return
+            # Take an inference slot behind every waiting request
+            with self._inference_slot():
+                # Under gevent this loop is a greenlet and must not hold the event loop
+                if kind == 'thumbnail':
+                    from services.image_processing.thumbnail_service import create_thumbnail
+                    produced = run_cpu_bound(create_thumbnail, image_key)
+                elif kind == 'enhanced':
+                    from services.image_processing.enhance_service import enhance_image
+                    produced = run_cpu_bound(enhance_image, image_key)
+                else:
+                    produced = run_cpu_bound(self._classify, image_key, key)
+        except Exception as e:
+            produced = None
+            logger.error(f"Precompute {kind} for {image_key} failed: {str(e)}")
+
+        if produced:
+            self.stats['computed'] += 1
+            try:
+                storage.write_bytes(marker_key('pending', key), key.encode('utf-8'))
+                self._count_marker('pending')
+            except Exception as e:
+                logger.warning(f"Could not record precomputed {kind} for {image_key}: {str(e)}")
+            with self._lock:
+                self._settled.discard(key)
+        else:
+            self.stats['failed'] += 1
+
+    @contextmanager
+    def _inference_slot(self):
+        limiter = self.admission_limiters.get('inference') if self.admission_limiters else None
+        if limiter is None:
+            yield
+            return
+        while True:
+            try:
+                limiter.acquire('background')
+                break
+            except AdmissionRejected as e:
+                # Shed for, or crowded out by, interactive requests
+                self.stats['busy_waits'] += 1
+                if self._stop.wait(e.retry_after):
+                    raise
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            limiter.release(time.monotonic() - started)
+
+    def _classify(self, image_key, key):
+        from services.detection.dental_classification_service import get_dental_classifier
+        results, error = get_dental_classifier(self.model_path).predict(image_key)
+        if error:
+            logger.warning(f"Speculative classification of {image_key} failed: {error}")
+            return None
+        get_storage().write_bytes(key, json.dumps(results).encode('utf-8'), background=True)
+        return key
+
+    def _move_marker(self, storage, key, marker, state):
+        storage.write_bytes(marker_key(state, key), key.encode('utf-8'))
+        storage.delete(marker)
+        self._count_marker(state)
+
+    def _count_marker(self, state):
+        """Add a written marker to this worker's counts file."""
+        now = time.time()
+        bucket = int(now // COUNT_BUCKET_SECONDS * COUNT_BUCKET_SECONDS)
+        with self._lock:
+            counts = self._marked.setdefault(bucket, dict.fromkeys(RESULT_STATES, 0))
+            counts[state] += 1
+            for old in [b for b in self._marked if b <= now - COUNT_WINDOW_SECONDS]:
+                del self._marked[old]
+            data = json.dumps({str(b): c for b, c in self._marked.items()}).encode('utf-8')
+        try:
+            get_storage().write_bytes(f"precompute/counts/{socket.gethostname()}-{os.getpid()}.json", data)
+        except Exception as e:
+            logger.warning(f"Could not update precompute counts: {str(e)}")
+
+    def _sweep_wasted(self):
+        """Mark results that went unused for waste_after as wasted (any worker may sweep)."""
+        now = time.time()
+        if now - self._swept_at < SWEEP_INTERVAL_SECONDS:
+            return
+        self._swept_at = now
+        storage = get_storage()
+        try:
+            for obj in list(storage.list('precompute/pending/')):
+                if obj.modified < now - self.waste_after:
+                    key = storage.read_bytes(obj.key).decode('utf-8')
+                    self._move_marker(storage, key, obj.key, 'wasted')
+        except FileNotFoundError:
+            pass  # another worker swept it first
+        except Exception as e:
+            logger.warning(f"Precompute sweep failed: {str(e)}")
+
+    def _mark_used(self, key):
+        with self._lock:
+            if key in self._settled:
+                return
+        storage = get_storage()
+        pending = marker_key('pending', key)
+        try:
+            if storage.exists(pending):
+                self._move_marker(storage, key, pending, 'used')
+        except Exception as e:
+            logger.warning(f"Could not record use of precomputed {key}: {str(e)}")
+            return
+        with self._lock:
+            if len(self._settled) >= MAX_SETTLED_KEYS:
+                self._settled.clear()
+            self._settled.add(key)
+
+    def result_counts(self):
+        """Precomputed results of the last day by marker state, across all workers."""
+        now = time.time()
+        if self._counts is not None and now - self._counted_at < COUNTS_CACHE_SECONDS:
+            return self._counts
+        totals = dict.fromkeys(RESULT_STATES, 0)
+        storage = get_storage()
+        try:
+            for obj in storage.list('precompute/counts/'):
+                try:
+                    buckets = json.loads(storage.read_bytes(obj.key))
+                except (FileNotFoundError, ValueError):
+                    continue  # dropped by retention or being rewritten
+                for bucket, counts in buckets.items():
+                    if float(bucket) > now - COUNT_WINDOW_SECONDS:
+                        for state in RESULT_STATES:
+                            totals[state] += counts.get(state, 0)
+        except Exception as e:
+            logger.warning(f"Could not read precompute counts: {str(e)}")
+            if self._counts is not None:
+                return self._counts
+        # Markers are counted as written, so settled ones are taken off the pending count
+        totals['pending'] = max(0, totals['pending'] - totals['used'] - totals['wasted'])
+        self._counts, self._counted_at = totals, now
+        return totals
+
+    def lookup(self, kind, image_key):
+        """
+        Return a stored result for an image if one exists.
+
+        Returns:
+            The result key (enhanced, thumbnail) or the decoded result dict
+            (classification), or None
+        """
+        key = result_key(kind, image_key)
+        storage = get_storage()
+        try:
+            if kind == 'classification':
+                result = json.loads(storage.read_bytes(key))
+            elif storage.exists(key):
+                result = key
+            else:
+                return None
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Could not read precomputed {kind} for {image_key}: {str(e)}")
+            return None
+        self._mark_used(key)
+        return result
+
+    def report(self):
+        counts = self.result_counts()
+        served = counts['used'] + counts['wasted']
+        return {
+            **self.stats,
+            'worker': os.getpid(),
+            'queued': self._queue.qsize(),
+            'used': counts['used'],
+            'wasted': counts['wasted'],
+            'unused_results': counts['pending'],
+            'hit_rate': round(counts['used'] / served, 3) if served else None,
+            'active_requests': active_requests()
+        }
+
+    def stop(self):
+        self._stop.set()
+
+
+def init_precompute(app):
+    """Track in-flight requests so the precompute worker can yield to them."""
+    app.before_request(_request_started)
+    app.teardown_request(_request_finished)
+
+
+# Initialize singleton for global use
+precompute_manager = None
+
+def get_precompute_manager(config=None):
+    """Get or initialize the precompute manager singleton (None when disabled)."""
+    global precompute_manager
+    if precompute_manager is None:
+        if config is None:
+            from flask import current_app
+            config = current_app.config
+        if not config['PRECOMPUTE_ENABLED']:
+            return None
+        precompute_manager = PrecomputeManager(
+            model_path=os.path.join(config.get('MODEL_DIR', 'models'), 'MultiLabel.keras'),
+            queue_size=config['PRECOMPUTE_QUEUE_SIZE'],
+            busy_requests=config['PRECOMPUTE_BUSY_REQUESTS'],
+            waste_after=config['PRECOMPUTE_WASTE_AFTER_SECONDS'],
+            admission_limiters=get_admission_limiters(config) if config['ADMISSION_ENABLED'] else None
+        )
+    return precompute_manager
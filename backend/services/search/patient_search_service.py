@@ -0,0 +1,431 @@
+# backend/services/search/patient_search_service.py
+"""
+In-memory typeahead index over patient names.
+
+Names are normalized (lowercase, accents stripped) and split into padded
+trigrams.  A query is scored against every patient sharing a trigram with
+it using the Dice coefficient, so small spelling mistakes still rank the
+right patient near the top.  Queries shorter than a trigram fall back to a
+sorted prefix list.  Posting lists are compact int arrays and scoring is
+vectorized with numpy, which keeps lookups in the low milliseconds for a
+few hundred thousand patients.
+
+The index is built by the warm-up (or on a background thread), never on
+the request path: until it is loaded, searches are answered with 503.
+"""
+import re
+import time
+import bisect
+import logging
+import threading
+import unicodedata
+from array import array
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Posting lists longer than this fraction of the index carry almost no
+# ranking signal (e.g. " an"), so they are skipped when rarer ones exist.
+COMMON_GRAM_FRACTION = 0.2
+
+# Rebuild the index once this fraction of documents has been replaced
+TOMBSTONE_REBUILD_FRACTION = 0.25
+
+# Seconds clients are asked to wait while the index is being built
+INDEX_LOADING_RETRY_SECONDS = 2
+
+
+def normalize_name(name):
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    if not name:
+        return ''
+    text = unicodedata.normalize('NFKD', str(name))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r'[^0-9a-z]+', ' ', text.lower())
+    return text.strip()
+
+
+def normalize_phone(phone):
+    """Keep only the digits of a phone number."""
+    return re.sub(r'\D+', '', str(phone)) if phone else ''
+
+
+def name_trigrams(normalized):
+    """Return the set of padded trigrams of a normalized name."""
+    grams = set()
+    for token in normalized.split():
+        padded = f"  {token} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+class PatientSearchIndex:
+    def __init__(self):
+        """Create an empty index."""
+        self._lock = threading.RLock()
+        self._reset()
+        self.loaded_at = None
+
+    def _reset(self):
+        self._postings = {}          # trigram -> array('i') of doc numbers
+        self._prefix = []            # sorted list of (token, doc number)
+        self._patient_ids = []       # doc number -> patient id
+        self._records = []           # doc number -> public patient dict
+        self._names = []             # doc number -> normalized name
+        self._phones = []            # doc number -> phone digits
+        self._birthdates = []        # doc number -> 'YYYY-MM-DD'
+        self._gram_counts = array('i')
+        self._alive = bytearray()
+        self._doc_by_patient = {}    # patient id -> live doc number
+        self._by_birthdate = {}      # 'YYYY-MM-DD' -> list of doc numbers
+        self._tombstones = 0
+
+    def __len__(self):
+        return len(self._doc_by_patient)
+
+    @property
+    def is_loaded(self):
+        return self.loaded_at is not None
+
+    def _add(self, patient, bulk=False):
+        """Append a document for a patient dict (caller holds the lock).
+
+        Bulk loads append prefix entries unsorted and sort once at the end.
+        """
+        patient_id = patient['id']
+        if patient_id in self._doc_by_patient:
+            self._remove(patient_id, bulk)
+
+        doc = len(self._patient_ids)
+        normalized = normalize_name(patient.get('name'))
+        grams = name_trigrams(normalized)
+        birthdate = patient.get('birthdate')
+
+        self._patient_ids.append(patient_id)
+        self._names.append(normalized)
+        self._phones.append(normalize_phone(patient.get('phone')))
+        self._birthdates.append(str(birthdate) if birthdate else '')
+        self._records.append({
+            'id': patient_id,
+            'name': patient.get('name'),
+            'birthdate': str(birthdate) if birthdate else None,
+            'phone': patient.get('phone'),
+            'email': patient.get('email')
+        })
+        self._gram_counts.append(len(grams))
+        self._alive.append(1)
+        self._doc_by_patient[patient_id] = doc
+        self._by_birthdate.setdefault(self._birthdates[doc], []).append(doc)
+
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is None:
+                posting = self._postings[gram] = array('i')
+            posting.append(doc)
+        for token in set(normalized.split()):
+            if bulk:
+                self._prefix.append((token, doc))
+            else:
+                bisect.insort(self._prefix, (token, doc))
+
+    def _remove(self, patient_id, bulk=False):
+        """Tombstone a patient's document and drop it from the prefix and birthdate lists.
+
+        Posting lists keep dead documents until compaction; scoring masks them out.
+        """
+        doc = self._doc_by_patient.pop(patient_id, None)
+        if doc is None:
+            return
+        self._alive[doc] = 0
+        self._tombstones += 1
+        self._by_birthdate[self._birthdates[doc]].remove(doc)
+        if not bulk:
+            for token in set(self._names[doc].split()):
+                i = bisect.bisect_left(self._prefix, (token, doc))
+                if i < len(self._prefix) and self._prefix[i] == (token, doc):
+                    del self._prefix[i]
+
+    def rebuild(self, patients):
+        """Replace the index contents with an iterable of patient dicts."""
+        with self._lock:
+            self._reset()
+            for patient in patients:
+                self._add(patient, bulk=True)
+            if self._tombstones:
+                # Patients listed twice leave prefix entries for their replaced documents
+                self._prefix = [entry for entry in self._prefix if self._alive[entry[1]]]
+            self._prefix.sort()
+            self.loaded_at = time.time()
+            logger.info(f"Patient search index built with {len(self)} patients")
+
+    def upsert(self, patient):
+        """Insert or replace a single patient."""
+        with self._lock:
+            self._add(patient)
+            self._compact_if_needed()
+
+    def remove(self, patient_id):
+        """Drop a patient from the index."""
+        with self._lock:
+            self._remove(patient_id)
+            self._compact_if_needed()
+
+    def _compact_if_needed(self):
+        if self._tombstones > TOMBSTONE_REBUILD_FRACTION * max(len(self._patient_ids), 1):
+            self._compact()
+
+    def _compact(self):
+        live = [self._records[doc] for doc in self._doc_by_patient.values()]
+        loaded_at = self.loaded_at
+        self.rebuild(live)
+        self.loaded_at = loaded_at
+
+    def _prefix_candidates(self, token, max_docs=5000):
+        """Doc numbers having a name token starting with the given prefix."""
+        start = bisect.bisect_left(self._prefix, (token, -1))
+        end = min(start + max_docs, len(self._prefix))
+        docs = []
+        for i in range(start, end):
+            indexed_token, doc = self._prefix[i]
+            if not indexed_token.startswith(token):
+                break
+            docs.append(doc)
+        return docs
+
+    def search(self, query, birthdate=None, phone=None, limit=10):
+        """
+        Ranked, typo-tolerant patient search.
+
+        Args:
+            query: Free text (partial) patient name
+            birthdate: Optional exact birthdate filter, 'YYYY-MM-DD'
+            phone: Optional phone filter; matches on trailing digits
+            limit: Maximum number of results
+
+        Returns:
+            List of patient dicts with a 'score' between 0 and 1
+        """
+        normalized = normalize_name(query)
+        tokens = normalized.split()
+        phone_digits = normalize_phone(phone)
+        birthdate = str(birthdate) if birthdate else None
+
+        with self._lock:
+            doc_count = len(self._patient_ids)
+            if doc_count == 0:
+                return []
+
+            if not tokens:
+                # Filter-only lookup
+                pool = self._by_birthdate.get(birthdate, []) if birthdate else self._doc_by_patient.values()
+                docs = []
+                for doc in pool:
+                    if self._alive[doc] and self._matches_filters(doc, birthdate, phone_digits):
+                        docs.append(doc)
+                        if len(docs) >= limit:
+                            break
+                return [dict(self._records[doc], score=1.0) for doc in docs]
+
+            query_grams = name_trigrams(normalized)
+            if len(normalized.replace(' ', '')) < 3:
+                # Too short for trigrams: plain prefix match on the last token
+                scored = {}
+                for doc in self._prefix_candidates(tokens[-1]):
+                    if self._alive[doc] and self._matches_filters(doc, birthdate, phone_digits):
+                        scored[doc] = 1.0 / (1 + len(self._names[doc]))
+            else:
+                scored = self._score_trigrams(query_grams, doc_count, birthdate, phone_digits)
+
+                # Reward names where a token starts with the last query token,
+                # which is what the user is still typing.
+                for doc in self._prefix_candidates(tokens[-1]):
+                    if doc in scored:
+                        scored[doc] += 0.2
+                for doc in list(scored):
+                    if self._names[doc] == normalized:
+                        scored[doc] += 0.3
+
+            ranked = sorted(scored.items(), key=lambda item: item[1], reverse=True)[:limit]
+            return [
+                dict(self._records[doc], score=round(min(score, 1.5) / 1.5, 4))
+                for doc, score in ranked
+            ]
+
+    def _matches_filters(self, doc, birthdate, phone_digits):
+        if birthdate and self._birthdates[doc] != birthdate:
+            return False
+        if phone_digits and not self._phones[doc].endswith(phone_digits):
+            return False
+        return True
+
+    def _score_trigrams(self, query_grams, doc_count, birthdate, phone_digits, max_candidates=200):
+        """Dice similarity for every doc sharing a trigram with the query."""
+        postings = [self._postings[g] for g in query_grams if g in self._postings]
+        if not postings:
+            return {}
+
+        postings.sort(key=len)
+        common_limit = COMMON_GRAM_FRACTION * doc_count
+        selective = [p for p in postings if len(p) <= common_limit]
+        if selective:
+            postings = selective
+
+        hits = np.concatenate([np.frombuffer(p, dtype=np.int32) for p in postings])
+        counts = np.bincount(hits, minlength=doc_count)
+        gram_counts = np.frombuffer(self._gram_counts, dtype=np.int32)
+        alive = np.frombuffer(self._alive, dtype=np.uint8)
+
+        candidates = np.nonzero((counts > 0) & (alive[:doc_count] == 1))[0]
+        if candidates.size == 0:
+            return {}
+
+        dice = 2.0 * counts[candidates] / (len(query_grams) + gram_counts[candidates])
+        order = np.argsort(-dice)
+
+        scored = {}
+        for position in order:
+            doc = int(candidates[position])
+            if not self._matches_filters(doc, birthdate, phone_digits):
+                continue
+            scored[doc] = float(dice[position])
+            if len(scored) >= max_candidates:
+                break
+        return scored
+
+
+# Initialize singleton for global use
+patient_index = None
+_index_lock = threading.Lock()
+_listeners_registered = False
+
+
+def _load_patients():
+    """Stream every patient row for an index build (needs app context)."""
+    from database import db
+    from models.patient_model import Patient
+
+    rows = db.session.query(
+        Patient.id, Patient.name, Patient.birthdate, Patient.phone, Patient.email
+    ).yield_per(5000)
+    for row in rows:
+        yield {
+            'id': row.id,
+            'name': row.name,
+            'birthdate': row.birthdate,
+            'phone': row.phone,
+            'email': row.email
+        }
+
+
+def get_patient_index():
+    """Get or build the patient search index singleton (blocks; used by the warm-up)."""
+    global patient_index
+    if patient_index is None or not patient_index.is_loaded:
+        with _index_lock:
+            if patient_index is None:
+                patient_index = PatientSearchIndex()
+            if not patient_index.is_loaded:
+                patient_index.rebuild(_load_patients())
+    return patient_index
+
+
+def _rebuild_in_background(app, name):
+    """Build a fresh index on a daemon thread and swap it in (caller holds _index_lock)."""
+    def rebuild():
+        try:
+            with app.app_context():
+                fresh = PatientSearchIndex()
+                fresh.rebuild(_load_patients())
+            global patient_index
+            patient_index = fresh
+        except Exception as e:
+            logger.error(f"Error building patient search index: {str(e)}")
+        finally:
+            _index_lock.release()
+
+    threading.Thread(target=rebuild, name=name, daemon=True).start()
+
+
+def loaded_patient_index(app):
+    """
+    Return the patient search index if it is loaded.
+
+    Otherwise start building it in the background, unless the warm-up or
+    another request already is, and return None.
+    """
+    index = patient_index
+    if index is not None and index.is_loaded:
+        return index
+    if _index_lock.acquire(blocking=False):
+        _rebuild_in_background(app, 'patient-index-build')
+    return None
+
+
+def refresh_patient_index_async(app, max_age_seconds):
+    """Rebuild the index in the background when it is older than max_age_seconds.
+
+    Patients written by other worker processes only reach this process's
+    index through these periodic rebuilds.
+    """
+    index = patient_index
+    if index is None or not index.is_loaded or time.time() - index.loaded_at < max_age_seconds:
+        return
+    if not _index_lock.acquire(blocking=False):
+        return  # a rebuild is already running
+    index.loaded_at = time.time()  # don't schedule twice while rebuilding
+    _rebuild_in_background(app, 'patient-index-refresh')
+
+
+def _patient_to_dict(patient):
+    return {
+        'id': patient.id,
+        'name': patient.name,
+        'birthdate': patient.birthdate,
+        'phone': patient.phone,
+        'email': patient.email
+    }
+
+
+def register_index_listeners(patient_model):
+    """
+    Keep the index in sync with ORM writes.
+
+    Changes are collected per session and applied only after the session
+    commits, so rolled back writes never reach the index.
+    """
+    global _listeners_registered
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session, object_session
+
+    if _listeners_registered:
+        return
+    _listeners_registered = True
+
+    def queue(target, op):
+        session = object_session(target)
+        if session is None:
+            return
+        session.info.setdefault('patient_index_pending', []).append(
+            (op, target.id, _patient_to_dict(target) if op == 'upsert' else None)
+        )
+
+    event.listen(patient_model, 'after_insert', lambda m, c, t: queue(t, 'upsert'))
+    event.listen(patient_model, 'after_update', lambda m, c, t: queue(t, 'upsert'))
+    event.listen(patient_model, 'after_delete', lambda m, c, t: queue(t, 'remove'))
+
+    @event.listens_for(Session, 'after_commit')
+    def apply_pending(session):
+        pending = session.info.pop('patient_index_pending', [])
+        index = patient_index
+        if not pending or index is None or not index.is_loaded:
+            return
+        for op, patient_id, data in pending:
+            if op == 'upsert':
+                index.upsert(data)
+            else:
+                index.remove(patient_id)
+
+    @event.listens_for(Session, 'after_rollback')
+    def drop_pending(session):
+        session.info.pop('patient_index_pending', None)
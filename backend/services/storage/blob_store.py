@@ -0,0 +1,239 @@
+# backend/services/storage/blob_store.py
+"""
+Content-addressed storage for uploaded images.
+
+Each unique file is stored once under the key blobs/<aa>/<bb>/<sha256><ext>
+of the configured storage backend, where the extension comes from the
+file's magic bytes so identical content always maps to the same key.
+Incoming data is hashed into a local temp file first and handed to the
+backend once its digest is known.  Logical uploads live in the ``uploads`` table and
+point at a row in ``blobs``, whose ref_count says how many uploads still
+use the file.  A blob file is only deleted once its count reaches zero.
+"""
+import os
+import hashlib
+import logging
+import tempfile
+from datetime import datetime
+from services.database.database_service import db_service
+from services.image_processing.image_probe import extension_for
+from services.image_processing.image_metadata_service import (
+    record_metadata, get_metadata, invalidate_image_counts
+)
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+class BlobStore:
+    def __init__(self, root, storage):
+        """
+        Args:
+            root: Local base directory for temp files (the app's UPLOAD_FOLDER)
+            storage: StorageBackend holding the blobs
+        """
+        self.root = root
+        self.storage = storage
+        self.tmp_dir = os.path.join(root, 'tmp')
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def blob_key(self, digest, ext):
+        """Sharded storage key of a blob."""
+        return f"blobs/{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+    def _stream_to_temp(self, stream, filename=None):
+        """Copy a stream to a temp file while hashing it."""
+        hasher = hashlib.sha256()
+        size = 0
+        ext = None
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if ext is None:
+                        ext = extension_for(chunk[:512], filename)
+                    hasher.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        return tmp_path, hasher.hexdigest(), size, ext or ''
+
+    def _add_reference(self, digest, ext, size, original_filename, uploaded_by):
+        """Record a logical upload and bump the blob's reference count."""
+        now = datetime.now()
+        with db_service.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO blobs (digest, ext, size, ref_count, created_at, last_referenced_at)
+                VALUES (%s, %s, %s, 1, %s, %s)
+                ON DUPLICATE KEY UPDATE ref_count = ref_count + 1, last_referenced_at = VALUES(last_referenced_at)
+            """, (digest, ext, size, now, now))
+            cursor.execute("""
+                INSERT INTO uploads (blob_digest, original_filename, uploaded_by, created_at)
+                VALUES (%s, %s, %s, %s)
+            """, (digest, original_filename, uploaded_by, now))
+            return cursor.lastrowid
+
+    def put_file(self, tmp_path, digest, size, ext, original_filename=None, uploaded_by=None):
+        """
+        Move an already hashed temp file into the store.
+
+        The reference is recorded before the file is placed, so a concurrent
+        garbage collection can never remove a blob that is being re-uploaded.
+        If either step fails the upload fails: the reference is withdrawn
+        (which deletes a blob nothing else uses) and the temp file is left
+        to the caller.
+
+        Returns:
+            Dict with upload_id, digest, key, size and whether the blob was new
+        """
+        # A blob without a reference would never be garbage collected
+        upload_id = self._add_reference(digest, ext, size, original_filename, uploaded_by)
+
+        key = self.blob_key(digest, ext)
+        try:
+            created = not self.storage.exists(key)
+            if created or get_metadata(digest) is None:
+                # Probed once per unique content, while the data is still local
+                record_metadata(tmp_path, digest)
+            if created:
+                self.storage.put_file(key, tmp_path, move=True)
+            else:
+                os.unlink(tmp_path)
+        except Exception:
+            try:
+                self.release(upload_id)
+            except Exception as e:
+                logger.error(f"Could not withdraw failed upload {upload_id} of blob {digest}: {e}")
+            raise
+        invalidate_image_counts()
+
+        return {
+            'upload_id': upload_id,
+            'digest': digest,
+            'key': key,
+            'size': size,
+            'created': created
+        }
+
+    def put_stream(self, stream, original_filename=None, uploaded_by=None):
+        """Hash a stream while writing it and store it once per unique content."""
+        tmp_path, digest, size, ext = self._stream_to_temp(stream, original_filename)
+        try:
+            return self.put_file(tmp_path, digest, size, ext, original_filename, uploaded_by)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def get_upload(self, upload_id):
+        """
+        Look up a logical upload.
+
+        Returns:
+            Dict with upload_id, uploaded_by, digest and key, or None
+        """
+        row = db_service.execute_single_query("""
+            SELECT u.id, u.uploaded_by, b.digest, b.ext
+            FROM uploads u JOIN blobs b ON b.digest = u.blob_digest
+            WHERE u.id = %s
+        """, (upload_id,))
+        if not row:
+            return None
+        return {
+            'upload_id': row['id'],
+            'uploaded_by': row['uploaded_by'],
+            'digest': row['digest'],
+            'key': self.blob_key(row['digest'], row['ext'])
+        }
+
+    def release(self, upload_id):
+        """
+        Delete a logical upload and drop its blob once nothing refers to it.
+
+        Returns:
+            True if the upload existed
+        """
+        with db_service.transaction() as cursor:
+            cursor.execute(
+                "SELECT blob_digest FROM uploads WHERE id = %s FOR UPDATE", (upload_id,)
+            )
+            row = cursor.fetchone()
+            if not row:
+                return False
+            cursor.execute("DELETE FROM uploads WHERE id = %s", (upload_id,))
+            cursor.execute(
+                "UPDATE blobs SET ref_count = ref_count - 1 WHERE digest = %s AND ref_count > 0",
+                (row['blob_digest'],)
+            )
+        invalidate_image_counts()
+        self.collect_garbage(digests=[row['blob_digest']])
+        return True
+
+    def expire(self, digest):
+        """
+        Remove a blob regardless of its reference count, together with the
+        upload records pointing at it (used by the retention policy).
+        """
+        with db_service.transaction() as cursor:
+            cursor.execute("SELECT ext FROM blobs WHERE digest = %s FOR UPDATE", (digest,))
+            row = cursor.fetchone()
+            cursor.execute("DELETE FROM uploads WHERE blob_digest = %s", (digest,))
+            cursor.execute("DELETE FROM blobs WHERE digest = %s", (digest,))
+            if row:
+                self.storage.delete(self.blob_key(digest, row['ext']))
+        invalidate_image_counts()
+        if not row:
+            # Blob without a row (stored by older versions when the
+            # bookkeeping failed): remove by key prefix
+            for obj in list(self.storage.list(self.blob_key(digest, ''))):
+                self.storage.delete(obj.key)
+
+    def collect_garbage(self, digests=None, limit=500):
+        """
+        Delete blobs whose reference count has dropped to zero.
+
+        Returns:
+            Number of blob files removed
+        """
+        removed = 0
+        with db_service.transaction() as cursor:
+            if digests:
+                placeholders = ', '.join(['%s'] * len(digests))
+                cursor.execute(
+                    f"SELECT digest, ext FROM blobs WHERE digest IN ({placeholders}) "
+                    "AND ref_count = 0 FOR UPDATE",
+                    tuple(digests)
+                )
+            else:
+                cursor.execute(
+                    "SELECT digest, ext FROM blobs WHERE ref_count = 0 LIMIT %s FOR UPDATE", (limit,)
+                )
+            orphans = cursor.fetchall()
+
+            # Rows stay locked until commit, so no upload can re-reference a
+            # blob between deleting its file and deleting its row.
+            for blob in orphans:
+                self.storage.delete(self.blob_key(blob['digest'], blob['ext']))
+                removed += 1
+                cursor.execute("DELETE FROM blobs WHERE digest = %s", (blob['digest'],))
+
+        if removed:
+            logger.info(f"Garbage collected {removed} unreferenced blobs")
+        return removed
+
+
+# Initialize singleton for global use
+blob_store = None
+
+def get_blob_store(root=None):
+    """Get or initialize the blob store singleton on the configured storage backend."""
+    global blob_store
+    if blob_store is None:
+        from services.storage.storage_backend import get_storage
+        blob_store = BlobStore(root, get_storage())
+    return blob_store
@@ -0,0 +1,305 @@
+# backend/services/storage/chunked_upload_service.py
+"""
+Resumable chunked uploads: init -> append chunks -> finalize.
+
+Session state is kept next to the partial file under tmp/chunked/, so any
+worker on the same machine can continue an interrupted transfer.  Chunks
+are streamed straight from the request body to disk and hashed as they
+arrive; the first chunk is checked for a known image signature and sane
+dimensions before anything else is accepted.
+"""
+import os
+import json
+import time
+import uuid
+import fcntl
+import hashlib
+import logging
+import threading
+from services.database.database_service import db_service
+from services.image_processing.image_probe import probe_image, FORMAT_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 1024 * 1024  # 1MB
+HEADER_PROBE_BYTES = 64 * 1024
+
+
+class UploadError(Exception):
+    def __init__(self, message, status_code=400, **details):
+        """An upload request that cannot be accepted."""
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.details = details
+
+
+def validate_image_header(header, max_dimension):
+    """
+    Check the leading bytes of an upload for a known image format and sane
+    dimensions.
+
+    Returns:
+        probe_image()'s dict for the header
+
+    Raises:
+        UploadError: The file is not an image we accept
+    """
+    info = probe_image(header)
+    if info is None:
+        raise UploadError('File is not a supported image', 415)
+    width, height = info['width'], info['height']
+    if width is not None and height is not None:
+        if width <= 0 or height <= 0:
+            raise UploadError('Image has invalid dimensions', 422)
+        if max(width, height) > max_dimension:
+            raise UploadError(f'Image dimensions exceed {max_dimension}px', 422)
+    return info
+
+
+class ChunkedUploadManager:
+    def __init__(self, root, blob_store, chunk_size, max_file_bytes, user_quota_bytes, max_dimension):
+        """
+        Args:
+            root: Upload folder; sessions live in <root>/tmp/chunked
+            blob_store: BlobStore that receives finished uploads
+            chunk_size: Suggested chunk size returned to clients
+            max_file_bytes: Largest accepted file
+            user_quota_bytes: Stored plus in-flight bytes allowed per user (0 disables)
+            max_dimension: Largest accepted width or height in pixels
+        """
+        self.session_dir = os.path.join(root, 'tmp', 'chunked')
+        os.makedirs(self.session_dir, exist_ok=True)
+        self.blob_store = blob_store
+        self.chunk_size = chunk_size
+        self.max_file_bytes = max_file_bytes
+        self.user_quota_bytes = user_quota_bytes
+        self.max_dimension = max_dimension
+        # Running hashes for sessions this process has seen; rebuilt from
+        # the partial file when another worker appended the previous chunk.
+        self._hashers = {}
+        self._hashers_lock = threading.Lock()
+
+    def _paths(self, upload_id):
+        if not all(c in '0123456789abcdef' for c in upload_id) or len(upload_id) != 32:
+            raise UploadError('Unknown upload', 404)
+        base = os.path.join(self.session_dir, upload_id)
+        return base + '.json', base + '.part'
+
+    def _load(self, upload_id, user_id):
+        meta_path, _ = self._paths(upload_id)
+        try:
+            with open(meta_path) as f:
+                session = json.load(f)
+        except FileNotFoundError:
+            raise UploadError('Unknown upload', 404)
+        if session['user_id'] != user_id:
+            raise UploadError('Unknown upload', 404)
+        return session
+
+    def _save(self, session):
+        meta_path, _ = self._paths(session['upload_id'])
+        tmp_path = meta_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(session, f)
+        os.replace(tmp_path, meta_path)
+
+    def _in_flight_bytes(self, user_id):
+        total = 0
+        for name in os.listdir(self.session_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.session_dir, name)) as f:
+                    session = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if session.get('user_id') == user_id:
+                total += session['size']
+        return total
+
+    def _stored_bytes(self, user_id):
+        result = db_service.execute_single_query("""
+            SELECT COALESCE(SUM(b.size), 0) AS used
+            FROM uploads u JOIN blobs b ON b.digest = u.blob_digest
+            WHERE u.uploaded_by = %s
+        """, (user_id,))
+        return int(result['used']) if result else 0
+
+    def init_upload(self, user_id, filename, size, sha256=None):
+        """Open a new upload session after size and quota checks."""
+        if not isinstance(size, int) or size <= 0:
+            raise UploadError('size must be a positive integer')
+        if size > self.max_file_bytes:
+            raise UploadError(f'File exceeds the {self.max_file_bytes} byte limit', 413)
+
+        if self.user_quota_bytes:
+            used = self._stored_bytes(user_id) + self._in_flight_bytes(user_id)
+            if used + size > self.user_quota_bytes:
+                raise UploadError(
+                    'Upload quota exceeded', 413,
+                    quota_bytes=self.user_quota_bytes, used_bytes=used
+                )
+
+        session = {
+            'upload_id': uuid.uuid4().hex,
+            'user_id': user_id,
+            'filename': filename,
+            'size': size,
+            'expected_sha256': sha256.lower() if sha256 else None,
+            'received': 0,
+            'image': None,
+            'created_at': time.time()
+        }
+        _, part_path = self._paths(session['upload_id'])
+        open(part_path, 'wb').close()
+        self._save(session)
+        with self._hashers_lock:
+            self._hashers[session['upload_id']] = (hashlib.sha256(), 0)
+        return self.status(session)
+
+    def status(self, session):
+        return {
+            'upload_id': session['upload_id'],
+            'filename': session['filename'],
+            'size': session['size'],
+            'offset': session['received'],
+            'chunk_size': self.chunk_size,
+            'image': session['image']
+        }
+
+    def get_status(self, upload_id, user_id):
+        return self.status(self._load(upload_id, user_id))
+
+    def _hasher_for(self, upload_id, part_path, received):
+        """Return a sha256 object covering exactly the bytes received so far."""
+        with self._hashers_lock:
+            hasher, hashed = self._hashers.get(upload_id, (None, -1))
+        if hasher is not None and hashed == received:
+            return hasher.copy()
+        hasher = hashlib.sha256()
+        with open(part_path, 'rb') as f:
+            remaining = received
+            while remaining:
+                block = f.read(min(READ_SIZE, remaining))
+                if not block:
+                    break
+                hasher.update(block)
+                remaining -= len(block)
+        return hasher
+
+    def _validate_header(self, session, header):
+        session['image'] = validate_image_header(header, self.max_dimension)
+
+    def append_chunk(self, upload_id, user_id, offset, stream):
+        """
+        Append one chunk read from a stream at the given offset.
+
+        A chunk whose offset does not match the bytes already received is
+        rejected with the current offset, so clients can resume exactly.
+        """
+        session = self._load(upload_id, user_id)
+        _, part_path = self._paths(upload_id)
+
+        with open(part_path, 'r+b') as part:
+            # Serialize appends to the same session across workers
+            fcntl.flock(part, fcntl.LOCK_EX)
+            session = self._load(upload_id, user_id)
+            if offset != session['received']:
+                raise UploadError('Offset mismatch', 409, offset=session['received'])
+
+            hasher = self._hasher_for(upload_id, part_path, session['received'])
+            part.seek(session['received'])
+            part.truncate()
+
+            received = session['received']
+            # The first chunk is buffered until there are enough bytes to probe
+            header = bytearray() if received == 0 else None
+            try:
+                while True:
+                    block = stream.read(READ_SIZE)
+                    if not block:
+                        break
+                    if received + len(block) > session['size']:
+                        raise UploadError('Chunk exceeds declared file size', 413)
+                    received += len(block)
+
+                    if header is not None:
+                        header += block
+                        if len(header) < HEADER_PROBE_BYTES and received < session['size']:
+                            continue
+                        self._validate_header(session, bytes(header[:HEADER_PROBE_BYTES]))
+                        block, header = bytes(header), None
+
+                    hasher.update(block)
+                    part.write(block)
+
+                if header:
+                    # First chunk was shorter than the probe window
+                    self._validate_header(session, bytes(header))
+                    hasher.update(header)
+                    part.write(header)
+            except UploadError as e:
+                part.truncate(session['received'])
+                if e.status_code in (415, 422):
+                    self.abort(upload_id, user_id)
+                raise
+
+            session['received'] = part.tell()
+            self._save(session)
+            with self._hashers_lock:
+                self._hashers[upload_id] = (hasher, session['received'])
+        return self.status(session)
+
+    def finalize(self, upload_id, user_id):
+        """Verify a complete upload and move it into the blob store."""
+        session = self._load(upload_id, user_id)
+        meta_path, part_path = self._paths(upload_id)
+        if session['received'] != session['size']:
+            raise UploadError('Upload incomplete', 409, offset=session['received'])
+
+        hasher = self._hasher_for(upload_id, part_path, session['received'])
+        digest = hasher.hexdigest()
+        if session['expected_sha256'] and session['expected_sha256'] != digest:
+            self.abort(upload_id, user_id)
+            raise UploadError('Checksum mismatch', 422)
+
+        ext = FORMAT_EXTENSIONS.get((session['image'] or {}).get('format'), '')
+        stored = self.blob_store.put_file(
+            part_path, digest, session['size'], ext, session['filename'], user_id
+        )
+        os.remove(meta_path)
+        with self._hashers_lock:
+            self._hashers.pop(upload_id, None)
+        stored['image'] = session['image']
+        return stored
+
+    def abort(self, upload_id, user_id):
+        """Discard an upload session and its partial data."""
+        self._load(upload_id, user_id)
+        for path in self._paths(upload_id):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        with self._hashers_lock:
+            self._hashers.pop(upload_id, None)
+
+
+# Initialize singleton for global use
+chunked_upload_manager = None
+
+def get_chunked_upload_manager(config=None):
+    """Get or initialize the chunked upload manager singleton from app config."""
+    global chunked_upload_manager
+    if chunked_upload_manager is None:
+        from services.storage.blob_store import get_blob_store
+        chunked_upload_manager = ChunkedUploadManager(
+            root=config['UPLOAD_FOLDER'],
+            blob_store=get_blob_store(config['UPLOAD_FOLDER']),
+            chunk_size=config['CHUNKED_UPLOAD_CHUNK_SIZE'],
+            max_file_bytes=config['CHUNKED_UPLOAD_MAX_BYTES'],
+            user_quota_bytes=config['UPLOAD_USER_QUOTA_BYTES'],
+            max_dimension=config['UPLOAD_MAX_IMAGE_DIMENSION']
+        )
+    return chunked_upload_manager
@@ -0,0 +1,298 @@
+# backend/services/storage/retention_service.py
+"""
+Background retention for uploads and their derived images.
+
+Files are classified as originals (blobs and legacy uploads), derivatives
+(enhanced_, colorized_, ... results) or stale temp files.  Each class has a
+maximum age, and when the folder is still over its size budget the least
+recently used derivatives are evicted first.  Originals are patient
+records: by default they are never expired and never evicted for the
+size budget; both must be enabled explicitly.
+"""
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from services.storage.storage_backend import LocalStorage
+from services.concurrency.executors import cooperative
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_PREFIXES = ('enhanced_', 'colorized_', 'cavities_', 'missing_teeth_', 'dental_analysis_',
+                       'thumb_', 'classification_')
+
+# Temp files from interrupted uploads, stored idempotent responses and
+# precompute markers are dropped after a day
+TEMP_MAX_AGE_SECONDS = 24 * 3600
+
+# How many deleted files a report lists individually
+REPORT_DETAIL_LIMIT = 200
+
+# Lock file that lets one worker process per machine run background passes
+LOCK_FILE = '.retention.lock'
+
+
+def classify_file(key):
+    """Return 'temp', 'derivative' or 'original' for a storage key."""
+    parts = key.split('/')
+    if parts[0] in ('tmp', 'idempotency', 'precompute') or key.endswith('.part'):
+        return 'temp'
+    if parts[-1].startswith(DERIVATIVE_PREFIXES):
+        return 'derivative'
+    return 'original'
+
+
+class RetentionManager:
+    def __init__(self, root, storage, max_total_bytes, original_max_age, derivative_max_age,
+                 interval=3600, blob_store=None, evict_originals=False):
+        """
+        Args:
+            root: Local upload folder whose tmp/ directory holds partial uploads
+            storage: StorageBackend holding originals and derivatives
+            max_total_bytes: Size budget for the whole folder (0 disables it)
+            original_max_age: Seconds an original is kept after last use (0 keeps forever)
+            derivative_max_age: Seconds a derivative is kept after last use (0 keeps forever)
+            interval: Seconds between background runs
+            blob_store: BlobStore used to expire originals and their upload records
+            evict_originals: Also evict originals, LRU, once no derivative is
+                left and the folder is still over max_total_bytes
+        """
+        self.root = root
+        self.tmp_dir = os.path.join(root, 'tmp')
+        self.storage = storage
+        self.max_total_bytes = max_total_bytes
+        self.max_age = {
+            'original': original_max_age,
+            'derivative': derivative_max_age,
+            'temp': TEMP_MAX_AGE_SECONDS
+        }
+        self.interval = interval
+        self.blob_store = blob_store
+        self.evict_originals = evict_originals
+        self._stop = threading.Event()
+        self._run_lock = threading.Lock()
+        self._thread = None
+        self.metrics = {
+            'runs_total': 0,
+            'files_deleted_total': 0,
+            'bytes_reclaimed_total': 0,
+            'errors_total': 0,
+            'last_run_at': None,
+            'last_run_seconds': None,
+            'last_report': None
+        }
+
+    def scan(self):
+        """List every stored object and local temp file with its size and last use time."""
+        entries = []
+        for obj in self.storage.list():
+            if obj.key.startswith('tmp/'):
+                continue  # local backend: temp files are listed below
+            entries.append({
+                'key': obj.key,
+                'size': obj.size,
+                'last_used': obj.last_used,
+                'class': classify_file(obj.key)
+            })
+
+        # Partial uploads always live on local disk, whatever the backend
+        temp_storage = LocalStorage(self.root)
+        for obj in temp_storage.list('tmp/'):
+            if obj.key == f'tmp/{LOCK_FILE}':
+                continue
+            entries.append({
+                'key': obj.key,
+                'path': temp_storage.path(obj.key),
+                'size': obj.size,
+                'last_used': obj.last_used,
+                'class': 'temp'
+            })
+        return entries
+
+    def plan(self, entries, now=None):
+        """
+        Decide which files to delete.
+
+        Returns:
+            List of (entry, reason) tuples
+        """
+        now = now or time.time()
+        doomed = []
+        kept = []
+        for entry in entries:
+            max_age = self.max_age[entry['class']]
+            if max_age and now - entry['last_used'] > max_age:
+                doomed.append((entry, 'max_age'))
+            else:
+                kept.append(entry)
+
+        total = sum(entry['size'] for entry in kept)
+        if self.max_total_bytes and total > self.max_total_bytes:
+            # LRU within each class, derivatives before originals
+            classes = ('temp', 'derivative', 'original') if self.evict_originals else ('temp', 'derivative')
+            for file_class in classes:
+                candidates = sorted(
+                    (entry for entry in kept if entry['class'] == file_class),
+                    key=lambda entry: entry['last_used']
+                )
+                for entry in candidates:
+                    if total <= self.max_total_bytes:
+                        break
+                    doomed.append((entry, 'size_budget'))
+                    total -= entry['size']
+                if total <= self.max_total_bytes:
+                    break
+        return doomed
+
+    def _delete(self, entry):
+        """Delete one file; blob originals go through the blob store."""
+        if entry['class'] == 'temp' and 'path' in entry:
+            os.remove(entry['path'])
+        elif entry['class'] == 'original' and self.blob_store and entry['key'].startswith('blobs/'):
+            digest = os.path.splitext(os.path.basename(entry['key']))[0]
+            self.blob_store.expire(digest)
+        else:
+            self.storage.delete(entry['key'])
+
+    def run_once(self, dry_run=False):
+        """
+        Apply the retention policies once.
+
+        Returns:
+            Report dict describing what was (or would be) deleted
+        """
+        with self._run_lock:
+            started = time.time()
+            entries = self.scan()
+            doomed = self.plan(entries, started)
+
+            deleted, reclaimed, errors = 0, 0, 0
+            details = []
+            for i, (entry, reason) in enumerate(doomed):
+                if not dry_run:
+                    try:
+                        self._delete(entry)
+                    except FileNotFoundError:
+                        continue
+                    except Exception as e:
+                        errors += 1
+                        logger.error(f"Retention could not delete {entry['key']}: {str(e)}")
+                        continue
+                    if i % 100 == 99:
+                        time.sleep(0)  # let request threads have the GIL
+                deleted += 1
+                reclaimed += entry['size']
+                if len(details) < REPORT_DETAIL_LIMIT:
+                    details.append({
+                        'path': entry['key'],
+                        'class': entry['class'],
+                        'bytes': entry['size'],
+                        'reason': reason
+                    })
+
+            scanned_bytes = sum(entry['size'] for entry in entries)
+            report = {
+                'dry_run': dry_run,
+                'scanned_files': len(entries),
+                'scanned_bytes': scanned_bytes,
+                'files_deleted': deleted,
+                'bytes_reclaimed': reclaimed,
+                'total_bytes_after': scanned_bytes - reclaimed,
+                'max_total_bytes': self.max_total_bytes,
+                'errors': errors,
+                'deleted': details,
+                'seconds': round(time.time() - started, 3)
+            }
+
+            if not dry_run:
+                self.metrics['runs_total'] += 1
+                self.metrics['files_deleted_total'] += deleted
+                self.metrics['bytes_reclaimed_total'] += reclaimed
+                self.metrics['errors_total'] += errors
+                self.metrics['last_run_at'] = started
+                self.metrics['last_run_seconds'] = report['seconds']
+                self.metrics['last_report'] = {k: v for k, v in report.items() if k != 'deleted'}
+                if deleted:
+                    logger.info(f"Retention removed {deleted} files ({reclaimed} bytes)")
+                over_budget = self.max_total_bytes and report['total_bytes_after'] > self.max_total_bytes
+                if over_budget and not self.evict_originals:
+                    logger.warning(f"Uploads use {report['total_bytes_after']} bytes, over the "
+                                   f"{self.max_total_bytes} byte budget; originals are not evicted")
+            return report
+
+    def _loop(self):
+        # Under gevent this is a greenlet on the worker's only thread, which must keep its priority
+        if not cooperative():
+            try:
+                # Linux applies niceness per thread, so only this thread is deprioritized
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+            except (AttributeError, OSError):
+                pass
+        while not self._stop.wait(self.interval):
+            try:
+                with self._process_lock() as acquired:
+                    # Another worker process is already running a pass
+                    if acquired:
+                        self.run_once()
+            except Exception as e:
+                self.metrics['errors_total'] += 1
+                logger.error(f"Retention run failed: {str(e)}")
+
+    @contextmanager
+    def _process_lock(self):
+        if fcntl is None:
+            yield True
+            return
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        with open(os.path.join(self.tmp_dir, LOCK_FILE), 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def start(self):
+        """Run retention periodically on a background daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='upload-retention', daemon=True)
+        self._thread.start()
+        logger.info(f"Upload retention started (every {self.interval}s)")
+
+    def stop(self):
+        self._stop.set()
+
+
+# Initialize singleton for global use
+retention_manager = None
+
+def get_retention_manager(config=None):
+    """Get or initialize the retention manager singleton from app config."""
+    global retention_manager
+    if retention_manager is None:
+        from services.storage.blob_store import get_blob_store
+        from services.storage.storage_backend import get_storage
+        day = 24 * 3600
+        retention_manager = RetentionManager(
+            root=config['UPLOAD_FOLDER'],
+            storage=get_storage(config),
+            max_total_bytes=config['RETENTION_MAX_TOTAL_BYTES'],
+            original_max_age=config['RETENTION_ORIGINAL_MAX_AGE_DAYS'] * day,
+            derivative_max_age=config['RETENTION_DERIVATIVE_MAX_AGE_DAYS'] * day,
+            interval=config['RETENTION_INTERVAL_SECONDS'],
+            blob_store=get_blob_store(config['UPLOAD_FOLDER']),
+            evict_originals=config['RETENTION_EVICT_ORIGINALS']
+        )
+    return retention_manager
@@ -0,0 +1,500 @@
+# backend/services/storage/storage_backend.py
+"""
+Storage backends for uploads and derived images.
+
+Everything that reads or writes image files goes through a backend and
+addresses files by key (a relative, '/'-separated path such as
+'blobs/ab/cd/<sha256>.png' or 'derived/ef/01/enhanced_<sha256>.png').
+
+    local  LocalStorage rooted at UPLOAD_FOLDER (default)
+    s3     S3Storage (any S3-compatible service, e.g. MinIO) wrapped in
+           CachedStorage, which adds a size-capped local read cache and
+           asynchronous write-behind for derived images
+"""
+import os
+import shutil
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# Failed background uploads are retried after this many seconds, doubling up to the maximum
+UPLOAD_RETRY_SECONDS = 1.0
+UPLOAD_RETRY_MAX_SECONDS = 60.0
+
+
+class StoredObject:
+    def __init__(self, key, size, modified, last_used=None):
+        """Listing entry for a stored file."""
+        self.key = key
+        self.size = size
+        self.modified = modified
+        self.last_used = last_used if last_used is not None else modified
+
+
+class StorageBackend:
+    """Interface shared by all storage drivers."""
+
+    def open_read(self, key):
+        """Return a readable binary file-like object (streaming)."""
+        raise NotImplementedError
+
+    def read_bytes(self, key):
+        with self.open_read(key) as f:
+            return f.read()
+
+    def write_stream(self, key, stream):
+        """Write everything read from a stream; returns the byte count."""
+        raise NotImplementedError
+
+    def write_bytes(self, key, data, background=False):
+        """Write bytes; background=True lets drivers defer the upload."""
+        raise NotImplementedError
+
+    def put_file(self, key, local_path, move=False):
+        """Store a local file under a key, optionally consuming it."""
+        raise NotImplementedError
+
+    def exists(self, key):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def stat(self, key):
+        """Return a StoredObject or None if the key does not exist."""
+        raise NotImplementedError
+
+    def list(self, prefix=''):
+        """Iterate StoredObjects whose key starts with prefix."""
+        raise NotImplementedError
+
+    @contextmanager
+    def local_path(self, key):
+        """Yield a local filesystem path holding the object's content."""
+        raise NotImplementedError
+        yield
+
+    def flush(self, timeout=None):
+        """Wait for pending background writes."""
+
+    def describe(self):
+        return {'driver': type(self).__name__}
+
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root):
+        """Files stored directly under a local directory."""
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, key):
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def key_for(self, path):
+        """Key of a path under the root (for code that still holds paths)."""
+        return os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, '/')
+
+    def open_read(self, key):
+        return open(self.path(key), 'rb')
+
+    def _atomic_write(self, key, write):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                size = write(out)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return size
+
+    def write_stream(self, key, stream):
+        def write(out):
+            size = 0
+            while True:
+                chunk = stream.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    return size
+                out.write(chunk)
+                size += len(chunk)
+        return self._atomic_write(key, write)
+
+    def write_bytes(self, key, data, background=False):
+        # Local disk writes are cheap enough to do inline
+        return self._atomic_write(key, lambda out: out.write(data))
+
+    def put_file(self, key, local_path, move=False):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if move:
+            os.replace(local_path, path)
+        else:
+            shutil.copyfile(local_path, path)
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def stat(self, key):
+        try:
+            st = os.stat(self.path(key))
+        except FileNotFoundError:
+            return None
+        return StoredObject(key, st.st_size, st.st_mtime, max(st.st_atime, st.st_mtime))
+
+    def list(self, prefix=''):
+        # Walk only the directory the prefix is in, not the whole tree
+        stack = [os.path.join(self.root, os.path.dirname(prefix))]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            continue
+                        key = self.key_for(entry.path)
+                        if not key.startswith(prefix):
+                            continue
+                        try:
+                            st = entry.stat(follow_symlinks=False)
+                        except FileNotFoundError:
+                            continue
+                        # atime is often disabled (noatime); mtime is the floor
+                        yield StoredObject(key, st.st_size, st.st_mtime, max(st.st_atime, st.st_mtime))
+            except FileNotFoundError:
+                continue
+
+    @contextmanager
+    def local_path(self, key):
+        yield self.path(key)
+
+    def describe(self):
+        return {'driver': 'local', 'root': self.root}
+
+
+class S3Storage(StorageBackend):
+    def __init__(self, bucket, prefix='', endpoint_url=None, region=None,
+                 access_key=None, secret_key=None):
+        """Objects in an S3-compatible bucket (AWS S3, MinIO, ...)."""
+        try:
+            import boto3
+            from botocore.exceptions import ClientError
+        except ImportError:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires boto3 (pip install boto3)")
+
+        self._client_error = ClientError
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        self.endpoint_url = endpoint_url
+        self.client = boto3.client(
+            's3',
+            endpoint_url=endpoint_url or None,
+            region_name=region or None,
+            aws_access_key_id=access_key or None,
+            aws_secret_access_key=secret_key or None
+        )
+
+    def _key(self, key):
+        return self.prefix + key
+
+    def _is_missing(self, error):
+        return error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound')
+
+    def open_read(self, key):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))['Body']
+        except self._client_error as e:
+            if self._is_missing(e):
+                raise FileNotFoundError(key)
+            raise
+
+    def write_stream(self, key, stream):
+        counter = _CountingReader(stream)
+        # upload_fileobj switches to multipart uploads for large streams
+        self.client.upload_fileobj(counter, self.bucket, self._key(key))
+        return counter.count
+
+    def write_bytes(self, key, data, background=False):
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data)
+        return len(data)
+
+    def put_file(self, key, local_path, move=False):
+        self.client.upload_file(local_path, self.bucket, self._key(key))
+        if move:
+            os.remove(local_path)
+
+    def exists(self, key):
+        return self.stat(key) is not None
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def stat(self, key):
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except self._client_error as e:
+            if self._is_missing(e):
+                return None
+            raise
+        return StoredObject(key, head['ContentLength'], head['LastModified'].timestamp())
+
+    def list(self, prefix=''):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            for item in page.get('Contents', []):
+                key = item['Key'][len(self.prefix):]
+                yield StoredObject(key, item['Size'], item['LastModified'].timestamp())
+
+    @contextmanager
+    def local_path(self, key):
+        suffix = os.path.splitext(key)[1]
+        fd, tmp_path = tempfile.mkstemp(suffix=suffix)
+        os.close(fd)
+        try:
+            try:
+                self.client.download_file(self.bucket, self._key(key), tmp_path)
+            except self._client_error as e:
+                if self._is_missing(e):
+                    raise FileNotFoundError(key)
+                raise
+            yield tmp_path
+        finally:
+            os.remove(tmp_path)
+
+    def describe(self):
+        return {'driver': 's3', 'bucket': self.bucket, 'prefix': self.prefix, 'endpoint_url': self.endpoint_url}
+
+
+class _CountingReader:
+    def __init__(self, stream):
+        self.stream = stream
+        self.count = 0
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.count += len(data)
+        return data
+
+
+class CachedStorage(StorageBackend):
+    def __init__(self, remote, cache_dir, max_cache_bytes, write_workers=2):
+        """
+        Local read cache and write-behind in front of a remote backend.
+
+        Args:
+            remote: Backend holding the authoritative copy
+            cache_dir: Local directory for cached objects
+            max_cache_bytes: Cache size cap; least recently used entries go first
+            write_workers: Threads uploading background writes
+        """
+        self.remote = remote
+        self.cache = LocalStorage(cache_dir)
+        self.max_cache_bytes = max_cache_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> size, oldest first
+        self._cache_bytes = 0
+        self._pending = {}              # key -> Future of a background upload
+        self._executor = ThreadPoolExecutor(max_workers=write_workers, thread_name_prefix='storage-write')
+        # Set by flush(): failed uploads get one more attempt instead of waiting to retry
+        self._closing = threading.Event()
+        self.stats = {'hits': 0, 'misses': 0, 'background_writes': 0, 'write_errors': 0}
+
+        # Adopt whatever a previous process left in the cache directory
+        for obj in sorted(self.cache.list(), key=lambda o: o.last_used):
+            self._entries[obj.key] = obj.size
+            self._cache_bytes += obj.size
+
+    def _touch(self, key, size=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                if size is not None:
+                    self._cache_bytes += size - self._entries[key]
+                    self._entries[key] = size
+            elif size is not None:
+                self._entries[key] = size
+                self._cache_bytes += size
+            evict = []
+            excess = self._cache_bytes - self.max_cache_bytes
+            for old_key, old_size in self._entries.items():
+                if excess <= 0:
+                    break
+                if old_key in self._pending or old_key == key:
+                    continue  # never drop data that is not uploaded yet
+                evict.append(old_key)
+                excess -= old_size
+            for old_key in evict:
+                self._cache_bytes -= self._entries.pop(old_key)
+        for old_key in evict:
+            self.cache.delete(old_key)
+
+    def _forget(self, key):
+        with self._lock:
+            size = self._entries.pop(key, None)
+            if size is not None:
+                self._cache_bytes -= size
+        self.cache.delete(key)
+
+    def _fill(self, key):
+        """Make sure a key is in the local cache; returns its local path."""
+        with self._lock:
+            cached = key in self._entries
+        if cached and self.cache.exists(key):
+            self.stats['hits'] += 1
+            self._touch(key)
+            return self.cache.path(key)
+
+        self.stats['misses'] += 1
+        with self.remote.open_read(key) as body:
+            size = self.cache.write_stream(key, body)
+        self._touch(key, size)
+        return self.cache.path(key)
+
+    def open_read(self, key):
+        return open(self._fill(key), 'rb')
+
+    def write_stream(self, key, stream):
+        size = self.cache.write_stream(key, stream)
+        self._touch(key, size)
+        self.remote.put_file(key, self.cache.path(key))
+        return size
+
+    def _upload(self, key):
+        """Upload a cached write, retrying until it lands; it stays pending (and cached) meanwhile."""
+        delay = UPLOAD_RETRY_SECONDS
+        try:
+            while True:
+                try:
+                    self.remote.put_file(key, self.cache.path(key))
+                    return
+                except Exception as e:
+                    self.stats['write_errors'] += 1
+                    if self._closing.is_set():
+                        logger.error(f"Background upload of {key} failed at shutdown; "
+                                     f"the only copy is {self.cache.path(key)}: {str(e)}")
+                        raise
+                    logger.warning(f"Background upload of {key} failed, retrying in {delay:.0f}s: {str(e)}")
+                    self._closing.wait(delay)
+                    delay = min(delay * 2, UPLOAD_RETRY_MAX_SECONDS)
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def write_bytes(self, key, data, background=False):
+        self.cache.write_bytes(key, data)
+        self._touch(key, len(data))
+        if background:
+            # Readers are served from the cache until the upload lands
+            with self._lock:
+                self._pending[key] = self._executor.submit(self._upload, key)
+            self.stats['background_writes'] += 1
+        else:
+            self.remote.put_file(key, self.cache.path(key))
+        return len(data)
+
+    def put_file(self, key, local_path, move=False):
+        self.remote.put_file(key, local_path, move=False)
+        self.cache.put_file(key, local_path, move=move)
+        self._touch(key, os.path.getsize(self.cache.path(key)))
+
+    def exists(self, key):
+        with self._lock:
+            if key in self._pending:
+                return True
+        return self.remote.exists(key)
+
+    def delete(self, key):
+        with self._lock:
+            pending = self._pending.get(key)
+        if pending:
+            pending.result()
+        self.remote.delete(key)
+        self._forget(key)
+
+    def stat(self, key):
+        return self.remote.stat(key)
+
+    def list(self, prefix=''):
+        return self.remote.list(prefix)
+
+    @contextmanager
+    def local_path(self, key):
+        yield self._fill(key)
+
+    def flush(self, timeout=None):
+        """Finish pending uploads at shutdown: ones waiting to retry are tried once more now."""
+        self._closing.set()
+        with self._lock:
+            pending = list(self._pending.values())
+        for future in pending:
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                pass
+
+    def describe(self):
+        info = self.remote.describe()
+        info.update({
+            'cache_dir': self.cache.root,
+            'cache_bytes': self._cache_bytes,
+            'cache_max_bytes': self.max_cache_bytes,
+            'cache_entries': len(self._entries),
+            'pending_writes': len(self._pending),
+            **self.stats
+        })
+        return info
+
+
+def create_storage(config):
+    """Build the backend selected by STORAGE_BACKEND."""
+    backend = config.get('STORAGE_BACKEND', 'local')
+    if backend == 'local':
+        return LocalStorage(config['UPLOAD_FOLDER'])
+    if backend == 's3':
+        remote = S3Storage(
+            bucket=config['S3_BUCKET'],
+            prefix=config.get('S3_PREFIX', ''),
+            endpoint_url=config.get('S3_ENDPOINT_URL'),
+            region=config.get('S3_REGION'),
+            access_key=config.get('S3_ACCESS_KEY_ID'),
+            secret_key=config.get('S3_SECRET_ACCESS_KEY')
+        )
+        return CachedStorage(remote, config['STORAGE_CACHE_DIR'], config['STORAGE_CACHE_MAX_BYTES'])
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+
+# Initialize singleton for global use
+storage = None
+_storage_lock = threading.Lock()
+
+def get_storage(config=None):
+    """Get or initialize the storage backend singleton (defaults to the app config)."""
+    global storage
+    if storage is None:
+        with _storage_lock:
+            if storage is None:
+                if config is None:
+                    from flask import current_app
+                    config = current_app.config
+                storage = create_storage(config)
+                logger.info(f"Storage backend: {storage.describe()}")
+    return storage
@@ -1,49 +1,44 @@
 # backend/services/utils.py
 import os
-import uuid
 import base64
-import time
 import logging
+from datetime import datetime, timedelta
 from werkzeug.utils import secure_filename
+from services.storage.blob_store import get_blob_store
+from services.storage.storage_backend import get_storage
+from services.logs.processing_log_service import get_processing_log
+from services.metrics.metrics_service import timed_stage
 
 logger = logging.getLogger(__name__)
 
-# Mock image processing log
-image_logs = []
-
-def save_uploaded_file(file, upload_folder):
-    """Save uploaded file and return the filepath"""
+@timed_stage('upload_save')
+def save_uploaded_file(file, upload_folder, user_id=None):
+    """Save uploaded file into the content-addressed store and return its storage key"""
     if file.filename == '':
         return None
     
     filename = secure_filename(file.filename)
-    unique_filename = f"{uuid.uuid4()}_{filename}"
-    filepath = os.path.join(upload_folder, unique_filename)
-    file.save(filepath)
-    return filepath
+    stored = get_blob_store(upload_folder).put_stream(file.stream, filename, user_id)
+    return stored['key']
 
-def image_to_base64(image_path):
-    """Convert image to base64 string"""
+@timed_stage('encode')
+def image_to_base64(image_key):
+    """Convert a stored image to base64 string"""
     try:
-        with open(image_path, "rb") as img_file:
-            return base64.b64encode(img_file.read()).decode('utf-8')
+        return base64.b64encode(get_storage().read_bytes(image_key)).decode('utf-8')
     except Exception as e:
         logger.error(f"Error converting image to base64: {str(e)}")
         return None
 
 def log_processing(user_id, action, image_path, result_path=None):
     """Log image processing action"""
-    log_entry = {
-        'id': len(image_logs) + 1,
-        'user_id': user_id,
-        'action': action,
-        'timestamp': time.time(),
-        'image_path': image_path,
-        'result_path': result_path
-    }
-    image_logs.append(log_entry)
-    return log_entry
+    return get_processing_log().record(user_id, action, image_path, result_path)
 
-def get_image_logs():
-    """Get all image processing logs"""
-    return image_logs
\ No newline at end of file
+def parse_date(value, end_of_day=False):
+    """Parse YYYY-MM-DD (or full ISO datetime); date-only upper bounds include the whole day."""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
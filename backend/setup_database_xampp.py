@@ -189,6 +189,30 @@ def verify_users():
         print(f"✗ Error verifying users: {e}")
         return False
 
+def apply_schema():
+    """Apply pending schema migrations and check query plans."""
+    try:
+        from services.database.database_service import db_service
+        from services.database.schema import apply_migrations, get_schema_version, check_query_plans
+        
+        applied = apply_migrations(db_service)
+        if applied:
+            print(f"✓ Applied migrations: {applied}")
+        print(f"✓ Schema version: {get_schema_version(db_service)}")
+        
+        problems = check_query_plans(db_service)
+        for problem in problems:
+            print(f"  ! Query plan problem: {problem}")
+        if problems:
+            print(f"✗ {len(problems)} query plan problem(s); add the missing index in a migration")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Error applying schema: {e}")
+        return False
+
 def main():
     """Main setup function."""
     print("=" * 60)
@@ -223,14 +247,20 @@ def main():
         print("3. Verify XAMPP is using default port 3306")
         sys.exit(1)
     
-    # Step 2: Create initial users
-    print("\nStep 2: Creating initial users...")
+    # Step 2: Apply schema migrations (tables and indexes)
+    print("\nStep 2: Applying schema migrations...")
+    if not apply_schema():
+        print("✗ Schema migration or query plan check failed")
+        sys.exit(1)
+    
+    # Step 3: Create initial users
+    print("\nStep 3: Creating initial users...")
     if not create_initial_users():
         print("✗ User creation failed")
         sys.exit(1)
     
-    # Step 3: Verify users
-    print("\nStep 3: Verifying users...")
+    # Step 4: Verify users
+    print("\nStep 4: Verifying users...")
     if not verify_users():
         print("✗ User verification failed")
         sys.exit(1)
@@ -0,0 +1,52 @@
+# backend/tests/test_admin_routes.py
+"""Validation of the bulk user status update body."""
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+from routes import admin_routes
+from routes.admin_routes import admin_bp
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(admin_routes, 'check_permission', lambda identity, roles: True)
+    updated = []
+    monkeypatch.setattr(admin_routes.User, 'bulk_update_status',
+                        lambda changes, admin: updated.extend(changes) or {user_id: 'updated' for user_id, _ in changes})
+
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key-that-is-long-enough'
+    JWTManager(app)
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    with app.app_context():
+        token = create_access_token(identity='admin@aidentify.com')
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f"Bearer {token}"
+    client.updated = updated
+    return client
+
+
+@pytest.mark.parametrize('body', [
+    [1, 2, 3],
+    "approved",
+    {'updates': [1, 2]},
+    {'updates': {'id': 1, 'status': 'approved'}},
+    {'updates': [{'id': True, 'status': 'approved'}]},
+    {'user_ids': 5, 'status': 'approved'},
+    {'user_ids': [False], 'status': 'approved'},
+    {'user_ids': ['1'], 'status': 'approved'},
+    {'user_ids': [1], 'status': 'deleted'},
+    {'user_ids': []},
+])
+def test_malformed_bodies_are_rejected(client, body):
+    response = client.put('/api/admin/users/status', json=body)
+    assert response.status_code == 400
+    assert client.updated == []
+
+
+def test_valid_updates_are_applied(client):
+    response = client.put('/api/admin/users/status', json={'updates': [
+        {'id': 1, 'status': 'approved'}, {'id': 2, 'status': 'declined'}]})
+    assert response.status_code == 200
+    assert client.updated == [(1, 'approved'), (2, 'declined')]
@@ -0,0 +1,67 @@
+# backend/tests/test_admission.py
+"""Requests without a valid JWT are refused before they reach a rate limit bucket or an inference slot."""
+import pytest
+from flask import Flask, Blueprint, jsonify
+from flask_jwt_extended import JWTManager, jwt_required, create_access_token
+
+from services.http import admission, rate_limit
+from services.http.admission import init_admission
+from services.http.rate_limit import init_rate_limit
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(admission, 'admission_limiters', None)
+    monkeypatch.setattr(rate_limit, 'rate_limiter', None)
+
+    app = Flask(__name__)
+    app.config.update(
+        JWT_SECRET_KEY='test-secret-key-that-is-long-enough',
+        ADMISSION_INFERENCE_CONCURRENCY=1,
+        ADMISSION_INFERENCE_QUEUE_SIZE=1,
+        ADMISSION_INFERENCE_MAX_WAIT_SECONDS=1,
+        RATE_LIMIT_BACKEND='memory',
+        RATE_LIMITS='',
+    )
+    JWTManager(app)
+
+    # Same blueprint name as the real detection routes, so it is classified as inference
+    detect_bp = Blueprint('detect', __name__)
+
+    @detect_bp.route('/xray', methods=['POST'])
+    @jwt_required()
+    def xray():
+        return jsonify({'result': 'ok'})
+
+    app.register_blueprint(detect_bp, url_prefix='/api/detect')
+    init_rate_limit(app)
+    init_admission(app)
+    return app
+
+
+def limiter_stats():
+    report = admission.get_admission_limiters()['inference'].report()
+    return report['admitted'], report['active']
+
+
+def test_request_without_token_is_refused_before_admission(app):
+    response = app.test_client().post('/api/detect/xray')
+    assert response.status_code == 401
+    assert limiter_stats() == (0, 0)
+    assert rate_limit.get_rate_limiter().store.describe()['buckets'] == 0
+
+
+def test_request_with_garbage_token_is_refused_before_admission(app):
+    response = app.test_client().post('/api/detect/xray', headers={'Authorization': 'Bearer not-a-jwt'})
+    assert response.status_code in (401, 422)
+    assert limiter_stats() == (0, 0)
+    assert rate_limit.get_rate_limiter().store.describe()['buckets'] == 0
+
+
+def test_authenticated_request_is_admitted_and_limited(app):
+    with app.app_context():
+        token = create_access_token(identity='doctor@aidentify.com', additional_claims={'role': 'doctor'})
+    response = app.test_client().post('/api/detect/xray', headers={'Authorization': f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.headers['X-RateLimit-Limit'] == '10'
+    assert limiter_stats() == (1, 0)
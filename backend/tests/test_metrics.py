@@ -0,0 +1,129 @@
+# backend/tests/test_metrics.py
+"""Worker aggregation and access control of /metrics, and the instrumentation overhead gate."""
+import os
+import sys
+import json
+import time
+import subprocess
+import pytest
+from flask import Flask
+
+from services.metrics import metrics_service
+from services.metrics.metrics_service import MetricsRegistry, WorkerMetrics
+from routes.metrics_routes import metrics_bp
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def registry():
+    registry = MetricsRegistry()
+    registry.counter('test_requests_total', 'Requests.', ('route',)).inc('/a', amount=3)
+    return registry
+
+
+def write_snapshot(directory, pid, families, written_at=None):
+    with open(os.path.join(directory, f"worker-{pid}.json"), 'w') as f:
+        json.dump({'written_at': written_at or time.time(), 'families': families}, f)
+
+
+def test_samples_carry_worker_label(registry, tmp_path):
+    text = WorkerMetrics(registry, str(tmp_path), 10).render()
+    assert f'test_requests_total{{route="/a",worker="{os.getpid()}"}} 3' in text
+
+
+def test_render_merges_other_workers_snapshots(registry, tmp_path):
+    other = MetricsRegistry()
+    other.counter('test_requests_total', 'Requests.', ('route',)).inc('/a', amount=5)
+    write_snapshot(str(tmp_path), 1, other.collect({'worker': 1}))
+
+    text = WorkerMetrics(registry, str(tmp_path), 10).render()
+    assert text.count('# TYPE test_requests_total counter') == 1
+    assert 'test_requests_total{route="/a",worker="1"} 5' in text
+    assert f'test_requests_total{{route="/a",worker="{os.getpid()}"}} 3' in text
+
+
+def test_stale_snapshots_are_dropped(registry, tmp_path):
+    write_snapshot(str(tmp_path), 1, MetricsRegistry().collect({'worker': 1}), written_at=time.time() - 60)
+    WorkerMetrics(registry, str(tmp_path), 10).render()
+    assert not os.path.exists(os.path.join(str(tmp_path), 'worker-1.json'))
+
+
+def test_write_and_remove_own_snapshot(registry, tmp_path):
+    worker = WorkerMetrics(registry, str(tmp_path), 10)
+    worker.write()
+    path = os.path.join(str(tmp_path), f"worker-{os.getpid()}.json")
+    with open(path) as f:
+        assert json.load(f)['families'][0][0] == 'test_requests_total'
+    worker.remove()
+    assert not os.path.exists(path)
+
+
+@pytest.fixture
+def make_client(registry, tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics_service, 'worker_metrics', WorkerMetrics(registry, str(tmp_path), 10))
+
+    def make_client(token='', port=9091):
+        app = Flask(__name__)
+        app.config.update(METRICS_TOKEN=token, METRICS_PORT=port)
+        app.register_blueprint(metrics_bp)
+        return app.test_client()
+    return make_client
+
+
+def test_metrics_port_needs_no_token(make_client):
+    response = make_client().get('/metrics', base_url='http://localhost:9091')
+    assert response.status_code == 200
+    assert b'test_requests_total' in response.data
+
+
+def test_public_port_without_token_is_not_found(make_client):
+    response = make_client().get('/metrics', base_url='http://localhost:8080')
+    assert response.status_code == 404
+
+
+def test_public_port_checks_token(make_client):
+    client = make_client(token='secret')
+    assert client.get('/metrics', base_url='http://localhost:8080').status_code == 401
+    assert client.get('/metrics', base_url='http://localhost:8080',
+                      headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get('/metrics', base_url='http://localhost:8080',
+                      headers={'Authorization': 'Bearer secret'}).status_code == 200
+
+
+def test_port_zero_disables_the_private_port(make_client):
+    response = make_client(port=0).get('/metrics', base_url='http://localhost:9091')
+    assert response.status_code == 404
+
+
+def test_instrumentation_overhead_within_budget():
+    proc = subprocess.run([sys.executable, '-m', 'benchmarks.metrics_overhead_bench',
+                           '--kinds', 'periapical', '--repeat', '5'],
+                          cwd=BACKEND_DIR, capture_output=True, text=True, timeout=300)
+    assert proc.returncode == 0, proc.stdout[-2000:] + proc.stderr[-2000:]
+    assert 'OVER BUDGET' not in proc.stdout
+
+
+def test_request_latency_covers_compression(monkeypatch):
+    from services.http import compression
+
+    real_compress = compression.compress
+
+    def slow_compress(*args, **kwargs):
+        time.sleep(0.05)
+        return real_compress(*args, **kwargs)
+
+    monkeypatch.setattr(compression, 'compress', slow_compress)
+    app = Flask(__name__)
+    app.config.update(COMPRESSION_MIN_SIZE=500, COMPRESSION_GZIP_LEVEL=6, COMPRESSION_BROTLI_QUALITY=4)
+    # Same order as create_app: metrics, then compression
+    metrics_service.init_metrics(app)
+    compression.init_compression(app)
+
+    @app.route('/test/compressed')
+    def compressed():
+        return {'text': 'x' * 5000}
+
+    response = app.test_client().get('/test/compressed', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert metrics_service.http_latency._series[('GET', '/test/compressed')][-1] >= 0.05
@@ -0,0 +1,131 @@
+# backend/tests/test_patient_search.py
+"""Typo tolerance, ranking and incremental updates of the patient search index."""
+import threading
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+from services.search import patient_search_service
+from services.search.patient_search_service import PatientSearchIndex
+
+PATIENTS = [
+    {'id': 1, 'name': 'Maria Gonzalez', 'birthdate': '1980-04-02', 'phone': '+1 555 0100'},
+    {'id': 2, 'name': 'Mario Gonzales', 'birthdate': '1975-11-30', 'phone': '+1 555 0101'},
+    {'id': 3, 'name': 'Marianne Gold', 'birthdate': '1980-04-02', 'phone': '+1 555 0102'},
+    {'id': 4, 'name': 'José Álvarez', 'birthdate': '1990-01-15', 'phone': '+1 555 0103'},
+    {'id': 5, 'name': 'Peter Smith', 'birthdate': '1962-07-08', 'phone': '+1 555 0104'},
+]
+
+# Unrelated patients, so the names above are not the common trigrams of the index
+OTHERS = [
+    {'id': 100 + i, 'name': f"{first} {last}", 'birthdate': '2000-01-01', 'phone': None}
+    for i, (first, last) in enumerate(
+        (first, last) for first in ('Anna', 'Bert', 'Chen', 'Dirk', 'Elif', 'Femi')
+        for last in ('Kowalski', 'Nakamura', 'Okafor', 'Ruiz', 'Quist'))
+]
+
+
+@pytest.fixture
+def index():
+    index = PatientSearchIndex()
+    index.rebuild(PATIENTS + OTHERS)
+    return index
+
+
+def ids(results):
+    return [result['id'] for result in results]
+
+
+def test_typos_still_find_the_patient(index):
+    assert ids(index.search('Maria Gonzalez'))[0] == 1
+    assert ids(index.search('Mraia Gonzalez'))[0] == 1
+    assert ids(index.search('peter smiht'))[0] == 5
+    assert ids(index.search('jose alvarez'))[0] == 4  # accents are ignored
+
+
+def test_exact_and_prefix_matches_rank_first(index):
+    results = index.search('Maria Gonzalez')
+    assert ids(results)[:2] == [1, 2]
+    assert results[0]['score'] > results[1]['score']
+    # The last token is what is still being typed
+    assert ids(index.search('mario gonz'))[0] == 2
+
+
+def test_short_queries_use_prefixes(index):
+    assert set(ids(index.search('ma'))) == {1, 2, 3}
+
+
+def test_filters(index):
+    assert set(ids(index.search('mari', birthdate='1980-04-02'))) == {1, 3}
+    assert ids(index.search('', phone='0104')) == [5]
+    assert set(ids(index.search('', birthdate='1980-04-02'))) == {1, 3}
+
+
+def test_upsert_replaces_the_patient(index):
+    index.upsert({'id': 5, 'name': 'Petra Schmidt', 'birthdate': '1962-07-09'})
+    results = index.search('petra schmidt')
+    assert ids(results)[0] == 5
+    assert results[0]['name'] == 'Petra Schmidt'
+    assert ids(index.search('', birthdate='1962-07-09')) == [5]
+    assert index.search('', birthdate='1962-07-08') == []
+    assert len(index) == len(PATIENTS + OTHERS)
+
+
+def test_removed_patients_leave_no_entries_behind(index):
+    doc = index._doc_by_patient[3]
+    index.remove(3)
+    assert 3 not in ids(index.search('marianne'))
+    assert 3 not in ids(index.search('ma'))
+    assert all(entry[1] != doc for entry in index._prefix)
+    assert doc not in index._by_birthdate['1980-04-02']
+    assert len(index) == len(PATIENTS + OTHERS) - 1
+
+
+def test_tombstones_trigger_compaction():
+    index = PatientSearchIndex()
+    index.rebuild(PATIENTS)
+    index.remove(1)
+    assert index._tombstones == 1
+    index.remove(2)
+    # Two of five documents dead is past the rebuild fraction
+    assert index._tombstones == 0
+    assert len(index._patient_ids) == 3
+    assert set(ids(index.search('', birthdate='1980-04-02'))) == {3}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from routes.patients_routes import patients_bp
+
+    release = threading.Event()
+
+    def load_patients():
+        release.wait(5)
+        yield from PATIENTS
+
+    monkeypatch.setattr(patient_search_service, 'patient_index', None)
+    monkeypatch.setattr(patient_search_service, '_load_patients', load_patients)
+
+    app = Flask(__name__)
+    app.config.update(JWT_SECRET_KEY='test-secret-key-that-is-long-enough', PATIENT_INDEX_MAX_AGE_SECONDS=3600)
+    JWTManager(app)
+    app.register_blueprint(patients_bp)
+    with app.app_context():
+        token = create_access_token(identity='doctor@aidentify.com')
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f"Bearer {token}"
+    client.release = release
+    return client
+
+
+def test_search_is_not_blocked_by_the_index_build(client):
+    response = client.get('/api/patients/search?q=maria')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(patient_search_service.INDEX_LOADING_RETRY_SECONDS)
+
+    client.release.set()
+    with patient_search_service._index_lock:
+        pass  # the background build has finished
+    response = client.get('/api/patients/search?q=maria')
+    assert response.status_code == 200
+    assert response.get_json()['results'][0]['id'] == 1
@@ -0,0 +1,77 @@
+# backend/tests/test_precompute.py
+"""Precompute marker counts kept in per-worker files, and probes not counting as load."""
+import pytest
+from flask import Flask, Blueprint, jsonify
+
+from services.precompute import precompute_service
+from services.precompute.precompute_service import PrecomputeManager, init_precompute, marker_key, active_requests
+from services.storage.storage_backend import LocalStorage
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    storage = LocalStorage(str(tmp_path))
+    monkeypatch.setattr(precompute_service, 'get_storage', lambda: storage)
+    monkeypatch.setattr(precompute_service, 'COUNTS_CACHE_SECONDS', 0)
+    return storage
+
+
+def test_counts_follow_marker_changes_without_listing_markers(storage, monkeypatch):
+    manager = PrecomputeManager('model.keras')
+    for key in ('derived/a', 'derived/b', 'derived/c'):
+        storage.write_bytes(marker_key('pending', key), key.encode('utf-8'))
+        manager._count_marker('pending')
+    manager._mark_used('derived/a')
+    manager._move_marker(storage, 'derived/b', marker_key('pending', 'derived/b'), 'wasted')
+
+    listed = []
+    original_list = storage.list
+    monkeypatch.setattr(storage, 'list', lambda prefix='': listed.append(prefix) or original_list(prefix))
+    assert manager.result_counts() == {'pending': 1, 'used': 1, 'wasted': 1}
+    assert listed == ['precompute/counts/']
+
+
+def test_counts_are_summed_across_workers(storage, monkeypatch):
+    first, second = PrecomputeManager('model.keras'), PrecomputeManager('model.keras')
+    monkeypatch.setattr(precompute_service.os, 'getpid', lambda: 1)
+    first._count_marker('pending')
+    monkeypatch.setattr(precompute_service.os, 'getpid', lambda: 2)
+    # A result computed by one worker is used through another
+    second._count_marker('used')
+    assert first.result_counts() == second.result_counts() == {'pending': 0, 'used': 1, 'wasted': 0}
+
+
+def test_counts_older_than_a_day_are_dropped(storage, monkeypatch):
+    manager = PrecomputeManager('model.keras')
+    now = 10 * precompute_service.COUNT_WINDOW_SECONDS
+    monkeypatch.setattr(precompute_service.time, 'time', lambda: now)
+    manager._count_marker('wasted')
+    now += precompute_service.COUNT_WINDOW_SECONDS + precompute_service.COUNT_BUCKET_SECONDS
+    assert manager.result_counts()['wasted'] == 0
+    manager._count_marker('used')
+    assert manager._marked.keys() == {now // 3600 * 3600}
+
+
+def test_probes_are_not_counted_as_load():
+    app = Flask(__name__)
+    seen = {}
+    health_bp, api_bp = Blueprint('health', __name__), Blueprint('images', __name__)
+
+    @health_bp.route('/health')
+    def health():
+        seen['health'] = active_requests()
+        return jsonify({})
+
+    @api_bp.route('/api/images')
+    def images():
+        seen['images'] = active_requests()
+        return jsonify({})
+
+    app.register_blueprint(health_bp)
+    app.register_blueprint(api_bp)
+    init_precompute(app)
+    client = app.test_client()
+    client.get('/health')
+    client.get('/api/images')
+    assert seen == {'health': 0, 'images': 1}
+    assert active_requests() == 0
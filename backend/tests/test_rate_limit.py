@@ -0,0 +1,86 @@
+# backend/tests/test_rate_limit.py
+import pytest
+from services.http import rate_limit
+from services.http.rate_limit import MemoryBucketStore, RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limit.time, 'monotonic', fake)
+    return fake
+
+
+def test_bucket_allows_burst_then_refuses(clock):
+    store = MemoryBucketStore()
+    results = [store.take('inference:a', per_second=1.0, burst=3) for _ in range(4)]
+    assert [allowed for allowed, _ in results] == [True, True, True, False]
+    assert results[2][1] == 0
+
+
+def test_bucket_refills_up_to_burst(clock):
+    store = MemoryBucketStore()
+    for _ in range(3):
+        store.take('inference:a', per_second=0.5, burst=3)
+    clock.now += 2
+    assert store.take('inference:a', per_second=0.5, burst=3) == (True, 0)
+    clock.now += 3600
+    allowed, tokens = store.take('inference:a', per_second=0.5, burst=3)
+    assert allowed and tokens == 2
+
+
+def test_buckets_are_per_key(clock):
+    store = MemoryBucketStore()
+    store.take('inference:a', per_second=1.0, burst=1)
+    assert store.take('inference:a', per_second=1.0, burst=1)[0] is False
+    assert store.take('inference:b', per_second=1.0, burst=1)[0] is True
+
+
+def test_limit_lookup_user_then_role_then_default():
+    limiter = RateLimiter(MemoryBucketStore(), {
+        'inference': {'doctor': {'per_minute': 30, 'burst': 15}},
+        'users': {'lab@example.com': {'inference': {'per_minute': 120, 'burst': 40}}}
+    })
+    assert limiter.limit_for('inference', 'lab@example.com', 'doctor') == {'per_minute': 120, 'burst': 40}
+    assert limiter.limit_for('inference', 'dr@example.com', 'doctor') == {'per_minute': 30, 'burst': 15}
+    assert limiter.limit_for('inference', 'x@example.com', 'employee') == rate_limit.DEFAULT_LIMITS['inference']['default']
+    assert limiter.limit_for('uploads', 'dr@example.com', 'doctor') is None
+
+
+def test_check_headers(clock):
+    limiter = RateLimiter(MemoryBucketStore(), {'inference': {'doctor': {'per_minute': 60, 'burst': 2}}})
+    allowed, headers = limiter.check('inference', 'dr@example.com', 'doctor')
+    assert allowed
+    assert headers == {'X-RateLimit-Limit': '2', 'X-RateLimit-Remaining': '1', 'X-RateLimit-Reset': '1'}
+
+    limiter.check('inference', 'dr@example.com', 'doctor')
+    allowed, headers = limiter.check('inference', 'dr@example.com', 'doctor')
+    assert not allowed
+    assert headers['X-RateLimit-Remaining'] == '0'
+    assert headers['X-RateLimit-Reset'] == '2'
+    assert headers['Retry-After'] == '1'
+    assert limiter.stats == {'allowed': 2, 'limited': 1}
+
+
+def test_check_unlimited_route_class():
+    limiter = RateLimiter(MemoryBucketStore())
+    assert limiter.check('uploads', 'dr@example.com', 'doctor') == (True, None)
+
+
+@pytest.mark.parametrize('limits', [
+    {'inference': {'doctor': {'per_minute': 0, 'burst': 5}}},
+    {'inference': {'doctor': {'per_minute': 10, 'burst': 0}}},
+    {'inference': {'doctor': {'burst': 5}}},
+    {'users': {'lab@example.com': {'inference': {'per_minute': -1, 'burst': 5}}}},
+])
+def test_invalid_limits_are_rejected(limits):
+    with pytest.raises(ValueError):
+        RateLimiter(MemoryBucketStore(), limits)
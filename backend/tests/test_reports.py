@@ -0,0 +1,65 @@
+# backend/tests/test_reports.py
+"""The reports listing only offers sorts its indexes serve, and each listing query has a plan check."""
+import pytest
+from flask import Flask
+
+from models import reportModel
+from models.reportModel import Report, SORTABLE_COLUMNS
+from services.database.schema import QUERY_PLAN_CHECKS
+
+
+class RecordingDb:
+    def __init__(self):
+        self.queries = []
+
+    def execute_query(self, query, params=None, fetch=False):
+        self.queries.append(' '.join(query.split()))
+        return []
+
+    def execute_single_query(self, query, params=None):
+        return {'total': 0}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = RecordingDb()
+    monkeypatch.setattr(reportModel, 'db_service', db)
+    return db
+
+
+FILTERS = [
+    {},
+    {'patient_id': 1},
+    {'doctor_id': 2, 'date_from': '2025-01-01', 'date_to': '2026-01-01'},
+]
+
+
+@pytest.mark.parametrize('sort', sorted(SORTABLE_COLUMNS))
+@pytest.mark.parametrize('filters', FILTERS)
+def test_listing_queries_are_plan_checked(db, sort, filters):
+    Report.list_reports(sort=sort, **filters)
+    checked = {' '.join(check['query'].split()) for check in QUERY_PLAN_CHECKS}
+    assert db.queries[-1] in checked
+
+
+@pytest.fixture
+def client(db):
+    from routes.reports_routes import reports_bp
+
+    app = Flask(__name__)
+    app.register_blueprint(reports_bp)
+    return app.test_client()
+
+
+@pytest.mark.parametrize('sort', ['patient_id', 'doctor_id', 'id; DROP TABLE reports'])
+def test_unindexed_sorts_are_rejected(client, db, sort):
+    response = client.get(f"/api/reports/?sort={sort}")
+    assert response.status_code == 400
+    assert db.queries == []
+
+
+def test_listing_returns_pagination_headers(client):
+    response = client.get('/api/reports/?sort=created_at&order=asc')
+    assert response.status_code == 200
+    assert response.get_json() == []
+    assert response.headers['X-Total-Count'] == '0'
@@ -0,0 +1,159 @@
+# backend/tests/test_schema.py
+"""Migration ordering, re-runnable index statements and the EXPLAIN plan classifier."""
+import re
+import pytest
+
+from services.database import schema
+from services.database.schema import MIGRATIONS, apply_migrations, check_query_plans, _plan_problem
+
+SHOW_INDEX = re.compile(r"SHOW INDEX FROM `(\w+)` WHERE Key_name = %s")
+
+
+class FakeCursor:
+    """Answers the statements schema.py issues from the state of a FakeDatabase."""
+
+    def __init__(self, database):
+        self.database = database
+        self._rows = []
+
+    def execute(self, statement, params=()):
+        statement = ' '.join(statement.split())
+        self.database.executed.append(statement)
+        match = SHOW_INDEX.match(statement)
+        if match:
+            key = (match.group(1), params[0])
+            self._rows = [{'Key_name': params[0]}] if key in self.database.indexes else []
+        elif statement == "SELECT version FROM schema_migrations":
+            self._rows = [{'version': version} for version in sorted(self.database.versions)]
+        elif statement.startswith("INSERT INTO schema_migrations"):
+            self.database.versions.add(params[0])
+        elif statement.startswith("EXPLAIN "):
+            self._rows = self.database.plans.get(statement[len("EXPLAIN "):], [])
+        else:
+            target = schema._index_target(statement)
+            if target:
+                verb, index, table = target
+                if verb == 'CREATE':
+                    self.database.indexes.add((table, index))
+                else:
+                    self.database.indexes.remove((table, index))
+
+    def fetchall(self):
+        return self._rows
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, database):
+        self.database = database
+
+    def is_connected(self):
+        return True
+
+    def cursor(self, dictionary=True):
+        return FakeCursor(self.database)
+
+    def commit(self):
+        pass
+
+
+class FakeDatabase:
+    """The slice of DatabaseService that schema.py uses."""
+
+    def __init__(self, versions=(), indexes=(), plans=None):
+        self.versions = set(versions)
+        self.indexes = set(indexes)
+        self.plans = plans or {}
+        self.executed = []
+        self.connection = FakeConnection(self)
+
+    def connect(self):
+        return True
+
+
+def test_migration_versions_are_unique_and_ascending():
+    versions = [version for version, _, _ in MIGRATIONS]
+    assert versions == sorted(set(versions))
+    assert versions[0] == 1
+
+
+def test_migrations_apply_in_order_and_are_recorded():
+    db = FakeDatabase()
+    assert apply_migrations(db) == [version for version, _, _ in MIGRATIONS]
+    assert db.versions == {version for version, _, _ in MIGRATIONS}
+    inserts = [s for s in db.executed if s.startswith("INSERT INTO schema_migrations")]
+    assert len(inserts) == len(MIGRATIONS)
+
+
+def test_applied_and_later_migrations_are_skipped():
+    db = FakeDatabase(versions={1})
+    assert apply_migrations(db, target=2) == [2]
+    assert apply_migrations(db) == [version for version, _, _ in MIGRATIONS if version > 2]
+
+
+def test_rerun_skips_indexes_already_created(monkeypatch):
+    monkeypatch.setattr(schema, 'MIGRATIONS', [
+        (1, "Indexes", [
+            "CREATE INDEX ix_a ON t (a)",
+            "CREATE UNIQUE INDEX ux_b ON t (b)",
+        ]),
+    ])
+    # A first attempt created ix_a, then failed before recording the version
+    db = FakeDatabase(indexes={('t', 'ix_a')})
+    assert apply_migrations(db) == [1]
+    assert "CREATE INDEX ix_a ON t (a)" not in db.executed
+    assert "CREATE UNIQUE INDEX ux_b ON t (b)" in db.executed
+
+
+def test_rerun_skips_indexes_already_dropped(monkeypatch):
+    monkeypatch.setattr(schema, 'MIGRATIONS', [
+        (1, "Replace index", [
+            "DROP INDEX ix_old ON t",
+            "DROP INDEX ix_older ON t",
+        ]),
+    ])
+    db = FakeDatabase(indexes={('t', 'ix_older')})
+    assert apply_migrations(db) == [1]
+    assert "DROP INDEX ix_old ON t" not in db.executed
+    assert "DROP INDEX ix_older ON t" in db.executed
+    assert not db.indexes
+
+
+def test_other_statements_always_run():
+    assert schema._index_target("CREATE TABLE IF NOT EXISTS t (id INT)") is None
+    assert schema._index_target("CREATE INDEX ix_a ON t (a)") == ('CREATE', 'ix_a', 't')
+    assert schema._index_target("DROP INDEX ix_a ON t") == ('DROP', 'ix_a', 't')
+
+
+@pytest.mark.parametrize('check, row, reason', [
+    ({}, {'type': 'ref', 'Extra': 'Using where'}, None),
+    ({}, {'type': 'ALL', 'Extra': ''}, 'full table scan'),
+    ({'allow_full_scan': True}, {'type': 'ALL', 'Extra': ''}, None),
+    ({}, {'type': 'index', 'Extra': ''}, 'full index scan'),
+    ({'allow_index_scan': True}, {'type': 'index', 'Extra': ''}, None),
+    ({'allow_full_scan': True}, {'type': 'index', 'Extra': ''}, None),
+    ({}, {'type': 'ref', 'Extra': 'Using where; Using filesort'}, 'filesort'),
+    ({'allow_filesort': True}, {'type': 'ref', 'Extra': 'Using filesort'}, None),
+    ({'allow_full_scan': True}, {'type': 'ALL', 'Extra': 'Using filesort'}, 'filesort'),
+    ({}, {'type': 'range', 'Extra': None}, None),
+])
+def test_plan_problem(check, row, reason):
+    assert _plan_problem(check, row) == reason
+
+
+def test_check_query_plans_reports_each_problem():
+    checks = [
+        {'name': 'indexed', 'query': "SELECT * FROM t WHERE a = %s", 'params': (1,)},
+        {'name': 'scan', 'query': "SELECT * FROM t", 'params': ()},
+    ]
+    db = FakeDatabase(plans={
+        "SELECT * FROM t WHERE a = %s": [{'table': 't', 'type': 'ref', 'key': 'ix_a', 'Extra': ''}],
+        "SELECT * FROM t": [{'table': 't', 'type': 'ALL', 'key': None, 'rows': 1000, 'Extra': ''}],
+    })
+    problems = check_query_plans(db, checks)
+    assert [(p['name'], p['reason'], p['rows']) for p in problems] == [('scan', 'full table scan', 1000)]
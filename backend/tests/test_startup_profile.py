@@ -0,0 +1,25 @@
+# backend/tests/test_startup_profile.py
+"""Cold-start gate: importing the app stays in budget and leaves TensorFlow and OpenCV unloaded."""
+import os
+import sys
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_startup_profile(*args):
+    return subprocess.run([sys.executable, '-m', 'benchmarks.startup_profile', *args],
+                          cwd=BACKEND_DIR, capture_output=True, text=True, timeout=300)
+
+
+def test_app_import_within_budget_and_lazy():
+    proc = run_startup_profile()
+    assert proc.returncode == 0, proc.stdout[-2000:] + proc.stderr[-2000:]
+    assert 'OVER BUDGET' not in proc.stdout
+
+
+def test_eager_import_of_forbidden_module_fails():
+    # json is imported with the app, so forbidding it must fail the check
+    proc = run_startup_profile('--forbid', 'json')
+    assert proc.returncode == 1
+    assert 'json is imported eagerly' in proc.stdout
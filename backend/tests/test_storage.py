@@ -0,0 +1,109 @@
+# backend/tests/test_storage.py
+"""S3Storage against moto's S3 stand-in, and CachedStorage's eviction and write-behind."""
+import threading
+import pytest
+
+from services.storage import storage_backend
+from services.storage.storage_backend import S3Storage, CachedStorage, LocalStorage
+
+BUCKET = 'aidentify-test'
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    pytest.importorskip('boto3')
+    moto = pytest.importorskip('moto')
+    for name, value in (('AWS_ACCESS_KEY_ID', 'testing'), ('AWS_SECRET_ACCESS_KEY', 'testing'),
+                        ('AWS_DEFAULT_REGION', 'us-east-1')):
+        monkeypatch.setenv(name, value)
+    with moto.mock_aws():
+        storage = S3Storage(BUCKET, prefix='uploads', region='us-east-1')
+        storage.client.create_bucket(Bucket=BUCKET)
+        yield storage
+
+
+def test_s3_round_trip(s3):
+    s3.write_bytes('blobs/ab/cd/x.png', b'pixels')
+    assert s3.read_bytes('blobs/ab/cd/x.png') == b'pixels'
+    assert s3.exists('blobs/ab/cd/x.png')
+    assert s3.stat('blobs/ab/cd/x.png').size == 6
+    with s3.local_path('blobs/ab/cd/x.png') as path:
+        with open(path, 'rb') as f:
+            assert f.read() == b'pixels'
+    # Keys are stored under the prefix but listed without it
+    s3.write_bytes('derived/00/11/enhanced_x.png', b'enhanced')
+    assert [obj.key for obj in s3.list('blobs/')] == ['blobs/ab/cd/x.png']
+    s3.delete('blobs/ab/cd/x.png')
+    assert not s3.exists('blobs/ab/cd/x.png')
+
+
+def test_s3_missing_key(s3):
+    assert s3.stat('nope') is None
+    with pytest.raises(FileNotFoundError):
+        s3.read_bytes('nope')
+    with pytest.raises(FileNotFoundError):
+        with s3.local_path('nope'):
+            pass
+
+
+def test_cached_reads_hit_the_cache(s3, tmp_path):
+    s3.write_bytes('a.png', b'a' * 10)
+    cached = CachedStorage(s3, str(tmp_path), max_cache_bytes=100)
+    assert cached.read_bytes('a.png') == b'a' * 10
+    assert cached.read_bytes('a.png') == b'a' * 10
+    assert (cached.stats['misses'], cached.stats['hits']) == (1, 1)
+
+
+def test_background_writes_land_remotely(s3, tmp_path):
+    cached = CachedStorage(s3, str(tmp_path), max_cache_bytes=100)
+    cached.write_bytes('derived/enhanced_a.png', b'result', background=True)
+    cached.flush()
+    assert s3.read_bytes('derived/enhanced_a.png') == b'result'
+    assert cached.describe()['pending_writes'] == 0
+
+
+class BlockingRemote(LocalStorage):
+    """Remote whose uploads of `slow` keys wait until released, and that fails a set number of times."""
+
+    def __init__(self, root, failures=0, slow=()):
+        super().__init__(root)
+        self.release = threading.Event()
+        self.slow = set(slow)
+        self.failures = failures
+        self.attempts = 0
+
+    def put_file(self, key, local_path, move=False):
+        self.attempts += 1
+        if key in self.slow:
+            self.release.wait()
+        if self.failures:
+            self.failures -= 1
+            raise OSError('remote unavailable')
+        super().put_file(key, local_path, move)
+
+
+def test_eviction_skips_pending_writes(tmp_path):
+    remote = BlockingRemote(str(tmp_path / 'remote'), slow={'pending.png'})
+    cached = CachedStorage(remote, str(tmp_path / 'cache'), max_cache_bytes=25)
+    cached.write_bytes('pending.png', b'p' * 10, background=True)
+    # The oldest entry is pending; newer ones are evicted instead of the cache growing
+    for name in ('b', 'c', 'd', 'e'):
+        cached.write_bytes(f"{name}.png", name.encode() * 10)
+    assert cached.describe()['cache_bytes'] <= 25
+    assert cached.cache.exists('pending.png')
+    assert not cached.cache.exists('b.png')
+    remote.release.set()
+    cached.flush()
+    assert remote.read_bytes('pending.png') == b'p' * 10
+
+
+def test_failed_background_write_is_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage_backend, 'UPLOAD_RETRY_SECONDS', 0.01)
+    remote = BlockingRemote(str(tmp_path / 'remote'), failures=2)
+    cached = CachedStorage(remote, str(tmp_path / 'cache'), max_cache_bytes=100)
+    cached.write_bytes('result.png', b'r' * 10, background=True)
+    cached._executor.shutdown(wait=True)
+    assert remote.attempts == 3
+    assert remote.read_bytes('result.png') == b'r' * 10
+    assert cached.stats['write_errors'] == 2
+    assert cached.describe()['pending_writes'] == 0
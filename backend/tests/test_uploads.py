@@ -0,0 +1,121 @@
+# backend/tests/test_uploads.py
+"""Blob store failure handling, upload validation and the sharded layout of derived images."""
+import io
+import os
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+from services.storage import blob_store as blob_store_module
+from services.storage.blob_store import BlobStore
+from services.storage.storage_backend import LocalStorage
+from services.image_processing.image_io import derived_key
+
+# Smallest PNG header probe_image accepts: signature and a 2x3 IHDR chunk
+PNG_HEADER = (b'\x89PNG\r\n\x1a\n' + b'\x00\x00\x00\rIHDR' + (2).to_bytes(4, 'big') + (3).to_bytes(4, 'big')
+              + b'\x08\x00\x00\x00\x00' + b'\x00' * 4)
+
+
+class FailingStorage(LocalStorage):
+    def put_file(self, key, local_path, move=False):
+        raise OSError('disk full')
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store_module, 'get_metadata', lambda digest: {'digest': digest})
+    monkeypatch.setattr(blob_store_module, 'record_metadata', lambda path, digest: None)
+    store = BlobStore(str(tmp_path), LocalStorage(str(tmp_path)))
+    store.released = []
+    monkeypatch.setattr(store, '_add_reference', lambda *args: 7)
+    monkeypatch.setattr(store, 'release', store.released.append)
+    return store
+
+
+def stored_files(root):
+    return sorted(os.path.relpath(os.path.join(dirpath, name), root)
+                  for dirpath, _, names in os.walk(root) for name in names)
+
+
+def test_upload_is_stored_under_its_sharded_key(store, tmp_path):
+    stored = store.put_stream(io.BytesIO(PNG_HEADER), 'scan.png', 'doctor')
+    digest = stored['digest']
+    assert stored['upload_id'] == 7
+    assert stored['key'] == f"blobs/{digest[:2]}/{digest[2:4]}/{digest}.png"
+    assert stored_files(str(tmp_path)) == [stored['key']]
+
+
+def test_failed_bookkeeping_fails_the_upload(store, tmp_path, monkeypatch):
+    def fail(*args):
+        raise RuntimeError('database down')
+    monkeypatch.setattr(store, '_add_reference', fail)
+
+    with pytest.raises(RuntimeError):
+        store.put_stream(io.BytesIO(PNG_HEADER), 'scan.png', 'doctor')
+    # Neither an untracked blob nor the temp file is left behind
+    assert stored_files(str(tmp_path)) == []
+
+
+def test_failed_store_withdraws_the_reference(store, tmp_path):
+    store.storage = FailingStorage(str(tmp_path))
+    with pytest.raises(OSError):
+        store.put_stream(io.BytesIO(PNG_HEADER), 'scan.png', 'doctor')
+    assert store.released == [7]
+    assert stored_files(str(tmp_path)) == []
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    from routes import images
+    monkeypatch.setattr(images, 'get_blob_store', lambda root: store)
+    monkeypatch.setattr(images, 'get_precompute_manager', lambda: None)
+
+    app = Flask(__name__)
+    app.config.update(JWT_SECRET_KEY='test-secret-key-that-is-long-enough',
+                      UPLOAD_FOLDER=store.root, UPLOAD_MAX_IMAGE_DIMENSION=1000)
+    JWTManager(app)
+    app.register_blueprint(images.image_bp)
+    with app.app_context():
+        token = create_access_token(identity='doctor@aidentify.com')
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f"Bearer {token}"
+    return client
+
+
+def upload(client, data, filename='scan.png'):
+    return client.post('/api/images/upload', data={'image': (io.BytesIO(data), filename)},
+                       content_type='multipart/form-data')
+
+
+def test_upload_route_rejects_non_images(client, tmp_path):
+    response = upload(client, b'%PDF-1.7 not an image', 'scan.pdf')
+    assert response.status_code == 415
+    assert stored_files(str(tmp_path)) == []
+
+
+def test_upload_route_rejects_oversized_images(client):
+    header = PNG_HEADER[:16] + (5000).to_bytes(4, 'big') + PNG_HEADER[20:]
+    assert upload(client, header).status_code == 422
+
+
+def test_upload_route_reports_storage_failure(client, store, monkeypatch):
+    def fail(*args):
+        raise RuntimeError('database down')
+    monkeypatch.setattr(store, '_add_reference', fail)
+    assert upload(client, PNG_HEADER).status_code == 500
+
+
+def test_upload_route_stores_images(client):
+    response = upload(client, PNG_HEADER)
+    assert response.status_code == 200
+    assert response.get_json()['upload_id'] == 7
+
+
+def test_derived_keys_are_sharded():
+    digest = 'ab' * 32
+    key = derived_key('enhanced_', f"blobs/ab/ab/{digest}.png")
+    directory, name = key.rsplit('/', 1)
+    assert name == f"enhanced_{digest}.png"
+    assert directory.startswith('derived/') and len(directory.split('/')) == 3
+    assert derived_key('enhanced_', f"blobs/ab/ab/{digest}.png") == key
+    assert derived_key('thumb_', 'legacy').endswith('/thumb_legacy.png')
@@ -0,0 +1,15 @@
+# backend/wsgi.py
+"""
+Production entry point: ``gunicorn -c gunicorn.conf.py wsgi:app``.
+
+gunicorn.conf.py sets preload_app, so this module is imported once in the
+master process.  Only the app is created here: TensorFlow and the models
+are loaded in each worker after it forks (see services/health/warmup.py),
+since TensorFlow's thread pools do not survive fork and a worker that
+inherits them can hang on its first prediction.
+"""
+import os
+from app import create_app
+
+# Background threads do not survive fork; the post_fork hook starts them per worker
+app = create_app(os.getenv('FLASK_CONFIG', 'production'), start_background=False)